@@ -1,3 +1,10 @@
+"""
+energypy - reinforcement learning for energy systems
+
+tensorflow, gym and matplotlib are imported when they are first needed
+(i.e. when making an agent or a gym env), not on import energypy
+"""
+
 from energypy.common import feed_forward_network, convolutional_network
 from energypy.common import make_network
 
@@ -6,8 +13,12 @@ from energypy.envs import make_env
 
 from energypy.common.memories import make_memory
 from energypy.common import policy_register
+from energypy.common.register import lazy
 
-from energypy.experiments import experiment, make_paths, load_dataset
-from energypy.experiments.runner import Runner
+from energypy.experiments import make_paths, load_dataset
+from energypy.experiments import Runner
 
 from energypy.common.logging import make_logger
+
+#  not imported from energypy.experiments - the name clashes with the module
+experiment = lazy('energypy.experiments.experiment:experiment')
@@ -1,17 +1,20 @@
 import logging
 
-from energypy.agents.dqn import DQN
-from energypy.agents.naive import NoOp, RandomAgent
+from energypy.common.register import Register
 
 
 logger = logging.getLogger(__name__)
 
 
-agent_register = {
-    'dqn': DQN,
-    'random': RandomAgent,
-    'no_op': NoOp,
-}
+#  agents are imported on first use - tensorflow is imported with them
+agent_register = Register({
+    'dqn': 'energypy.agents.dqn:DQN',
+    'ensemble_dqn': 'energypy.agents.ensemble_dqn:EnsembleDQN',
+    'random': 'energypy.agents.naive:RandomAgent',
+    'no_op': 'energypy.agents.naive:NoOp',
+    'lookup_table': 'energypy.agents.naive:LookupTableAgent',
+    'mpc': 'energypy.agents.naive:MPCAgent',
+})
 
 
 def make_agent(agent_id, **kwargs):
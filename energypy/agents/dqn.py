@@ -4,13 +4,14 @@ import numpy as np
 import tensorflow as tf
 
 from energypy.agents.agent import BaseAgent
-from energypy.common.policies import epsilon_greedy_policy, softmax_policy
+from energypy.common.policies.epsilon_greedy import epsilon_greedy_policy
+from energypy.common.policies.softmax import softmax_policy
 
-from energypy.common.np_utils import find_sub_array_in_2D_array as find_action
+from energypy.common.memories.prefetch import BatchPrefetcher
 from energypy.common.tf_utils import make_copy_ops, get_tf_params
-from energypy.common.utils import read_iterable_from_config
+from energypy.common.utils import ensure_dir, read_iterable_from_config
 
-from energypy import make_network
+from energypy.common.networks import make_network
 
 
 logger = logging.getLogger(__name__)
@@ -52,6 +53,9 @@ class DQN(BaseAgent):
 
             update_target_net=1,
             tau=0.001,
+
+            prefetch_batches=0,
+            graph_memory=False,
             **kwargs):
 
         self.total_steps = int(total_steps)
@@ -90,6 +94,19 @@ class DQN(BaseAgent):
         self.update_target_net = int(update_target_net)
         self.tau_val = float(tau)
 
+        #  experience is copied into tf variables and sampled in the graph
+        self.graph_memory = bool(graph_memory)
+
+        if self.graph_memory and self.network_id != 'ff':
+            raise ValueError('graph_memory only supports the ff network')
+
+        #  batches for learning are prepared in a background thread
+        if int(prefetch_batches):
+            self.prefetcher = BatchPrefetcher(
+                self.prepare_batch, num_batches=int(prefetch_batches))
+        else:
+            self.prefetcher = None
+
         with tf.variable_scope('constants'):
 
             self.discount = tf.Variable(
@@ -161,6 +178,8 @@ class DQN(BaseAgent):
     def build_acting_graph(self):
 
         with tf.variable_scope('online') as scope:
+            #  kept so the fused learning loop can re-enter this scope
+            self.online_scope = scope
 
             self.online_q_values = make_network(
                 network_id=self.network_id,
@@ -226,7 +245,8 @@ class DQN(BaseAgent):
                 raise ValueError('{} policy not supported'.format(self.policy))
 
     def build_learning_graph(self):
-        with tf.variable_scope('target', reuse=False):
+        with tf.variable_scope('target', reuse=False) as scope:
+            self.target_scope = scope
 
             self.target_q_values = make_network(
                 network_id=self.network_id,
@@ -250,7 +270,9 @@ class DQN(BaseAgent):
             self.target_params
         )
 
-        with tf.variable_scope('bellman_target'):
+        with tf.variable_scope('bellman_target') as scope:
+            self.bellman_scope = scope
+
             self.q_selected_actions = tf.reduce_sum(
                 self.online_q_values * tf.one_hot(
                     self.selected_action_indicies,
@@ -296,7 +318,8 @@ class DQN(BaseAgent):
                 tf.reshape(self.bellman, (-1, 1)),
                 center=self.batch_norm_center,
                 training=self.batch_norm_training,
-                trainable=self.batch_norm_trainable
+                trainable=self.batch_norm_trainable,
+                name='batch_normalization'
             )
 
         with tf.variable_scope('optimization'):
@@ -318,7 +341,7 @@ class DQN(BaseAgent):
                     name='learning_rate'
                 )
 
-            optimizer = tf.train.AdamOptimizer(
+            optimizer = self.optimizer = tf.train.AdamOptimizer(
                 learning_rate=self.learning_rate
             )
 
@@ -375,6 +398,9 @@ class DQN(BaseAgent):
             tf.summary.histogram('target_q_values', self.target_q_values),
                                ])
 
+        if self.graph_memory:
+            self.build_graph_memory()
+
         self.summaries['acting'] = tf.summary.merge(self.summaries['acting'])
         self.summaries['learning'] = tf.summary.merge(self.summaries['learning'])
 
@@ -388,9 +414,208 @@ class DQN(BaseAgent):
             {self.tau: 1.0}
         )
 
+    def build_graph_memory(self):
+        """
+        A replay memory held in tf variables and a fused training loop
+
+        learn(n_updates) runs n gradient steps and target net updates in a
+        single sess.run - batches are sampled uniformly in the graph
+        """
+        size = self.memory.size
+        obs_shape = self.observation_space.shape
+
+        with tf.variable_scope('graph_memory'):
+            self.graph_buffers = {
+                'observation': tf.Variable(
+                    tf.zeros((size, *obs_shape)), trainable=False),
+                'action': tf.Variable(
+                    tf.zeros((size,), dtype=tf.int64), trainable=False),
+                'reward': tf.Variable(tf.zeros((size,)), trainable=False),
+                'next_observation': tf.Variable(
+                    tf.zeros((size, *obs_shape)), trainable=False),
+                'done': tf.Variable(
+                    tf.zeros((size,), dtype=tf.bool), trainable=False),
+            }
+
+            self.graph_count = tf.Variable(
+                tf.constant(0, dtype=tf.int64), trainable=False)
+
+            #  new experience is scattered into the buffers
+            self.graph_positions = tf.placeholder(
+                shape=(None,), dtype=tf.int64, name='positions')
+
+            self.graph_experience = {
+                key: tf.placeholder(
+                    shape=(None, *var.get_shape().as_list()[1:]),
+                    dtype=var.dtype.base_dtype,
+                    name=key
+                )
+                for key, var in self.graph_buffers.items()
+            }
+
+            self.new_count = tf.placeholder(
+                shape=(), dtype=tf.int64, name='new_count')
+
+            self.graph_remember = tf.group(
+                *[tf.scatter_update(
+                    var, self.graph_positions, self.graph_experience[key])
+                  for key, var in self.graph_buffers.items()],
+                tf.assign(self.graph_count, self.new_count)
+            )
+
+        self.graph_synced = 0
+
+        with tf.variable_scope('fused_learning'):
+            self.n_updates = tf.placeholder(
+                shape=(), dtype=tf.int64, name='n_updates')
+
+            def body(update):
+                indicies = tf.random_uniform(
+                    (self.batch_size,),
+                    minval=0,
+                    maxval=self.graph_count,
+                    dtype=tf.int64
+                )
+
+                batch = {key: tf.gather(var, indicies)
+                         for key, var in self.graph_buffers.items()}
+
+                #  re-entering the scope objects (not their names) avoids
+                #  nesting them under fused_learning
+                with tf.variable_scope(self.online_scope, reuse=True):
+                    online_q = make_network(
+                        network_id=self.network_id,
+                        scope='online_obs',
+                        input_tensor=batch['observation'],
+                        input_shape=self.observation_space.shape,
+                        layers=self.layers,
+                        output_nodes=self.num_actions
+                    )
+
+                    if self.double_q:
+                        online_next_q = make_network(
+                            network_id=self.network_id,
+                            scope='online_next_obs',
+                            input_tensor=batch['next_observation'],
+                            input_shape=self.observation_space.shape,
+                            layers=self.layers,
+                            output_nodes=self.num_actions
+                        )
+
+                with tf.variable_scope(self.target_scope, reuse=True):
+                    target_q = make_network(
+                        network_id=self.network_id,
+                        scope='target',
+                        input_tensor=batch['next_observation'],
+                        input_shape=self.observation_space.shape,
+                        layers=self.layers,
+                        output_nodes=self.num_actions
+                    )
+
+                q_selected = tf.reduce_sum(
+                    online_q * tf.one_hot(batch['action'], self.num_actions),
+                    1
+                )
+
+                if self.double_q:
+                    next_q = tf.reduce_sum(
+                        target_q * tf.one_hot(
+                            tf.argmax(online_next_q, axis=1),
+                            self.num_actions),
+                        axis=1
+                    )
+
+                else:
+                    next_q = tf.reduce_max(target_q, axis=1)
+
+                next_q = tf.where(batch['done'], tf.zeros_like(next_q), next_q)
+                bellman = batch['reward'] + self.discount * next_q
+
+                #  reuses the batch norm variables of the learning graph
+                with tf.variable_scope(self.bellman_scope, reuse=True):
+                    bellman_norm = tf.layers.batch_normalization(
+                        tf.reshape(bellman, (-1, 1)),
+                        center=self.batch_norm_center,
+                        training=self.batch_norm_training,
+                        trainable=self.batch_norm_trainable,
+                        name='batch_normalization',
+                        reuse=True
+                    )
+
+                loss = tf.reduce_mean(tf.losses.huber_loss(
+                    tf.reshape(bellman_norm, (-1,)),
+                    q_selected,
+                    reduction=tf.losses.Reduction.NONE
+                ))
+
+                grads_and_vars = [
+                    (tf.clip_by_norm(grad, self.gradient_norm_clip), var)
+                    for grad, var in self.optimizer.compute_gradients(
+                        loss, var_list=self.online_params)
+                    if grad is not None
+                ]
+
+                train_op = self.optimizer.apply_gradients(grads_and_vars)
+
+                #  same schedule of target net updates as learn()
+                step = self.learn_step_tensor + update
+                with tf.control_dependencies([train_op]):
+                    copy = tf.cond(
+                        tf.equal(tf.mod(step, self.update_target_net), 0),
+                        lambda: self.soft_update(),
+                        lambda: tf.constant(True)
+                    )
+
+                with tf.control_dependencies([copy]):
+                    return update + 1
+
+            self.fused_train_op = tf.while_loop(
+                lambda update: update < self.n_updates,
+                body,
+                [tf.constant(0, dtype=tf.int64)],
+                back_prop=False
+            )
+
+    def soft_update(self):
+        """ target net update with tau inside the fused loop """
+        tau = self.tau_val
+        updates = [
+            target.assign(tau * online + (1 - tau) * target)
+            for online, target in zip(self.online_params, self.target_params)
+        ]
+
+        with tf.control_dependencies(updates):
+            return tf.constant(True)
+
     def __repr__(self):
         return '<energypy DQN agent>'
 
+    def export(self, path):
+        """
+        Saves the online network for acting without tensorflow
+
+        Load with energypy.agents.numpy_policy.NumpyPolicy
+
+        args
+            path (str) .npz file
+        """
+        params = get_tf_params('online')
+        values = self.sess.run(params)
+
+        ensure_dir(path)
+        np.savez(
+            path,
+            network=self.network_id,
+            discrete_actions=self.discrete_actions,
+            observation_shape=np.array(self.observation_space.shape),
+            action_shape=np.array(self.action_space.shape),
+            strides=np.array(self.strides or [], dtype=int),
+            **{'params/{}'.format(param.name.split(':')[0]): value
+               for param, value in zip(params, values)}
+        )
+
+        logger.info('exported {} parameters to {}'.format(len(params), path))
+
     def _act(self, observation, explore=1.0):
         """ selecting an action based on an observation """
         action, summary = self.sess.run(
@@ -410,33 +635,111 @@ class DQN(BaseAgent):
 
         return action.reshape(1, *self.env.action_space.shape)
 
-    def _learn(self):
-        """ our agent attempts to make sense of the world """
+    def remember(self, observation, action, reward, next_observation, done):
+        """ the memory is locked while a batch is being prefetched """
+        if self.prefetcher:
+            with self.prefetcher.lock:
+                return super().remember(
+                    observation, action, reward, next_observation, done)
+
+        return super().remember(
+            observation, action, reward, next_observation, done)
+
+    def action_indicies(self, actions):
+        """ index of each action within the discrete actions """
+        actions = np.array(actions).reshape(
+            -1, 1, self.discrete_actions.shape[1])
+
+        return np.argmax(
+            np.all(actions == self.discrete_actions, axis=2), axis=1)
+
+    def prepare_batch(self):
+        """
+        Samples a batch and makes the feed for the train op
+
+        returns
+            feed (dict) {placeholder: np.array}
+        """
+        batch = self.memory.get_batch(self.batch_size)
+
+        return {
+            self.observation: batch['observation'],
+            self.selected_action_indicies: self.action_indicies(
+                batch['action']),
+            self.reward: batch['reward'],
+            self.next_observation: batch['next_observation'],
+            self.terminal: batch['done']  #  should be ether done or terminal TODO
+        }
+
+    def sync_graph_memory(self):
+        """ copies experience remembered since the last sync into the graph """
+        new = min(self.memory.count - self.graph_synced, len(self.memory))
+
+        if new > 0:
+            batch = self.memory.latest(new)
+            positions = (self.memory.count - new + np.arange(new)) \
+                % self.memory.size
+
+            feed = {
+                self.graph_positions: positions,
+                self.new_count: len(self.memory),
+                self.graph_experience['action']: self.action_indicies(
+                    batch['action']),
+                self.graph_experience['reward']: batch['reward'].reshape(-1),
+                self.graph_experience['done']: batch['done'].reshape(-1)
+            }
+
+            for key in ['observation', 'next_observation']:
+                feed[self.graph_experience[key]] = batch[key]
+
+            self.sess.run(self.graph_remember, feed)
+
+        self.graph_synced = self.memory.count
+
+    def _learn(self, n_updates=1):
+        """
+        our agent attempts to make sense of the world
+
+        args
+            n_updates (int) gradient steps - fused into one sess.run when
+                using graph_memory
+        """
         if self.memory.type == 'priority':
             raise NotImplementedError(
                 'Add importance sample weights to loss as per pervious version'
             )
 
-        batch = self.memory.get_batch(self.batch_size)
+        n_updates = int(n_updates)
+
+        if self.graph_memory:
+            self.sync_graph_memory()
 
-        #  awkward bit - finding the action indicies using np :(
-        #  working on a tensorflow solution
-        indicies = []
-        for action in batch['action']:
-            indicies.append(
-                find_action(np.array(action).reshape(-1), self.discrete_actions)
+            self.sess.run(
+                self.fused_train_op,
+                {self.n_updates: n_updates,
+                 self.learn_step_tensor: self.learn_step}
             )
 
+            self.learn_step += n_updates - 1
+            return
+
+        for update in range(n_updates):
+            if update > 0:
+                self.learn_step += 1
+
+            self.learn_batch()
+
+    def learn_batch(self):
+        """ a single gradient step with a batch sampled in numpy """
+        if self.prefetcher:
+            feed = self.prefetcher.get()
+        else:
+            feed = self.prepare_batch()
+
+        feed[self.learn_step_tensor] = self.learn_step
+
         _, summary = self.sess.run(
-            [self.train_op, self.summaries['learning']],
-            {self.learn_step_tensor: self.learn_step,
-             self.observation: batch['observation'],
-             self.selected_action_indicies: indicies,
-             self.reward: batch['reward'],
-             self.next_observation: batch['next_observation'],
-             self.terminal: batch['done']  #  should be ether done or terminal TODO
-             }
-        )
+            [self.train_op, self.summaries['learning']], feed)
 
         self.writers['learning'].add_summary(summary, self.learn_step)
         self.writers['learning'].flush()
@@ -0,0 +1,415 @@
+"""
+An ensemble of independent DQN agents trained in a single graph
+
+Each member has its own env, memory, network weights and exploration -
+the weights of all members are stacked so acting and learning are a
+single batched matmul per layer.  Useful for seed sweeps of small networks
+that would otherwise under-utilise the CPU
+"""
+
+import logging
+
+import numpy as np
+import tensorflow as tf
+
+import energypy
+from energypy.common.networks import make_network
+from energypy.common.tf_utils import make_copy_ops, get_tf_params
+from energypy.common.utils import read_iterable_from_config
+
+
+logger = logging.getLogger(__name__)
+
+#  DQN options the ensemble doesn't support - only their defaults are allowed
+unsupported = {
+    'network': 'ff',
+    'filters': None,
+    'kernels': None,
+    'strides': None,
+    'policy': 'e_greedy',
+    'learning_rate_decay': 1.0,
+    'batch_norm_center': True,
+    'batch_norm_training': False,
+    'batch_norm_trainable': True,
+    'prefetch_batches': 0,
+    'graph_memory': False,
+}
+
+
+def check_kwargs(kwargs):
+    """
+    Raises for DQN options the ensemble would silently not use, warns for
+    any other ignored argument
+
+    args
+        kwargs (dict) the arguments EnsembleDQN doesn't take
+    """
+    for key, value in sorted(kwargs.items()):
+        if key in unsupported:
+            default = unsupported[key]
+
+            #  run configs are read as strings
+            if value is not None and str(value) not in (
+                    str(default), str(default).lower()):
+                try:
+                    same = float(value) == float(default)
+                except (TypeError, ValueError):
+                    same = False
+
+                if not same:
+                    raise ValueError(
+                        '{}={} is not supported by the ensemble'.format(
+                            key, value))
+
+        else:
+            logger.warning('ensemble_dqn ignoring {}={}'.format(key, value))
+
+
+class EnsembleDQN(object):
+    """
+    args
+        envs (list) one env per member
+        sess (tf.Session)
+        memory_type (str) each member has its own memory
+
+    Other args are the same as DQN - options in unsupported (i.e. conv
+    networks, batch norm of the Bellman target) raise if they are not the
+    default, other unused args are logged as warnings
+    """
+    def __init__(
+            self,
+            envs,
+            sess,
+            discount=0.95,
+            total_steps=10000,
+
+            double_q=False,
+            layers=(64, 32, 16),
+            num_discrete_actions=5,
+
+            memory_type='array',
+            memory_fraction=0.2,
+
+            epsilon_decay_fraction=0.3,
+            initial_epsilon=1.0,
+            final_epsilon=0.05,
+
+            batch_size=64,
+            learning_rate=0.001,
+            gradient_norm_clip=0.5,
+
+            update_target_net=1,
+            tau=0.001,
+
+            min_reward=-10,
+            max_reward=10,
+            **kwargs):
+
+        check_kwargs(kwargs)
+
+        self.envs = list(envs)
+        self.sess = sess
+        self.num_members = len(self.envs)
+
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+
+        self.total_steps = int(total_steps)
+
+        self.memories = [
+            energypy.make_memory(
+                memory_id=memory_type,
+                env=env,
+                size=self.total_steps * float(memory_fraction)
+            )
+            for env in self.envs
+        ]
+
+        self.act_step = 0
+        self.learn_step = 0
+
+        self.double_q = bool(double_q)
+        self.layers = read_iterable_from_config(layers)
+
+        self.discrete_actions = self.action_space.discretize(
+            num_discrete_actions)
+        self.num_actions = self.discrete_actions.shape[0]
+
+        self.epsilon_decay_fraction = float(epsilon_decay_fraction)
+        self.initial_epsilon = float(initial_epsilon)
+        self.final_epsilon = float(final_epsilon)
+
+        self.batch_size = int(batch_size)
+        self.learning_rate = float(learning_rate)
+
+        self.update_target_net = int(update_target_net)
+        self.tau_val = float(tau)
+
+        #  same clipping as BaseAgent.remember - None turns it off
+        self.min_reward = None if min_reward is None else float(min_reward)
+        self.max_reward = None if max_reward is None else float(max_reward)
+
+        with tf.variable_scope('constants'):
+            self.discount = tf.Variable(
+                initial_value=float(discount),
+                trainable=False,
+                name='gamma'
+            )
+
+            self.discrete_actions_tensor = tf.Variable(
+                initial_value=self.discrete_actions,
+                trainable=False,
+                name='discrete_actions',
+            )
+
+            self.gradient_norm_clip = tf.Variable(
+                initial_value=float(gradient_norm_clip),
+                trainable=False,
+                name='gradient_norm_clip'
+            )
+
+        #  first dimension of every placeholder is the ensemble member
+        obs_shape = (self.num_members, None, *self.observation_space.shape)
+
+        with tf.variable_scope('placeholders'):
+            self.observation = tf.placeholder(
+                shape=obs_shape, dtype=tf.float32, name='observation')
+
+            self.selected_action_indicies = tf.placeholder(
+                shape=(self.num_members, None),
+                dtype=tf.int64,
+                name='selected_action_indicies'
+            )
+
+            self.reward = tf.placeholder(
+                shape=(self.num_members, None),
+                dtype=tf.float32,
+                name='reward'
+            )
+
+            self.next_observation = tf.placeholder(
+                shape=obs_shape, dtype=tf.float32, name='next_observation')
+
+            self.terminal = tf.placeholder(
+                shape=(self.num_members, None),
+                dtype=tf.bool,
+                name='terminal'
+            )
+
+            self.learn_step_tensor = tf.placeholder(
+                shape=(), dtype=tf.int64, name='learn_step_tensor')
+
+            self.explore_toggle = tf.placeholder(
+                shape=(), dtype=tf.float32, name='explore_toggle')
+
+        self.build_acting_graph()
+
+        self.build_learning_graph()
+
+    def __repr__(self):
+        return '<energypy EnsembleDQN agent - {} members>'.format(
+            self.num_members)
+
+    def make_network(self, scope, input_tensor):
+        return make_network(
+            network_id='ensemble_ff',
+            scope=scope,
+            input_tensor=input_tensor,
+            input_shape=self.observation_space.shape,
+            layers=self.layers,
+            output_nodes=self.num_actions,
+            num_members=self.num_members
+        )
+
+    def build_acting_graph(self):
+        with tf.variable_scope('online'):
+            self.online_q_values = self.make_network(
+                'online_obs', self.observation)
+
+            if self.double_q:
+                #  layers use tf.AUTO_REUSE so the weights are shared
+                self.online_next_obs_q = self.make_network(
+                    'online_next_obs', self.next_observation)
+
+        with tf.variable_scope('e_greedy_policy'):
+            shape = tf.shape(self.online_q_values)[:2]
+
+            greedy = tf.argmax(self.online_q_values, axis=2)
+
+            random = tf.random_uniform(
+                shape,
+                minval=0,
+                maxval=self.num_actions,
+                dtype=tf.int64
+            )
+
+            #  each member explores independently
+            probabilities = tf.random_uniform(
+                shape, minval=0.0, maxval=self.explore_toggle)
+
+            self.epsilon = tf.train.polynomial_decay(
+                learning_rate=self.initial_epsilon,
+                global_step=self.learn_step_tensor,
+                decay_steps=self.total_steps * self.epsilon_decay_fraction,
+                end_learning_rate=self.final_epsilon,
+                power=1.0,
+                name='epsilon'
+            )
+
+            indicies = tf.where(
+                tf.greater(probabilities, self.epsilon), greedy, random)
+
+            self.policy = tf.gather(self.discrete_actions_tensor, indicies)
+
+    def build_learning_graph(self):
+        with tf.variable_scope('target'):
+            self.target_q_values = self.make_network(
+                'target', self.next_observation)
+
+        self.online_params = get_tf_params('online')
+        self.target_params = get_tf_params('target')
+
+        self.copy_ops, self.tau = make_copy_ops(
+            self.online_params,
+            self.target_params
+        )
+
+        with tf.variable_scope('bellman_target'):
+            self.q_selected_actions = tf.reduce_sum(
+                self.online_q_values * tf.one_hot(
+                    self.selected_action_indicies, self.num_actions),
+                axis=2
+            )
+
+            if self.double_q:
+                online_actions = tf.argmax(self.online_next_obs_q, axis=2)
+
+                next_state_max_q = tf.reduce_sum(
+                    self.target_q_values * tf.one_hot(
+                        online_actions, self.num_actions),
+                    axis=2
+                )
+
+            else:
+                next_state_max_q = tf.reduce_max(self.target_q_values, axis=2)
+
+            next_state_max_q = tf.where(
+                self.terminal,
+                tf.zeros_like(next_state_max_q),
+                next_state_max_q,
+                name='terminal_mask'
+            )
+
+            self.bellman = tf.stop_gradient(
+                self.reward + self.discount * next_state_max_q)
+
+        with tf.variable_scope('optimization'):
+            error = tf.losses.huber_loss(
+                self.bellman,
+                self.q_selected_actions,
+                scope='huber_loss',
+                reduction=tf.losses.Reduction.NONE
+            )
+
+            #  summing the member losses keeps the gradients independent
+            self.losses = tf.reduce_mean(error, axis=1)
+            loss = tf.reduce_sum(self.losses)
+
+            optimizer = tf.train.AdamOptimizer(
+                learning_rate=self.learning_rate)
+
+            with tf.variable_scope('gradient_clipping'):
+                grads_and_vars = optimizer.compute_gradients(
+                    loss, var_list=self.online_params)
+
+                #  clip the gradient of each member separately
+                grads_and_vars = [
+                    (tf.clip_by_norm(
+                        grad,
+                        self.gradient_norm_clip,
+                        axes=list(range(1, len(var.get_shape())))
+                    ), var)
+                    for grad, var in grads_and_vars if grad is not None
+                ]
+
+                self.train_op = optimizer.apply_gradients(grads_and_vars)
+
+        self.sess.run(tf.global_variables_initializer())
+
+        #  initialize the target net weights with the online weights
+        self.sess.run(self.copy_ops, {self.tau: 1.0})
+
+    def act(self, observation, explore=1.0):
+        """
+        args
+            observation (np.array) shape=(num_members, *obs_shape)
+            explore (float) 0.0 = 100% greedy, 1.0 = 100% explore
+
+        returns
+            action (np.array) shape=(num_members, *action_shape)
+        """
+        self.act_step += 1
+
+        action = self.sess.run(
+            self.policy,
+            {self.learn_step_tensor: self.learn_step,
+             self.explore_toggle: float(explore),
+             self.observation: np.array(observation).reshape(
+                 self.num_members, 1, *self.observation_space.shape)}
+        )
+
+        return action.reshape(self.num_members, *self.action_space.shape)
+
+    def remember(self, observation, action, reward, next_observation, done):
+        """ each argument has the members as the first dimension """
+        for member, memory in enumerate(self.memories):
+            member_reward = reward[member]
+
+            if self.min_reward and self.max_reward:
+                member_reward = max(
+                    self.min_reward, min(member_reward, self.max_reward))
+
+            memory.remember(
+                observation[member],
+                action[member],
+                member_reward,
+                next_observation[member],
+                done[member]
+            )
+
+    def get_batch(self):
+        """ stacks a batch from each memory """
+        batches = [memory.get_batch(self.batch_size)
+                   for memory in self.memories]
+
+        batch = {key: np.stack([b[key] for b in batches])
+                 for key in batches[0].keys()}
+
+        #  index of each action within the discrete actions
+        actions = batch['action'].reshape(
+            self.num_members, -1, 1, self.discrete_actions.shape[1])
+
+        batch['action_indicies'] = np.argmax(np.all(
+            actions == self.discrete_actions, axis=3), axis=2)
+
+        return batch
+
+    def learn(self):
+        """ one update of every member """
+        self.learn_step += 1
+        batch = self.get_batch()
+
+        _, losses = self.sess.run(
+            [self.train_op, self.losses],
+            {self.learn_step_tensor: self.learn_step,
+             self.observation: batch['observation'],
+             self.selected_action_indicies: batch['action_indicies'],
+             self.reward: batch['reward'].reshape(self.num_members, -1),
+             self.next_observation: batch['next_observation'],
+             self.terminal: batch['done'].reshape(self.num_members, -1)}
+        )
+
+        if self.learn_step % self.update_target_net == 0:
+            self.sess.run(self.copy_ops, {self.tau: self.tau_val})
+
+        return losses
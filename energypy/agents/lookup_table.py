@@ -0,0 +1,208 @@
+"""
+A policy distilled into a lookup table
+
+The greedy action of an exported DQN (see numpy_policy.py) is evaluated
+over a grid of a few observation features - i.e. price features and the
+battery charge.  All other features are held at a reference observation.
+The index of the best action for each cell of the grid is stored, so acting
+is only array indexing
+
+    policy = NumpyPolicy('policy.npz')
+    table = distill(
+        policy,
+        env.observation_space,
+        features=['C_forecast_electricity_price_hh_0 [$/MWh]',
+                  'C_charge_level [MWh]'],
+        num_bins=20
+    )
+    table.save('table.npz')
+
+    actions = LookupTable('table.npz').act(observations)
+"""
+
+import logging
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class LookupTable(object):
+    """
+    Greedy actions for a grid of observation features
+
+    args
+        path (str) optional .npz made by LookupTable.save
+    """
+    def __init__(self, path=None):
+        if path:
+            with np.load(str(path)) as data:
+                self.setup(**{name: data[name] for name in data.files})
+
+            logger.info('loaded lookup table {} from {}'.format(
+                self.table.shape, path))
+
+    def __repr__(self):
+        return '<energypy LookupTable {}>'.format(self.table.shape)
+
+    def setup(
+            self,
+            table,
+            features,
+            labels,
+            low,
+            high,
+            discrete_actions,
+            action_shape
+    ):
+        """
+        args
+            table (np.array) action index for each cell of the grid
+            features (np.array) positions of the features in an observation
+            labels (np.array) names of the features
+            low (np.array) lower edge of the grid for each feature
+            high (np.array) upper edge of the grid for each feature
+            discrete_actions (np.array) shape=(num_actions, *action_shape)
+            action_shape (tuple)
+        """
+        self.table = np.asarray(table)
+        self.features = np.asarray(features, dtype=int)
+        self.labels = [str(label) for label in labels]
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.discrete_actions = np.asarray(discrete_actions)
+        self.action_shape = tuple(action_shape)
+
+        self.num_bins = np.array(self.table.shape)
+
+        #  constant features always fall in the first bin
+        span = self.high - self.low
+        span[span == 0] = 1.0
+        self.scale = self.num_bins / span
+
+        return self
+
+    def save(self, path):
+        np.savez(
+            str(path),
+            table=self.table,
+            features=self.features,
+            labels=np.array(self.labels),
+            low=self.low,
+            high=self.high,
+            discrete_actions=self.discrete_actions,
+            action_shape=np.array(self.action_shape)
+        )
+
+        logger.info('saved lookup table to {}'.format(path))
+
+    def centers(self):
+        """ feature values at the center of each bin - a list per feature """
+        return [
+            low + (np.arange(bins) + 0.5) * (high - low) / bins
+            for low, high, bins in zip(self.low, self.high, self.num_bins)
+        ]
+
+    def cells(self, observation):
+        """
+        Grid cell of each observation - outside the grid is clipped to the
+        edge cells
+
+        args
+            observation (np.array) shape=(num_samples, obs_dim)
+
+        returns
+            cells (np.array) shape=(num_samples, num_features)
+        """
+        values = np.atleast_2d(np.asarray(observation, dtype=float))
+        values = values.reshape(values.shape[0], -1)[:, self.features]
+
+        cells = np.floor((values - self.low) * self.scale).astype(int)
+
+        return np.clip(cells, 0, self.num_bins - 1)
+
+    def act(self, observation):
+        """
+        args
+            observation (np.array) shape=(num_samples, obs_dim)
+
+        returns
+            action (np.array) shape=(num_samples, *action_shape)
+        """
+        indicies = self.table[tuple(self.cells(observation).T)]
+
+        return self.discrete_actions[indicies].reshape(-1, *self.action_shape)
+
+
+def distill(
+        policy,
+        observation_space,
+        features,
+        num_bins=10,
+        reference=None,
+        batch_size=65536
+):
+    """
+    Evaluates the greedy action of a policy over a grid of features
+
+    args
+        policy (NumpyPolicy) of an exported DQN
+        observation_space (GlobalSpace) the grid covers the low & high of
+            each feature
+        features (list) labels of the observation features in the table
+        num_bins (int or list) bins for each feature
+        reference (np.array) observation the other features are taken from
+            - defaults to the middle of the observation space
+        batch_size (int) observations per forward pass
+
+    returns
+        table (LookupTable)
+    """
+    if observation_space.dims == '2D':
+        raise ValueError('lookup tables need flat observations')
+
+    positions = [observation_space.info.index(label) for label in features]
+
+    if isinstance(num_bins, int):
+        num_bins = [num_bins] * len(features)
+
+    if reference is None:
+        reference = (observation_space.low + observation_space.high) / 2
+
+    reference = np.asarray(reference, dtype=float).reshape(1, -1)
+
+    table = np.empty(
+        num_bins,
+        dtype=np.min_scalar_type(policy.discrete_actions.shape[0] - 1))
+
+    lookup = LookupTable().setup(
+        table=table,
+        features=positions,
+        labels=features,
+        low=observation_space.low[positions],
+        high=observation_space.high[positions],
+        discrete_actions=policy.discrete_actions,
+        action_shape=policy.action_shape
+    )
+
+    centers = lookup.centers()
+    flat = table.reshape(-1)
+
+    for start in range(0, flat.shape[0], int(batch_size)):
+        cells = np.unravel_index(
+            np.arange(start, min(start + int(batch_size), flat.shape[0])),
+            table.shape)
+
+        observations = np.repeat(reference, cells[0].shape[0], axis=0)
+
+        for position, center, cell in zip(positions, centers, cells):
+            observations[:, position] = center[cell]
+
+        flat[start:start + cells[0].shape[0]] = np.argmax(
+            policy.q_values(observations), axis=1)
+
+    logger.info('distilled policy into a table of {} cells over {}'.format(
+        flat.shape[0], features))
+
+    return lookup
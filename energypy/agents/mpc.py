@@ -0,0 +1,373 @@
+"""
+Model predictive control of a battery with a linear program
+
+Each step a linear program is solved over the horizon of the price
+forecasts in the observation - one period per forecast column (i.e. the
+half hourly forecasts of the example dataset).  Only the first period of
+the plan is used as the action
+
+    variables per period k
+        c_k  charge rate [MW]              0 <= c_k <= power_rating
+        d_k  discharge rate [MW]           0 <= d_k <= power_rating
+        e_k  charge at the end of k [MWh]  0 <= e_k <= capacity
+
+    minimize    sum_k  price_k * hours * (c_k - d_k)
+    subject to  e_k = e_k-1 + hours * (efficiency * c_k - d_k)
+                e_-1 = the current charge
+
+The matrices of the program are built once - each step only the prices
+(the objective) and the current charge (the first equality) change.
+
+Re-solves are avoided in two ways
+    a cache of plans for forecasts & charges that have been seen before
+    warm starts - when only the charge has changed since the last solve,
+        the variables that were between their bounds are re-solved with the
+        others held at their bounds.  If this is feasible it is optimal,
+        as the prices (and so the duals) are unchanged
+
+With negative prices the linear program can charge & discharge in the same
+period, burning energy through the charging losses.  Battery takes a single
+net rate so can't do this - these plans are re-solved as a mixed integer
+program with a binary charge or discharge mode per period (scipy >= 1.9),
+or with each period held in the mode of its net rate
+"""
+
+from collections import OrderedDict
+import logging
+
+import numpy as np
+import scipy
+from scipy.optimize import linprog
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:
+    #  scipy < 1.9
+    milp = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def lp_method():
+    """ the HiGHS solvers are only in scipy >= 1.6 """
+    version = tuple(int(v) for v in scipy.__version__.split('.')[:2])
+
+    return 'highs' if version >= (1, 6) else 'simplex'
+
+
+class BatteryMPC(object):
+    """
+    Plans the charge and discharge of a battery over a price forecast
+
+    args
+        power_rating (float) [MW]
+        capacity (float) [MWh]
+        round_trip_eff (float) [%] charging losses - same as Battery
+        horizon (int) number of forecast periods
+        period_hours (float) hours covered by each forecast period
+        cache_size (int) plans kept for forecasts that repeat
+        decimals (int) forecasts & charges are rounded for the cache
+    """
+    def __init__(
+            self,
+            power_rating=2.0,
+            capacity=4.0,
+            round_trip_eff=0.9,
+            horizon=4,
+            period_hours=0.5,
+            cache_size=10000,
+            decimals=6
+    ):
+        self.power_rating = float(power_rating)
+        self.capacity = float(capacity)
+        self.efficiency = float(round_trip_eff)
+        self.horizon = int(horizon)
+        self.hours = float(period_hours)
+
+        self.cache = OrderedDict()
+        self.cache_size = int(cache_size)
+        self.decimals = int(decimals)
+
+        self.method = lp_method()
+        self.build()
+
+        self.last = None
+        self.solves, self.warm_starts, self.hits = 0, 0, 0
+        self.mode_solves = 0
+
+    def __repr__(self):
+        return '<BatteryMPC {} MW {} MWh horizon {}>'.format(
+            self.power_rating, self.capacity, self.horizon)
+
+    def build(self):
+        """ the parts of the program that don't change between steps """
+        k = self.horizon
+
+        #  variables are ordered [c_0..c_k, d_0..d_k, e_0..e_k]
+        self.charge = slice(0, k)
+        self.discharge = slice(k, 2 * k)
+        self.level = slice(2 * k, 3 * k)
+
+        #  e_k - e_k-1 - hours * (efficiency * c_k - d_k) = 0
+        self.A_eq = np.zeros((k, 3 * k))
+        periods = np.arange(k)
+        self.A_eq[periods, periods] = - self.hours * self.efficiency
+        self.A_eq[periods, k + periods] = self.hours
+        self.A_eq[periods, 2 * k + periods] = 1.0
+        self.A_eq[periods[1:], 2 * k + periods[:-1]] = -1.0
+
+        self.b_eq = np.zeros(k)
+
+        self.low = np.zeros(3 * k)
+        self.high = np.concatenate([
+            np.full(2 * k, self.power_rating), np.full(k, self.capacity)])
+        self.bounds = list(zip(self.low, self.high))
+
+        self.c = np.zeros(3 * k)
+
+        #  binary u_k is 1 when charging - c_k <= P u_k, d_k <= P (1 - u_k)
+        self.A_mode = np.zeros((2 * k, 4 * k))
+        self.A_mode[periods, periods] = 1.0
+        self.A_mode[periods, 3 * k + periods] = - self.power_rating
+        self.A_mode[k + periods, k + periods] = 1.0
+        self.A_mode[k + periods, 3 * k + periods] = self.power_rating
+
+        self.mode_high = np.concatenate(
+            [np.zeros(k), np.full(k, self.power_rating)])
+
+        self.A_eq_mode = np.concatenate([self.A_eq, np.zeros((k, k))], axis=1)
+        self.low_mode = np.concatenate([self.low, np.zeros(k)])
+        self.high_mode = np.concatenate([self.high, np.ones(k)])
+        self.integrality = np.concatenate([np.zeros(3 * k), np.ones(k)])
+
+    def update(self, prices, charge):
+        """ sets the objective & the initial charge """
+        prices = np.asarray(prices, dtype=float).reshape(-1)
+
+        if prices.shape[0] != self.horizon:
+            raise ValueError('{} prices for a horizon of {}'.format(
+                prices.shape[0], self.horizon))
+
+        self.c[self.charge] = prices * self.hours
+        self.c[self.discharge] = - prices * self.hours
+
+        #  e_0 = charge + hours * (efficiency * c_0 - d_0)
+        self.b_eq[0] = float(charge)
+
+    def solve(self):
+        """ solves the program from scratch """
+        result = linprog(
+            self.c,
+            A_eq=self.A_eq,
+            b_eq=self.b_eq,
+            bounds=self.bounds,
+            method=self.method
+        )
+
+        if result.status != 0:
+            raise ValueError('battery LP failed - {}'.format(result.message))
+
+        self.solves += 1
+        return np.clip(result.x, self.low, self.high)
+
+    def simultaneous(self, plan, tol=1e-7):
+        """ periods of a plan that both charge & discharge """
+        return (plan[self.charge] > tol) & (plan[self.discharge] > tol)
+
+    def solve_modes(self, plan):
+        """
+        Re-solves a plan that charges & discharges in the same period, so
+        that each period only charges or discharges
+
+        args
+            plan (np.array) from the linear program
+
+        returns
+            plan (np.array)
+        """
+        self.mode_solves += 1
+        k = self.horizon
+
+        if milp is None:
+            #  hold each period in the mode of its net rate
+            net = plan[self.charge] - plan[self.discharge]
+            high = np.array(self.high)
+            high[self.charge][net <= 0] = 0.0
+            high[self.discharge][net > 0] = 0.0
+
+            result = linprog(
+                self.c,
+                A_eq=self.A_eq,
+                b_eq=self.b_eq,
+                bounds=list(zip(self.low, high)),
+                method=self.method
+            )
+
+        else:
+            result = milp(
+                np.concatenate([self.c, np.zeros(k)]),
+                integrality=self.integrality,
+                bounds=Bounds(self.low_mode, self.high_mode),
+                constraints=[
+                    LinearConstraint(self.A_eq_mode, self.b_eq, self.b_eq),
+                    LinearConstraint(self.A_mode, -np.inf, self.mode_high)
+                ]
+            )
+
+        if result.status != 0:
+            raise ValueError('battery mode program failed - {}'.format(
+                result.message))
+
+        return np.clip(result.x[:3 * k], self.low, self.high)
+
+    def warm_start(self, tol=1e-9):
+        """
+        Re-solves after a change of charge only, holding the variables that
+        were at a bound in the last plan at that bound
+
+        returns
+            plan (np.array) or None if the last plan's active bounds no
+                longer give a feasible plan
+        """
+        plan = self.last['plan']
+
+        free = (plan > self.low + tol) & (plan < self.high - tol)
+
+        if not free.any():
+            return None
+
+        fixed = self.A_eq[:, ~free].dot(plan[~free])
+        values, _, _, _ = np.linalg.lstsq(
+            self.A_eq[:, free], self.b_eq - fixed, rcond=None)
+
+        new = np.array(plan)
+        new[free] = values
+
+        #  max of abs is much cheaper than np.allclose for arrays this small
+        feasible = (
+            np.max(np.abs(self.A_eq.dot(new) - self.b_eq)) < 1e-7
+            and np.min(new - self.low) > -1e-7
+            and np.max(new - self.high) < 1e-7
+        )
+
+        if not feasible:
+            return None
+
+        self.warm_starts += 1
+        return np.clip(new, self.low, self.high)
+
+    def plan(self, prices, charge):
+        """
+        The optimal plan for a price forecast and the current charge
+
+        args
+            prices (np.array) shape=(horizon,) [$/MWh]
+            charge (float) [MWh]
+
+        returns
+            plan (np.array) [c_0..c_k, d_0..d_k, e_0..e_k]
+        """
+        key = (tuple(np.round(prices, self.decimals).tolist()),
+               round(float(charge), self.decimals))
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.update(prices, charge)
+
+        plan = None
+        if self.last is not None and self.last['prices'] == key[0]:
+            plan = self.warm_start()
+
+        if plan is None:
+            plan = self.solve()
+
+        if self.simultaneous(plan).any():
+            plan = self.solve_modes(plan)
+
+            #  the bounds of a mode plan aren't an optimal basis of the LP
+            self.last = None
+
+        else:
+            self.last = {'prices': key[0], 'plan': plan}
+
+        self.cache[key] = plan
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return plan
+
+    def act(self, prices, charge):
+        """
+        returns
+            rate (float) [MW] positive to charge, negative to discharge
+        """
+        plan = self.plan(prices, charge)
+
+        return float(plan[self.charge][0] - plan[self.discharge][0])
+
+
+class MPCPolicy(object):
+    """
+    Acts in a Battery env with a BatteryMPC planning over the price
+    forecasts of the observation
+
+    args
+        env (Battery)
+        price_columns (list) observation columns of the forecasts, one per
+            period - defaults to every forecast_electricity_price column
+        period_hours (float) hours covered by each forecast (0.5 for the
+            half hourly forecasts of the example dataset)
+        kwargs passed to BatteryMPC
+    """
+    def __init__(
+            self,
+            env,
+            price_columns=None,
+            period_hours=0.5,
+            **kwargs
+    ):
+        space = env.observation_space
+        data_columns = space.data.columns.tolist()
+
+        if price_columns is None:
+            price_columns = [col for col in data_columns
+                             if 'forecast_electricity_price' in col]
+
+        if not price_columns:
+            raise ValueError('no price forecasts in the observation')
+
+        self.prices = [data_columns.index(col) for col in price_columns]
+        self.charge = space.info.index('C_charge_level [MWh]')
+
+        self.space = space
+        self.action_shape = env.action_space.shape
+
+        self.mpc = BatteryMPC(
+            power_rating=env.power_rating,
+            capacity=env.capacity,
+            round_trip_eff=env.round_trip_eff,
+            horizon=len(self.prices),
+            period_hours=period_hours,
+            **kwargs
+        )
+
+        logger.info('{} planning over {}'.format(
+            repr(self.mpc), price_columns))
+
+    def act(self, observation):
+        """
+        args
+            observation (np.array) shape=(1, *observation_space.shape)
+
+        returns
+            action (np.array) shape=(1, *action_space.shape)
+        """
+        prices = self.space.unscale(observation)[0, self.prices]
+        charge = np.asarray(observation).reshape(-1)[self.charge]
+
+        return np.array(self.mpc.act(prices, charge)).reshape(
+            1, *self.action_shape)
@@ -4,6 +4,8 @@ import logging
 import numpy as np
 
 from energypy.agents.agent import BaseAgent
+from energypy.agents.lookup_table import LookupTable
+from energypy.agents.mpc import MPCPolicy
 
 
 logger = logging.getLogger(__name__)
@@ -33,3 +35,49 @@ class NoOp(BaseAgent):
 
     def _learn(self, *args, **kwargs):
         pass
+
+
+class LookupTableAgent(BaseAgent):
+    """
+    acts from a policy distilled into a lookup table - see lookup_table.py
+
+    args
+        table_path (str) .npz made by LookupTable.save
+    """
+
+    def __init__(self, table_path, **kwargs):
+        super().__init__(**kwargs)
+
+        self.table = LookupTable(table_path)
+
+    def _act(self, observation, **kwargs):
+        return self.table.act(observation)
+
+    def _learn(self, *args, **kwargs):
+        pass
+
+
+class MPCAgent(BaseAgent):
+    """
+    plans a battery over the price forecasts of each observation with a
+    linear program - see mpc.py
+
+    args
+        price_columns (list) observation columns of the forecasts
+        period_hours (float) hours covered by each forecast
+    """
+
+    def __init__(self, price_columns=None, period_hours=0.5, **kwargs):
+        super().__init__(**kwargs)
+
+        self.policy = MPCPolicy(
+            self.env,
+            price_columns=price_columns,
+            period_hours=period_hours
+        )
+
+    def _act(self, observation, **kwargs):
+        return self.policy.act(observation)
+
+    def _learn(self, *args, **kwargs):
+        pass
@@ -0,0 +1,199 @@
+"""
+Greedy action selection with numpy only
+
+A trained DQN is exported with DQN.export(path) - the online network
+weights, the discrete actions and the network architecture are saved to
+a .npz.  NumpyPolicy loads the .npz and does the forward pass in numpy, so
+acting needs neither tensorflow nor a tf.Session
+
+    policy = NumpyPolicy('policy.npz')
+    actions = policy.act(observations)  # one action per asset
+"""
+
+import logging
+import re
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+logger = logging.getLogger(__name__)
+
+
+def relu(x):
+    return np.maximum(x, 0)
+
+
+def dense(inputs, weights, bias, activation='relu'):
+    """ same as energypy.common.networks.layers.fully_connected_layer """
+    layer = np.dot(inputs, weights) + bias
+
+    if activation == 'relu':
+        return relu(layer)
+
+    elif activation == 'linear':
+        return layer
+
+    else:
+        raise ValueError(
+            'Activation of {} not supported'.format(activation))
+
+
+def conv2d(inputs, kernel, bias, stride):
+    """
+    A relu convolution with valid padding - same as tf.layers.conv2d
+
+    args
+        inputs (np.array) shape=(num_samples, height, width, channels)
+        kernel (np.array) shape=(kernel_h, kernel_w, channels, filters)
+        bias (np.array) shape=(filters,)
+        stride (int)
+
+    returns
+        layer (np.array) shape=(num_samples, out_h, out_w, filters)
+    """
+    inputs = np.ascontiguousarray(inputs)
+    num_samples, height, width, channels = inputs.shape
+    kernel_h, kernel_w, _, _ = kernel.shape
+
+    out_h = (height - kernel_h) // stride + 1
+    out_w = (width - kernel_w) // stride + 1
+
+    #  a view of every patch the kernel is applied to
+    strides = inputs.strides
+    patches = as_strided(
+        inputs,
+        shape=(num_samples, out_h, out_w, kernel_h, kernel_w, channels),
+        strides=(strides[0], strides[1] * stride, strides[2] * stride,
+                 strides[1], strides[2], strides[3])
+    )
+
+    return relu(np.tensordot(patches, kernel, axes=3) + bias)
+
+
+def find_layers(params):
+    """
+    Orders the exported weights into the layers of the network
+
+    args
+        params (dict) {variable name: np.array} i.e.
+            online/input_layer/weights or online/conv_0/conv2d/kernel
+
+    returns
+        conv_layers (list) of (kernel, bias)
+        dense_layers (list) of (weights, bias)
+    """
+    def get(pattern):
+        return {
+            match.groups(): value for match, value in
+            ((re.search(pattern, name), value)
+             for name, value in params.items())
+            if match
+        }
+
+    conv = get(r'/conv_(\d+)/.*(kernel|bias)$')
+    conv_layers = [
+        (conv[(num, 'kernel')], conv[(num, 'bias')])
+        for num in sorted({num for num, _ in conv}, key=int)
+    ]
+
+    dense = get(r'/(input_layer|hidden_layer_\d+|output_layer)/(weights|bias)$')
+
+    def order(name):
+        if name == 'input_layer':
+            return -1
+        if name == 'output_layer':
+            return np.inf
+        return int(name.split('_')[-1])
+
+    dense_layers = [
+        (dense[(name, 'weights')], dense[(name, 'bias')])
+        for name in sorted({name for name, _ in dense}, key=order)
+    ]
+
+    return conv_layers, dense_layers
+
+
+class NumpyPolicy(object):
+    """
+    Greedy policy of an exported DQN
+
+    args
+        path (str) .npz made by DQN.export()
+    """
+    def __init__(self, path):
+        self.path = str(path)
+
+        with np.load(self.path) as data:
+            self.network = str(data['network'])
+            self.discrete_actions = data['discrete_actions']
+            self.observation_shape = tuple(data['observation_shape'])
+            self.action_shape = tuple(data['action_shape'])
+            self.strides = data['strides'].tolist()
+
+            params = {
+                name.replace('params/', '', 1): data[name]
+                for name in data.files if name.startswith('params/')
+            }
+
+        self.update(params)
+
+        if len(self.conv_layers) != len(self.strides):
+            raise ValueError(
+                '{} conv layers with {} strides'.format(
+                    len(self.conv_layers), len(self.strides)))
+
+        logger.info('loaded {} policy from {}'.format(
+            self.network, self.path))
+
+    def __repr__(self):
+        return '<energypy NumpyPolicy {} {} actions>'.format(
+            self.network, self.discrete_actions.shape[0])
+
+    def update(self, params):
+        """
+        Replaces the network weights
+
+        args
+            params (dict) {variable name: np.array}
+        """
+        self.conv_layers, self.dense_layers = find_layers({
+            name: np.asarray(value, dtype=np.float32)
+            for name, value in params.items()
+        })
+
+    def q_values(self, observation):
+        """
+        args
+            observation (np.array) shape=(num_samples, *observation_shape)
+
+        returns
+            q_values (np.array) shape=(num_samples, num_actions)
+        """
+        layer = np.asarray(observation, dtype=np.float32).reshape(
+            -1, *self.observation_shape)
+
+        for (kernel, bias), stride in zip(self.conv_layers, self.strides):
+            layer = conv2d(layer, kernel, bias, int(stride))
+
+        layer = layer.reshape(layer.shape[0], -1)
+
+        for weights, bias in self.dense_layers[:-1]:
+            layer = dense(layer, weights, bias)
+
+        weights, bias = self.dense_layers[-1]
+        return dense(layer, weights, bias, activation='linear')
+
+    def act(self, observation):
+        """
+        Greedy actions for a batch of observations
+
+        args
+            observation (np.array) shape=(num_samples, *observation_shape)
+
+        returns
+            action (np.array) shape=(num_samples, *action_shape)
+        """
+        indicies = np.argmax(self.q_values(observation), axis=1)
+
+        return self.discrete_actions[indicies].reshape(-1, *self.action_shape)
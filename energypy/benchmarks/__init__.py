@@ -0,0 +1 @@
+from energypy.benchmarks.benchmarks import run_benchmarks, compare_benchmarks
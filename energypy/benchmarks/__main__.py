@@ -0,0 +1,53 @@
+"""
+Runs the energypy benchmark suite
+
+    python -m energypy.benchmarks
+    python -m energypy.benchmarks --only memory sumtree --output new.json
+    python -m energypy.benchmarks --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import logging
+
+from energypy.benchmarks import run_benchmarks, compare_benchmarks
+
+
+def make_benchmark_parser():
+    parser = argparse.ArgumentParser(
+        description='energypy benchmark argparser'
+    )
+
+    parser.add_argument('--only', nargs='*', default=None, type=str,
+                        help='substrings used to select benchmarks')
+    parser.add_argument('--scale', default=1.0, type=float,
+                        help='multiplies the number of calls per benchmark')
+    parser.add_argument('--output', default=None, type=str,
+                        help='path to save results json')
+    parser.add_argument('--compare', default=None, type=str,
+                        help='path of a previous results json')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = make_benchmark_parser()
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = run_benchmarks(args.only, args.scale)
+
+    for name, result in results['benchmarks'].items():
+        print('{:<40} {:>14.1f} calls/sec'.format(
+            name, result['calls_per_sec']))
+
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(results, outfile, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as infile:
+            old = json.load(infile)
+
+        for name, speedup in compare_benchmarks(results, old).items():
+            print('{:<40} {:>8.2f}x'.format(name, speedup))
@@ -0,0 +1,247 @@
+"""
+Micro-benchmarks for energypy components
+
+Each benchmark times a single component in a tight loop and reports
+throughput as calls per second.  Results are plain dicts so they can be
+dumped to json and compared between versions
+"""
+
+import logging
+import platform
+import random
+import time
+
+import numpy as np
+
+import energypy
+from energypy.common.trees import SumTree
+
+
+logger = logging.getLogger(__name__)
+
+
+def time_calls(func, num_calls):
+    """
+    Times repeated calls to a function
+
+    args
+        func (callable) called with the call number
+        num_calls (int)
+
+    returns
+        result (dict) calls_per_sec and total seconds
+    """
+    start = time.perf_counter()
+    for call in range(num_calls):
+        func(call)
+    seconds = time.perf_counter() - start
+
+    return {
+        'num_calls': num_calls,
+        'seconds': seconds,
+        'calls_per_sec': num_calls / seconds
+    }
+
+
+def bench_env_step(env_id, num_calls):
+    """ steps through an env with random actions, resetting when done """
+    env = energypy.make_env(env_id, episode_sample='full')
+    env.reset()
+
+    actions = [env.action_space.sample() for _ in range(num_calls)]
+
+    def step(call):
+        _, _, done, _ = env.step(actions[call])
+        if done:
+            env.reset()
+
+    return time_calls(step, num_calls)
+
+
+def bench_space_call(num_calls):
+    """ GlobalSpace.__call__ - how observations are made each step """
+    env = energypy.make_env('battery', episode_sample='full')
+    env.reset()
+    space = env.observation_space
+    length = space.episode.shape[0]
+    charge = np.array(0.0)
+
+    return time_calls(
+        lambda call: space(call % length, append=charge), num_calls)
+
+
+def make_experience(env):
+    return (
+        env.observation_space.sample(),
+        env.action_space.sample(),
+        random.random(),
+        env.observation_space.sample(),
+        False
+    )
+
+
+def bench_memory_remember(memory_id, size, num_calls):
+    env = energypy.make_env('battery')
+    memory = energypy.make_memory(memory_id=memory_id, env=env, size=size)
+    experience = make_experience(env)
+
+    return time_calls(lambda call: memory.remember(*experience), num_calls)
+
+
+def bench_memory_batch(memory_id, size, batch_size, num_calls):
+    env = energypy.make_env('battery')
+    memory = energypy.make_memory(memory_id=memory_id, env=env, size=size)
+    experience = make_experience(env)
+    [memory.remember(*experience) for _ in range(size)]
+
+    return time_calls(lambda call: memory.get_batch(batch_size), num_calls)
+
+
+def bench_sumtree(operation, capacity, num_calls):
+    tree = SumTree(capacity)
+    for idx in range(capacity):
+        tree[idx] = random.random()
+    total = tree.sum()
+
+    operations = {
+        'set': lambda call: tree.__setitem__(call % capacity, 1.0),
+        'find': lambda call: tree.find(random.random() * total),
+        'sum': lambda call: tree.sum()
+    }
+
+    return time_calls(operations[operation], num_calls)
+
+
+def bench_dqn(operation, layers, num_calls):
+    """ DQN act or learn on the battery env """
+    import tensorflow as tf
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        env = energypy.make_env('battery')
+        agent = energypy.make_agent(
+            agent_id='dqn',
+            sess=sess,
+            env=env,
+            total_steps=num_calls,
+            memory_type='array',
+            memory_fraction=1.0,
+            layers=layers,
+            act_path='./results/benchmarks/act',
+            learn_path='./results/benchmarks/learn'
+        )
+
+        experience = make_experience(env)
+        [agent.remember(*experience) for _ in range(agent.batch_size * 4)]
+
+        observation = env.observation_space.sample()
+
+        operations = {
+            'act': lambda call: agent.act(observation),
+            'learn': lambda call: agent.learn()
+        }
+
+        return time_calls(operations[operation], num_calls)
+
+
+def make_benchmarks(scale=1.0):
+    """
+    Creates the suite of benchmarks
+
+    args
+        scale (float) multiplies the number of calls for each benchmark
+
+    returns
+        benchmarks (dict) {name: callable with no args}
+    """
+    def n(num_calls):
+        return max(1, int(num_calls * scale))
+
+    benchmarks = {
+        'battery_step': lambda: bench_env_step('battery', n(2000)),
+        'flex_step': lambda: bench_env_step('flex', n(2000)),
+        'global_space_call': lambda: bench_space_call(n(20000)),
+    }
+
+    for memory_id in ['array', 'deque']:
+        for size in [1000, 100000]:
+            benchmarks['{}_memory_remember_{}'.format(memory_id, size)] = (
+                lambda m=memory_id, s=size: bench_memory_remember(
+                    m, s, n(20000)))
+
+            for batch_size in [32, 256]:
+                benchmarks['{}_memory_get_batch_{}_{}'.format(
+                    memory_id, size, batch_size)] = (
+                        lambda m=memory_id, s=size, b=batch_size:
+                        bench_memory_batch(m, s, b, n(2000)))
+
+    for capacity in [1024, 65536]:
+        for operation in ['set', 'find', 'sum']:
+            benchmarks['sumtree_{}_{}'.format(operation, capacity)] = (
+                lambda o=operation, c=capacity: bench_sumtree(
+                    o, c, n(5000)))
+
+    for layers in [(25, 25, 25), (64, 32, 16), (256, 256)]:
+        for operation in ['act', 'learn']:
+            benchmarks['dqn_{}_{}'.format(
+                operation, '_'.join(str(l) for l in layers))] = (
+                    lambda o=operation, l=layers: bench_dqn(o, l, n(500)))
+
+    return benchmarks
+
+
+def run_benchmarks(names=None, scale=1.0):
+    """
+    Runs benchmarks
+
+    args
+        names (list) substrings to select benchmarks - None runs all
+        scale (float) multiplies the number of calls for each benchmark
+
+    returns
+        results (dict) {'info': {...}, 'benchmarks': {name: result}}
+    """
+    benchmarks = make_benchmarks(scale)
+
+    if names:
+        benchmarks = {
+            name: bench for name, bench in benchmarks.items()
+            if any(sub in name for sub in names)
+        }
+
+    results = {}
+    for name, bench in benchmarks.items():
+        logger.info('running {}'.format(name))
+        results[name] = bench()
+        logger.info('{} {:0.1f} calls/sec'.format(
+            name, results[name]['calls_per_sec']))
+
+    return {
+        'info': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'scale': scale
+        },
+        'benchmarks': results
+    }
+
+
+def compare_benchmarks(new, old):
+    """
+    Compares two sets of benchmark results
+
+    args
+        new (dict) output of run_benchmarks
+        old (dict) output of run_benchmarks
+
+    returns
+        speedups (dict) {name: new calls/sec / old calls/sec}
+    """
+    new, old = new['benchmarks'], old['benchmarks']
+
+    return {
+        name: new[name]['calls_per_sec'] / old[name]['calls_per_sec']
+        for name in new if name in old
+    }
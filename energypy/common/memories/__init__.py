@@ -2,18 +2,16 @@ import logging
 
 from energypy.common.memories.memory import calculate_returns
 
-from energypy.common.memories.array_memory import ArrayMemory
-from energypy.common.memories.deque_memory import DequeMemory
-
+from energypy.common.register import Register
 from energypy.common.utils import load_pickle
 
 
 logger = logging.getLogger(__name__)
 
-memory_register = {
-    'array': ArrayMemory,
-    'deque': DequeMemory,
-}
+memory_register = Register({
+    'array': 'energypy.common.memories.array_memory:ArrayMemory',
+    'deque': 'energypy.common.memories.deque_memory:DequeMemory',
+})
 
 
 def make_memory(**kwargs):
@@ -72,6 +72,18 @@ class ArrayMemory(BaseMemory):
 
         self.count += 1
 
+    def latest(self, num):
+        """ the most recent experience, oldest first """
+        indicies = (self.cursor - num + np.arange(num)) % self.size
+
+        return {
+            'observation': self.obs[indicies],
+            'action': self.acts[indicies],
+            'reward': self.rews[indicies],
+            'next_observation': self.n_obs[indicies],
+            'done': self.term[indicies]
+        }
+
     def get_batch(self, batch_size):
         """ randomly samples a batch """
         sample_size = min(batch_size, len(self))
@@ -1,4 +1,5 @@
 from collections import deque
+from itertools import islice
 import random
 
 from energypy.common.memories.memory import BaseMemory, Experience
@@ -23,6 +24,7 @@ class DequeMemory(BaseMemory):
         super().__init__(env, size)
         self.type = 'deque'
         self.experiences = deque(maxlen=self.size)
+        self.count = 0
 
     def __repr__(self):
         return '<class DequeMemory size={}>'.format(self.size)
@@ -40,6 +42,12 @@ class DequeMemory(BaseMemory):
                                            reward,
                                            next_observation,
                                            done))
+        self.count += 1
+
+    def latest(self, num):
+        """ the most recent experience, oldest first """
+        return self.make_batch_dict(list(
+            islice(self.experiences, len(self) - num, len(self))))
 
     def get_batch(self, batch_size):
         """ samples a batch randomly from the memory """
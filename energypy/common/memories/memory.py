@@ -1,5 +1,8 @@
 from collections import namedtuple
+import json
 import logging
+import os
+from os.path import join
 
 import numpy as np
 
@@ -90,3 +93,110 @@ class BaseMemory(object):
         logger.info('Saving memory to {}'.format(path))
         ensure_dir(path)
         dump_pickle(self, path)
+
+    def save_checkpoint(self, path):
+        """
+        Incrementally saves the memory to a folder
+
+        Only experience remembered since the last checkpoint is written, as
+        a new segment.  Segments that only hold experience that had been
+        pushed out of the memory by the previous checkpoint are deleted -
+        the checkpoint is never much bigger than the memory, and the
+        previous checkpoint can still be loaded if this one is not finished
+
+        args
+            path (str) folder
+
+        returns
+            count (int) experiences in this checkpoint - pass to
+                load_checkpoint to load this checkpoint
+        """
+        meta = self.load_checkpoint_meta(path)
+
+        new = min(self.count - meta['count'], len(self))
+
+        if new > 0:
+            name = 'segment_{:05d}.npz'.format(meta['next_segment'])
+            np.savez(join(path, name), **self.latest(new))
+
+            meta['segments'].append({'name': name, 'end': self.count})
+            meta['next_segment'] += 1
+
+        #  segments that end before the oldest experience of the previous
+        #  checkpoint
+        oldest = meta['count'] - len(self)
+        for segment in [s for s in meta['segments'] if s['end'] <= oldest]:
+            os.remove(join(path, segment['name']))
+            meta['segments'].remove(segment)
+
+        meta['count'] = self.count
+        self.dump_checkpoint_meta(path, meta)
+
+        logger.debug('memory checkpoint of {} new experiences'.format(new))
+
+        return self.count
+
+    def load_checkpoint_meta(self, path):
+        meta_path = join(path, 'memory.json')
+        ensure_dir(meta_path)
+
+        if not os.path.exists(meta_path):
+            return {'count': 0, 'next_segment': 0, 'segments': []}
+
+        with open(meta_path, 'r') as infile:
+            return json.load(infile)
+
+    def dump_checkpoint_meta(self, path, meta):
+        #  replace the old meta in one step so it is never half written
+        tmp_path = join(path, 'memory.json.tmp')
+        with open(tmp_path, 'w') as outfile:
+            json.dump(meta, outfile)
+
+        os.replace(tmp_path, join(path, 'memory.json'))
+
+    def load_checkpoint(self, path, count=None):
+        """
+        Remembers the experience saved by save_checkpoint
+
+        Segments saved after count are deleted, so that the checkpoint
+        matches the rest of the experiment state again
+
+        args
+            path (str) folder
+            count (int) returned by save_checkpoint - defaults to the last
+                checkpoint
+        """
+        meta = self.load_checkpoint_meta(path)
+
+        if count is None:
+            count = meta['count']
+
+        if count > meta['count']:
+            raise ValueError(
+                'memory checkpoint of {} experiences, {} requested'.format(
+                    meta['count'], count))
+
+        for segment in [s for s in meta['segments'] if s['end'] > count]:
+            os.remove(join(path, segment['name']))
+            meta['segments'].remove(segment)
+
+        if count != meta['count']:
+            logger.info('dropped memory checkpoint after {} experiences'
+                        .format(count))
+            meta['count'] = count
+            self.dump_checkpoint_meta(path, meta)
+
+        for segment in meta['segments']:
+            with np.load(join(path, segment['name'])) as segment:
+                batch = {field: segment[field] for field in segment.files}
+
+            for experience in zip(*[batch[f] for f in Experience._fields]):
+                self.remember(*experience)
+
+        #  experience pushed out of the memory before the checkpoint
+        self.count = count
+
+        logger.info('loaded memory checkpoint of {} experiences'.format(
+            len(self)))
+
+        return self
@@ -0,0 +1,90 @@
+"""
+Background preparation of batches for learning
+
+Sampling a batch and building the feed for sess.run happens in a thread
+while the previous gradient step runs - tensorflow releases the GIL
+during sess.run so the two overlap
+"""
+
+import logging
+import queue
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPrefetcher(object):
+    """
+    Keeps a queue of batches prepared in a background thread
+
+    The memory must only be changed while holding self.lock
+
+    args
+        sample (callable) returns a prepared batch
+        num_batches (int) number of batches prepared ahead
+    """
+    def __init__(self, sample, num_batches=2):
+        self.sample = sample
+        self.num_batches = int(num_batches)
+
+        self.queue = queue.Queue(maxsize=self.num_batches)
+        self.lock = threading.Lock()
+
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def __repr__(self):
+        return '<BatchPrefetcher num_batches={}>'.format(self.num_batches)
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+        logger.debug('started prefetching {} batches'.format(
+            self.num_batches))
+
+    def work(self):
+        while not self.stopped.is_set():
+            try:
+                with self.lock:
+                    batch = self.sample()
+
+            except Exception as error:
+                #  raised in the learning thread by get()
+                batch = error
+
+            while not self.stopped.is_set():
+                try:
+                    self.queue.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+            if isinstance(batch, Exception):
+                return
+
+    def get(self):
+        """ the next prepared batch - starts the thread on the first call """
+        if self.thread is None:
+            self.start()
+
+        batch = self.queue.get()
+
+        if isinstance(batch, Exception):
+            self.thread = None
+            raise batch
+
+        return batch
+
+    def stop(self):
+        """ stops the thread and drops any prepared batches """
+        self.stopped.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        while not self.queue.empty():
+            self.queue.get_nowait()
@@ -1,3 +1,10 @@
-from energypy.common.networks.networks import feed_forward_network
-from energypy.common.networks.networks import convolutional_network
-from energypy.common.networks.register import make_network
+from energypy.common.register import lazy
+
+from energypy.common.networks.register import make_network, network_register
+
+feed_forward_network = lazy(
+    'energypy.common.networks.networks:feed_forward_network')
+convolutional_network = lazy(
+    'energypy.common.networks.networks:convolutional_network')
+ensemble_feed_forward_network = lazy(
+    'energypy.common.networks.networks:ensemble_feed_forward_network')
@@ -70,3 +70,58 @@ def convolutional_layer(
             strides=stride,
             activation=tf.nn.relu
         )
+
+
+def ensemble_fully_connected_layer(
+        scope,
+        input_tensor,
+        input_nodes,
+        output_nodes,
+        num_members,
+        activation='relu'
+):
+    """
+    a fully connected layer for each member of an ensemble
+
+    weights of the members are stacked - one batched matmul does the
+    layer for every member
+
+    args
+        scope (str)
+        input_tensor (tensor) shape=(num_members, batch_size, input_nodes)
+        input_nodes (int)
+        output_nodes (int)
+        num_members (int)
+        activation (str) currently support relu or linear
+
+    returns
+        layer (tensor) shape=(num_members, batch_size, output_nodes)
+    """
+    with tf.variable_scope(scope, reuse=tf.AUTO_REUSE):
+        weights = tf.get_variable(
+            'weights',
+            shape=(num_members, input_nodes, output_nodes),
+            initializer=tf.contrib.layers.xavier_initializer()
+        )
+
+        bias = tf.get_variable(
+            'bias',
+            shape=(num_members, output_nodes),
+            initializer=tf.zeros_initializer()
+        )
+
+        layer = tf.add(
+            tf.matmul(input_tensor, weights),
+            tf.expand_dims(bias, 1),
+            name='layer'
+        )
+
+    if activation == 'relu':
+        return tf.nn.relu(layer)
+
+    elif activation == 'linear':
+        return layer
+
+    else:
+        raise ValueError(
+            'Activation of {} not supported'.format(activation))
@@ -3,6 +3,7 @@ import tensorflow as tf
 
 from energypy.common.networks.layers import fully_connected_layer
 from energypy.common.networks.layers import convolutional_layer
+from energypy.common.networks.layers import ensemble_fully_connected_layer
 
 
 logger = logging.getLogger(__name__)
@@ -58,6 +59,67 @@ def feed_forward_network(
     return output_layer
 
 
+def ensemble_feed_forward_network(
+        scope,
+        input_tensor,
+        input_shape,
+        layers,
+        output_nodes,
+        num_members,
+        output_activation='linear',
+        **kwargs  #  used to soak up args used for conv only
+):
+    """
+    Independent feed forward networks for each member of an ensemble
+
+    args
+        scope (str)
+        input_tensor (tensor) shape=(num_members, batch_size, *input_shape)
+        input_shape (tuple or int)
+        layers (list) has nodes per layer (includes input layer)
+        output_nodes (int)
+        num_members (int)
+
+    returns
+        output_layer (tensor) shape=(num_members, batch_size, output_nodes)
+    """
+    logger.info('Making ensemble_feed_forward network - {}'.format(scope))
+    logger.info('{} members input {} layers {} output {}'.format(
+            num_members, input_shape, layers, output_nodes))
+
+    if isinstance(input_shape, int):
+        input_shape = (input_shape,)
+
+    with tf.name_scope(scope):
+        layer = ensemble_fully_connected_layer(
+            'input_layer',
+            input_tensor,
+            int(input_shape[0]),
+            layers[0],
+            num_members
+        )
+
+        for layer_num, nodes in enumerate(layers[1:], 1):
+            layer = ensemble_fully_connected_layer(
+                'hidden_layer_{}'.format(layer_num),
+                layer,
+                layers[layer_num-1],
+                nodes,
+                num_members
+            )
+
+        output_layer = ensemble_fully_connected_layer(
+            'output_layer',
+            layer,
+            layers[-1],
+            output_nodes,
+            num_members,
+            activation=output_activation
+        )
+
+    return output_layer
+
+
 def convolutional_network(
         scope,
         input_tensor,
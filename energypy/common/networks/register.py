@@ -2,16 +2,17 @@
 
 import logging
 
-from energypy.common.networks.networks import feed_forward_network
-from energypy.common.networks.networks import convolutional_network
+from energypy.common.register import Register
 
 
 logger = logging.getLogger(__name__)
 
-network_register = {
-    'ff': feed_forward_network,
-    'conv': convolutional_network
-}
+network_register = Register({
+    'ff': 'energypy.common.networks.networks:feed_forward_network',
+    'conv': 'energypy.common.networks.networks:convolutional_network',
+    'ensemble_ff':
+        'energypy.common.networks.networks:ensemble_feed_forward_network'
+})
 
 
 def make_network(network_id, **kwargs):
@@ -0,0 +1,128 @@
+"""
+Thread & cpu budgets for runs that share a machine
+
+A run config can set
+
+    intra_op_threads=2
+    inter_op_threads=1
+    cpus=0-1
+
+The tensorflow session of the run is made with these thread pools and the
+process is pinned to the cpus.  Launchers that start many processes
+(sweeps, actors, evaluation workers) give each process its own block of
+cpus with allocate_cpus
+"""
+
+import logging
+import os
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+#  cpus this process could use before it was first pinned
+_available = None
+
+
+def parse_cpus(cpus):
+    """
+    args
+        cpus (str or iterable) i.e. '0-3,8' or [0, 1, 2, 3, 8]
+
+    returns
+        cpus (list) of ints
+    """
+    if cpus is None or cpus == '':
+        return []
+
+    if not isinstance(cpus, str):
+        return sorted(int(cpu) for cpu in cpus)
+
+    parsed = []
+    for part in cpus.replace(' ', '').split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            parsed.extend(range(int(first), int(last) + 1))
+        else:
+            parsed.append(int(part))
+
+    return sorted(set(parsed))
+
+
+def available_cpus():
+    """ cpus this process is allowed to run on, before any pinning """
+    if _available is not None:
+        return list(_available)
+
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_cpus(cpus):
+    """
+    Pins this process (and the processes it starts later) to cpus
+
+    A no-op where affinity isn't supported (i.e. macOS)
+
+    args
+        cpus (str or iterable)
+    """
+    global _available
+
+    cpus = parse_cpus(cpus)
+
+    if not cpus:
+        return
+
+    if not hasattr(os, 'sched_setaffinity'):
+        logger.debug('cpu affinity not supported - not pinning')
+        return
+
+    if _available is None:
+        _available = available_cpus()
+
+    os.sched_setaffinity(0, cpus)
+    logger.debug('pinned process {} to cpus {}'.format(os.getpid(), cpus))
+
+
+def allocate_cpus(num_blocks, cpus=None):
+    """
+    Splits cpus into a contiguous block for each process
+
+    With more processes than cpus the blocks are single cpus shared round
+    robin
+
+    args
+        num_blocks (int)
+        cpus (str or iterable) defaults to available_cpus()
+
+    returns
+        blocks (list) of lists of ints
+    """
+    cpus = parse_cpus(cpus) if cpus is not None else available_cpus()
+    num_blocks = int(num_blocks)
+
+    if num_blocks <= len(cpus):
+        return [block.tolist() for block in np.array_split(cpus, num_blocks)]
+
+    return [[cpus[num % len(cpus)]] for num in range(num_blocks)]
+
+
+def pop_session_config(config):
+    """
+    Removes the session options from a run config
+
+    args
+        config (dict) run config
+
+    returns
+        session_config (dict) kwargs for make_session
+    """
+    return {
+        'intra_op_threads': int(config.pop('intra_op_threads', 0)),
+        'inter_op_threads': int(config.pop('inter_op_threads', 0)),
+        'cpus': parse_cpus(config.pop('cpus', None))
+    }
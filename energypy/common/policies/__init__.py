@@ -1,7 +1,11 @@
-from energypy.common.policies.epsilon_greedy import epsilon_greedy_policy
-from energypy.common.policies.softmax import softmax_policy
+from energypy.common.register import Register, lazy
 
-policy_register = {
-    'epsilon_greedy': epsilon_greedy_policy,
-    'softmax': softmax_policy
-}
+epsilon_greedy_policy = lazy(
+    'energypy.common.policies.epsilon_greedy:epsilon_greedy_policy')
+softmax_policy = lazy(
+    'energypy.common.policies.softmax:softmax_policy')
+
+policy_register = Register({
+    'epsilon_greedy': 'energypy.common.policies.epsilon_greedy:epsilon_greedy_policy',
+    'softmax': 'energypy.common.policies.softmax:softmax_policy'
+})
@@ -0,0 +1,64 @@
+"""
+Registers that import their entries on first use
+
+energypy pulls in heavy dependencies (tensorflow, gym, matplotlib) that
+only some users need.  Registers map ids to 'package.module:name' strings
+which are imported the first time they are looked up, so that
+import energypy is cheap and env only processes never import tensorflow
+"""
+
+import importlib
+
+
+def import_from_path(path):
+    """
+    Imports an object from a string
+
+    args
+        path (str) i.e. 'energypy.envs.battery:Battery'
+
+    returns
+        obj (object)
+    """
+    module, name = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+class Register(dict):
+    """
+    A dictionary of {id: object} where objects can be given as strings
+
+    Strings are replaced with the imported object on first lookup
+    """
+    def __getitem__(self, key):
+        obj = super().__getitem__(key)
+
+        if isinstance(obj, str):
+            obj = import_from_path(obj)
+            self[key] = obj
+
+        return obj
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+
+def lazy(path):
+    """
+    Stand in for a function or class that is imported on first call
+
+    args
+        path (str) i.e. 'energypy.experiments.runner:Runner'
+
+    returns
+        wrapper (function)
+    """
+    def wrapper(*args, **kwargs):
+        return import_from_path(path)(*args, **kwargs)
+
+    wrapper.__name__ = path.split(':')[1]
+    wrapper.__doc__ = 'imported from {} on first call'.format(path)
+
+    return wrapper
@@ -17,7 +17,8 @@ class DiscreteSpace(object):
         return np.random.randint(self.high)
 
     def contains(self, x):
-        return np.in1d(x, np.arange(0, self.high))
+        x = np.asarray(x)
+        return (x >= self.low) & (x < self.high) & (x == np.floor(x))
 
     def discretize(self, n_discr=None):
         return np.arange(0, self.high)
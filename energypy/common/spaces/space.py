@@ -1,11 +1,10 @@
 import logging
-import itertools
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 
 import energypy
+from energypy.common.np_utils import rolling_window
 from energypy.common.spaces.discrete import DiscreteSpace
 from energypy.common.spaces.continuous import ContinuousSpace
 
@@ -13,6 +12,96 @@ from energypy.common.spaces.continuous import ContinuousSpace
 logger = logging.getLogger(__name__)
 
 
+def scaling_statistics(data):
+    """
+    The mean and scale of each column used by standardize
+
+    args
+        data (np.array) shape=(num_samples, num_columns)
+
+    returns
+        scaling (dict) mean & scale - the std, 1 for constant columns
+    """
+    std = data.std(axis=0)
+    std[std == 0] = 1.0
+
+    return {'mean': data.mean(axis=0), 'scale': std}
+
+
+def standardize(data, scaling=None):
+    """
+    Scales each column to zero mean and unit variance
+
+    Same as sklearn's StandardScaler - constant columns are left unscaled
+
+    args
+        data (np.array) shape=(num_samples, num_columns)
+        scaling (dict) from scaling_statistics - made from data if None
+    """
+    if scaling is None:
+        scaling = scaling_statistics(data)
+
+    return (data - scaling['mean']) / scaling['scale']
+
+
+def column_statistics(data, column):
+    """
+    args
+        data (pd.DataFrame or ChunkedDataset)
+        column (str)
+
+    returns
+        mean, std, min & max of the column (floats)
+    """
+    if isinstance(data, pd.DataFrame):
+        values = data.loc[:, column].values.astype(float)
+        return values.mean(), values.std(), values.min(), values.max()
+
+    stats = data.statistics()
+    col = data.columns.get_loc(column)
+
+    return (stats['mean'][col], stats['std'][col],
+            stats['min'][col], stats['max'][col])
+
+
+def load_space_data(dataset, name, resample=None, return_scaling=False):
+    """
+    Loads the data for a space - observations are scaled
+
+    args
+        dataset (str)
+        name (str) i.e. state or observation
+        resample (str) optional pandas offset i.e. 30min
+        return_scaling (bool) also return the scaling of the data
+
+    returns
+        data (pd.DataFrame or ChunkedDataset)
+        scaling (dict) mean & scale of each column, None if not scaled -
+            only if return_scaling
+    """
+    data = energypy.load_dataset(dataset, name, resample=resample)
+    scaling = None
+
+    if name == 'observation':
+        if isinstance(data, pd.DataFrame):
+            scaling = scaling_statistics(data.values)
+            data.loc[:, :] = standardize(data.values, scaling)
+            logger.info(data.describe())
+
+        else:
+            #  chunked datasets scale each episode as it is read
+            data.normalize = True
+            stats = data.statistics()
+            scaling = {'mean': stats['mean'], 'scale': stats['scale']}
+
+        logger.debug('scaled {} dataset'.format(name))
+
+    if return_scaling:
+        return data, scaling
+
+    return data
+
+
 class GlobalSpace(object):
     """
     A combination of simpler spaces
@@ -31,18 +120,43 @@ class GlobalSpace(object):
     ):
         self.name = name
         self._shape = None
+        self.scaling = None
+
+        self.windows = []
+        self.dims = 'flat'
 
     def __repr__(self):
         return('<{} space {}>'.format(self.name, self.shape))
 
     def __call__(self, steps, append=None):
-        sample = np.array(self.episode.iloc[steps, :])
+        sample = np.array(self._episode_values[steps])
+
+        if self.windows:
+            sample = np.concatenate(
+                [sample.reshape(-1)]
+                + [values[steps] for values in self._window_values]
+            )
 
         #  needed because bool(np.array(0)) is falsy
         if isinstance(append, np.ndarray):
             sample = np.append(sample, append)
 
-        return sample.reshape(1, *self.shape)
+        return self.reshape(sample)
+
+    @property
+    def episode(self):
+        return self._episode
+
+    @episode.setter
+    def episode(self, episode):
+        #  (episode, values) made by prepare_episode are used as they are
+        if isinstance(episode, tuple):
+            self._episode, self._episode_values = episode
+
+        #  keep an array of the episode so that __call__ avoids pandas
+        else:
+            self._episode = episode
+            self._episode_values = np.asarray(episode)
 
     @property
     def shape(self):
@@ -50,22 +164,122 @@ class GlobalSpace(object):
 
     @shape.getter
     def shape(self):
+        if self.dims == '2D':
+            width = self.windows[0][1] + self.windows[0][2]
+            num_features = len(self.spaces) - self._window_slice.stop \
+                + self._window_slice.start + len(self.windows)
+            return (width, num_features, 1)
+
         return (len(self.spaces), )
 
-    def from_dataset(self, dataset='example'):
-        data = energypy.load_dataset(dataset, self.name)
+    def reshape(self, sample):
+        """
+        Reshapes flat samples to the shape of the space
 
-        if self.name == 'observation':
-            data.loc[:, :] = StandardScaler().fit_transform(data.values)
-            logger.debug('scaled {} dataset'.format(self.name))
-            logger.info(data.describe())
+        For 2D spaces each window is a column of the image - the features
+        that aren't windowed are repeated down their column
+
+        args
+            sample (np.array) shape=(num_samples, len(self.spaces))
+
+        returns
+            sample (np.array) shape=(num_samples, *self.shape)
+        """
+        sample = np.array(sample).reshape(-1, len(self.spaces))
+
+        if self.dims != '2D':
+            return sample.reshape(-1, *self.shape)
 
+        width, num_features, _ = self.shape
+        num_samples = sample.shape[0]
+
+        windows = sample[:, self._window_slice].reshape(
+            num_samples, len(self.windows), width).transpose(0, 2, 1)
+
+        features = np.concatenate([
+            sample[:, :self._window_slice.start],
+            sample[:, self._window_slice.stop:]
+        ], axis=1)
+
+        features = np.repeat(
+            features.reshape(num_samples, 1, -1), width, axis=1)
+
+        return np.concatenate(
+            [windows, features], axis=2).reshape(-1, *self.shape)
+
+    def from_dataset(self, dataset='example', resample=None):
+        data, self.scaling = load_space_data(
+            dataset, self.name, resample=resample, return_scaling=True)
+
+        return self.from_data(data)
+
+    def unscale(self, sample):
+        """
+        The dataset columns of flat samples before they were scaled
+
+        args
+            sample (np.array) shape=(num_samples, *self.shape)
+
+        returns
+            values (np.array) shape=(num_samples, num_dataset_columns)
+        """
+        if self.scaling is None:
+            raise ValueError('{} space is not scaled'.format(self.name))
+
+        if self.dims == '2D':
+            raise ValueError('only flat samples can be unscaled')
+
+        num_columns = self.scaling['mean'].shape[0]
+        values = np.asarray(sample).reshape(-1, len(self.spaces))
+
+        return (values[:, :num_columns] * self.scaling['scale']
+                + self.scaling['mean'])
+
+    def from_data(self, data):
         self.data = data
 
         self.info = self.data.columns.tolist()
 
         self.spaces = self.generate_spaces()
         assert len(self.spaces) == self.data.shape[1]
+        self.update_bounds()
+
+        return self
+
+    def swap_data(self, data):
+        """
+        Swaps in data with the same columns - i.e. another site of a pool
+
+        The spaces of the data columns and of any windows are remade so
+        that the bounds match the new data.  Windows keep the scaling they
+        were made with.  Spaces added by extend (i.e. the charge of a
+        battery) are kept
+
+        Swap the window source (the state space) first
+
+        args
+            data (pd.DataFrame or ChunkedDataset)
+        """
+        num_columns = data.shape[1]
+
+        if data.columns.tolist() != self.info[:num_columns]:
+            raise ValueError('{} data has different columns'.format(
+                self.name))
+
+        self.data = data
+        self.spaces[:num_columns] = self.generate_spaces()
+
+        position = self._window_slice.start if self.windows else 0
+        for column, history, horizon, mean, std in self.windows:
+            _, _, low, high = column_statistics(
+                self.window_source.data, column)
+
+            space = ContinuousSpace((low - mean) / std, (high - mean) / std)
+            self.spaces[position: position + history + horizon] = \
+                [space] * (history + horizon)
+            position += history + horizon
+
+        self.update_bounds()
 
         return self
 
@@ -78,6 +292,7 @@ class GlobalSpace(object):
 
         self.spaces = spaces
         self.info = labels 
+        self.update_bounds()
 
         return self
 
@@ -93,14 +308,66 @@ class GlobalSpace(object):
         self.info.extend(label)
 
         assert len(self.spaces) == len(self.info)
+        self.update_bounds()
+
+    def update_bounds(self):
+        """
+        Vectors of the bounds of each dimension, used instead of looping
+        over self.spaces
+
+        self.low and self.high are inclusive - the high of a DiscreteSpace
+        of num options is num - 1
+        """
+        self.is_discrete = np.array(
+            [isinstance(spc, DiscreteSpace) for spc in self.spaces],
+            dtype=bool)
+
+        self.low = np.array(
+            [spc.low for spc in self.spaces], dtype=float)
+
+        self.high = np.array(
+            [spc.high - 1 if discrete else spc.high for spc, discrete
+             in zip(self.spaces, self.is_discrete)], dtype=float)
 
     def contains(self, x):
-        return all(
-            spc.contains(part) for (spc, part) in zip(self.spaces, x[0])
-        )
+        """
+        args
+            x (np.array) shape=(num_samples, *self.shape)
+
+        returns
+            contains (bool) True if every sample is in the space
+        """
+        x = np.asarray(x)
 
-    def sample(self):
-        return np.array([spc.sample() for spc in self.spaces]).reshape(1, *self.shape)
+        if self.dims == '2D':
+            return x.shape[1:] == self.shape
+
+        if x.size == 0 or x.size % self.low.shape[0] != 0:
+            return False
+
+        x = x.reshape(-1, self.low.shape[0]).astype(float)
+
+        inside = (x >= self.low) & (x <= self.high)
+        integer = ~self.is_discrete | (x == np.floor(x))
+
+        return bool(np.all(inside & integer))
+
+    def sample(self, num_samples=1):
+        """
+        Samples uniformly from the space
+
+        args
+            num_samples (int)
+
+        returns
+            sample (np.array) shape=(num_samples, *self.shape)
+        """
+        uniform = np.random.uniform(size=(int(num_samples), len(self.low)))
+
+        continuous = self.low + uniform * (self.high - self.low)
+        discrete = self.low + np.floor(uniform * (self.high - self.low + 1))
+
+        return self.reshape(np.where(self.is_discrete, discrete, continuous))
 
     def sample_discrete(self):
         if not hasattr(self, 'discrete_spaces'):
@@ -111,25 +378,43 @@ class GlobalSpace(object):
         ).reshape(1, *self.shape)
 
     def discretize(self, num_discrete):
+        """
+        Every combination of the discretized dimensions - continuous
+        dimensions are split into num_discrete points, discrete dimensions
+        keep all their options
+
+        returns
+            discrete_spaces (np.array) shape=(num_combinations, *self.shape)
+        """
         #  TODO makes sense for num_discrete to be odd to ensure you get a 0
-        self.discrete_spaces = np.array([
-            a for a in itertools.product(
-                *[spc.discretize(num_discrete) for spc in self.spaces])
-        ]).reshape(-1, *self.shape)
+        dims = [
+            np.arange(low, high + 1) if discrete
+            else np.linspace(low, high, num_discrete)
+            for low, high, discrete
+            in zip(self.low, self.high, self.is_discrete)
+        ]
+
+        #  ij indexing gives the same order as itertools.product
+        grid = np.meshgrid(*dims, indexing='ij')
+
+        self.discrete_spaces = np.stack(
+            [dim.reshape(-1) for dim in grid], axis=1
+        ).reshape(-1, *self.shape)
 
         return self.discrete_spaces
 
     def generate_spaces(self):
         spaces = []
+        mins, maxs = self.data.min(), self.data.max()
 
-        for name, col in self.data.iteritems():
+        for name in self.data.columns:
             label = str(name[:2])
 
             if label == 'D_':
-                space = DiscreteSpace(col.max())
+                space = DiscreteSpace(maxs[name])
 
             elif label == 'C_':
-                space = ContinuousSpace(col.min(), col.max())
+                space = ContinuousSpace(mins[name], maxs[name])
 
             else:
                 raise ValueError('Time series columns mislabelled')
@@ -138,10 +423,143 @@ class GlobalSpace(object):
 
         return spaces
 
+    def get_episode(self, start, end):
+        """ slices an episode without changing the current episode """
+        if isinstance(self.data, pd.DataFrame):
+            return self.data.iloc[start: end, :]
+
+        #  chunked datasets only read the episode from disk
+        return self.data.window(start, end)
+
+    def prepare_episode(self, start, end):
+        """
+        Slices an episode and makes its array without changing the current
+        episode - the slow part of a reset, run ahead by the EpisodeSampler
+
+        returns
+            episode (tuple) (pd.DataFrame, np.array) for the episode setter
+        """
+        episode = self.get_episode(start, end)
+
+        return episode, np.asarray(episode)
+
     def sample_episode(self, start, end):
-        self.episode = self.data.iloc[start: end, :]
+        self.episode = self.get_episode(start, end)
         return self.episode
 
+    def add_windows(self, source, windows, dims='flat'):
+        """
+        Adds rolling windows of columns from another space
+
+        Windows are views into a single array per column per episode so
+        long windows don't use more memory than the episode itself.  The
+        window for step t covers t - history + 1 to t + horizon
+
+        Must be called before the space is extended (i.e. with the charge
+        of a battery)
+
+        args
+            source (GlobalSpace) i.e. the state space
+            windows (dict) {column: history} or {column: (history, horizon)}
+            dims (str) flat or 2D - 2D makes an image of
+                shape=(width, num_windows + num_features, 1) for conv nets
+        """
+        self.window_source = source
+        self._window_slice = slice(len(self.spaces), len(self.spaces))
+
+        for column, steps in sorted(windows.items()):
+            if isinstance(steps, int):
+                steps = (steps, 0)
+
+            history, horizon = int(steps[0]), int(steps[1])
+
+            if history < 0 or horizon < 0 or history + horizon < 1:
+                raise ValueError(
+                    'window for {} of {} steps history and {} horizon'.format(
+                        column, history, horizon))
+
+            if column not in source.data.columns:
+                raise ValueError(
+                    '{} is not a column of the {} space'.format(
+                        column, source.name))
+
+            #  windows are scaled using statistics of the full column
+            mean, std, low, high = column_statistics(source.data, column)
+
+            std = std if std > 0 else 1.0
+            self.windows.append((column, history, horizon, mean, std))
+
+            space = ContinuousSpace((low - mean) / std, (high - mean) / std)
+
+            self.extend(
+                [space] * (history + horizon),
+                ['{} t{:+d}'.format(column, step)
+                 for step in range(1 - history, horizon + 1)]
+            )
+
+        self._window_slice = slice(
+            self._window_slice.start, len(self.spaces))
+
+        if dims == '2D' and len(set(w[1] + w[2] for w in self.windows)) != 1:
+            raise ValueError('2D observations need windows of equal size')
+
+        self.dims = str(dims)
+
+        return self
+
+    def sample_windows(self, start, end, window_values=None):
+        """
+        Sets the windows of the current episode
+
+        args
+            start (int)
+            end (int)
+            window_values (list) made by make_windows ahead of time
+        """
+        if window_values is None:
+            window_values = self.make_windows(start, end)
+
+        self._window_values = window_values
+
+        return self._window_values
+
+    def make_windows(self, start, end):
+        """
+        Makes the windows for an episode of the source space without
+        changing the current episode
+
+        Windows that run off the ends of the data repeat the first or last
+        value
+
+        args
+            start (int)
+            end (int)
+
+        returns
+            window_values (list) an array per window
+        """
+        num_samples = self.window_source.data.shape[0]
+        window_values = []
+
+        for column, history, horizon, mean, std in self.windows:
+            lo, hi = start - history + 1, end + horizon
+
+            values = self.window_source.get_episode(
+                max(lo, 0), min(hi, num_samples)).loc[:, column].values
+            values = (np.asarray(values, dtype=float) - mean) / std
+
+            if lo < 0 or hi > num_samples:
+                values = np.pad(
+                    values,
+                    (max(-lo, 0), max(hi - num_samples, 0)),
+                    mode='edge'
+                )
+
+            #  shape=(end - start, history + horizon) - a view of values
+            window_values.append(rolling_window(values, history + horizon))
+
+        return window_values
+
     def no_op(self):
         raise NotImplementedError(
             'implement this in the environment child class (ie battery, flex etc'
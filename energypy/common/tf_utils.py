@@ -2,6 +2,8 @@
 
 import tensorflow as tf
 
+from energypy.common.parallel import parse_cpus, pin_cpus
+
 
 def get_tf_params(scope):
     """
@@ -47,3 +49,34 @@ def make_copy_ops(parent, child, scope='copy_ops'):
             )
 
     return copy_ops, tau
+
+
+def make_session(intra_op_threads=0, inter_op_threads=0, cpus=None):
+    """
+    Creates a session with bounded thread pools
+
+    Zero threads lets tensorflow size the pool to the machine - with cpus
+    set the intra op pool defaults to one thread per cpu and the inter op
+    pool to a single thread
+
+    args
+        intra_op_threads (int) threads used inside a single op
+        inter_op_threads (int) ops run in parallel
+        cpus (list) the process is pinned to these cpus
+
+    returns
+        sess (tf.Session)
+    """
+    cpus = parse_cpus(cpus)
+
+    if cpus:
+        pin_cpus(cpus)
+        intra_op_threads = intra_op_threads or len(cpus)
+        inter_op_threads = inter_op_threads or 1
+
+    config = tf.ConfigProto(
+        intra_op_parallelism_threads=int(intra_op_threads),
+        inter_op_parallelism_threads=int(inter_op_threads)
+    )
+
+    return tf.Session(config=config)
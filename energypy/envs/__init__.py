@@ -1,2 +1,3 @@
 from energypy.envs.env import BaseEnv
 from energypy.envs.register import make_env
+from energypy.envs.wrappers import ActionRepeat
@@ -78,6 +78,7 @@ class Battery(BaseEnv):
             initial_charge = float(self.initial_charge)  # %
 
         self.charge = float(self.capacity * initial_charge)  # MWh
+        self.episode_initial_charge = self.charge
 
         self.state = self.state_space(
             self.steps, append=np.array(self.charge)
@@ -117,33 +118,35 @@ class Battery(BaseEnv):
         """
         old_charge = self.charge
 
-        #  convert from MW to MWh/5 min by /12
-        net_charge = action / 12
+        #  convert from MW to MWh per step - i.e. /12 for 5 minute steps
+        net_charge = action / self.steps_per_hour
 
         #  we first check to make sure this charge is within our capacity limit
         new_charge = np.clip(old_charge + net_charge, 0, self.capacity)
 
         #  we can now calculate the gross rate of charge or discharge
-        gross_rate = (new_charge - old_charge) * 12
+        gross_rate = (new_charge - old_charge) * self.steps_per_hour
 
         #  now we account for losses / the round trip efficiency
         if gross_rate > 0:
             #  we lose electricity when we charge
-            losses = gross_rate * (1 - self.round_trip_eff) / 12
+            losses = (gross_rate * (1 - self.round_trip_eff)
+                      / self.steps_per_hour)
         else:
             #  we don't lose anything when we discharge
             losses = 0
 
         #  we can now calculate the new charge of the battery after losses
-        self.charge = old_charge + gross_rate / 12 - losses
+        self.charge = old_charge + gross_rate / self.steps_per_hour - losses
         #  this allows us to calculate how much electricity we actually store
         net_stored = self.charge - old_charge
         #  and to calculate our actual rate of charge or discharge
-        net_rate = net_stored * 12
+        net_rate = net_stored * self.steps_per_hour
 
         #  energy balances
-        assert np.isclose(self.charge - old_charge - net_stored, 0)
-        assert np.isclose(net_rate - net_stored * 12, 0)
+        if self.checked:
+            assert np.isclose(self.charge - old_charge - net_stored, 0)
+            assert np.isclose(net_rate - net_stored * self.steps_per_hour, 0)
 
         #  now we can calculate the reward
         #  the reward is simply the cost to charge
@@ -153,7 +156,7 @@ class Battery(BaseEnv):
         electricity_price = self.get_state_variable(
             'C_electricity_price [$/MWh]')
 
-        reward = - gross_rate * electricity_price / 12
+        reward = - gross_rate * electricity_price / self.steps_per_hour
 
         done = False
 
@@ -193,10 +196,72 @@ class Battery(BaseEnv):
                 }
 
         self.info = self.update_info(**info)
-        [logger.debug('{} {}'.format(k, v)) for k, v in info.items()]
+
+        if self.checked:
+            [logger.debug('{} {}'.format(k, v)) for k, v in info.items()]
 
         self.steps += 1
         self.state = next_state
         self.observation = next_observation
 
         return self.observation, reward, done, self.info
+
+    def _simulate(self, actions):
+        """
+        Open loop simulation of a schedule of actions
+
+        Same physics as _step, starting from the charge set in the last
+        reset.  Runs over python floats with the outputs written into
+        preallocated arrays
+
+        args
+            actions (np.array) shape=(episode_length, 1)
+
+        returns
+            outputs (dict) of np.arrays shape=(episode_length,)
+        """
+        prices = self.state_space.episode.loc[
+            :, 'C_electricity_price [$/MWh]'].values.astype(float)
+        num_steps = prices.shape[0]
+
+        outputs = {
+            key: np.empty(num_steps) for key in [
+                'electricity_price', 'old_charge', 'charge', 'gross_rate',
+                'losses', 'net_rate', 'reward', 'cost']
+        }
+
+        old_charges = outputs['old_charge']
+        charges = outputs['charge']
+        gross_rates = outputs['gross_rate']
+        all_losses = outputs['losses']
+
+        capacity = self.capacity
+        loss_fraction = 1 - self.round_trip_eff
+        charge = self.episode_initial_charge
+        steps_per_hour = self.steps_per_hour
+
+        for step, action in enumerate(actions[:, 0].tolist()):
+            old_charge = charge
+
+            new_charge = min(
+                max(old_charge + action / steps_per_hour, 0.0), capacity)
+            gross_rate = (new_charge - old_charge) * steps_per_hour
+
+            if gross_rate > 0:
+                losses = gross_rate * loss_fraction / steps_per_hour
+            else:
+                losses = 0.0
+
+            charge = old_charge + gross_rate / steps_per_hour - losses
+
+            old_charges[step] = old_charge
+            charges[step] = charge
+            gross_rates[step] = gross_rate
+            all_losses[step] = losses
+
+        outputs['electricity_price'][:] = prices
+        outputs['net_rate'][:] = (charges - old_charges) * steps_per_hour
+        outputs['cost'][:] = gross_rates * prices / steps_per_hour
+        outputs['reward'][:] = - outputs['cost']
+
+        return outputs
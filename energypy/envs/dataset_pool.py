@@ -0,0 +1,191 @@
+"""
+A pool of site datasets for training a single env across many sites
+
+A pool is a folder of datasets, one folder per site
+
+    sites/site_a/state.csv
+                 observation.csv
+    sites/site_b/state/meta.json     (chunked - see chunked_dataset.py)
+                 observation/meta.json
+    ...
+
+An index of (site, length, start, end) is built by reading only the
+datetime index of each site and cached in sites/site_index.csv.  Site
+data is loaded when a site is sampled and kept in a bounded least
+recently used cache
+"""
+
+from collections import OrderedDict
+import logging
+import os
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from energypy.common.spaces.space import load_space_data
+from energypy.experiments.chunked_dataset import ChunkedDataset
+from energypy.experiments.chunked_dataset import is_chunked_dataset
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_site_dataset(path):
+    return (os.path.exists(join(path, 'state.csv'))
+            or is_chunked_dataset(path, 'state'))
+
+
+def is_dataset_pool(path):
+    """ a folder of site datasets that isn't a dataset itself """
+    path = str(path)
+
+    if not os.path.isdir(path) or is_site_dataset(path):
+        return False
+
+    return any(is_site_dataset(join(path, site)) for site in os.listdir(path))
+
+
+def index_site(path):
+    """
+    Reads only the datetime index of a site
+
+    returns
+        length (int)
+        start (pd.Timestamp)
+        end (pd.Timestamp)
+    """
+    if is_chunked_dataset(path, 'state'):
+        data = ChunkedDataset(path, 'state')
+        ends = data.window(0, 1).index.append(
+            data.window(len(data) - 1, len(data)).index)
+        return len(data), ends[0], ends[-1]
+
+    index = pd.read_csv(
+        join(path, 'state.csv'), usecols=[0], index_col=0, parse_dates=True
+    ).index
+
+    return index.shape[0], index[0], index[-1]
+
+
+class DatasetPool(object):
+    """
+    Many site datasets with a bounded cache of loaded sites
+
+    args
+        path (str) folder of site datasets
+        cache_size (int) max number of sites held in memory
+    """
+    def __init__(self, path, cache_size=8):
+        self.path = str(path)
+        self.cache_size = int(cache_size)
+        self.cache = OrderedDict()
+
+        self.hits, self.misses = 0, 0
+
+        self.index = self.make_index()
+        self.sites = self.index.index.tolist()
+
+        logger.info('dataset pool of {} sites at {}'.format(
+            len(self.sites), self.path))
+
+    def __repr__(self):
+        return '<DatasetPool {} sites cache_size={}>'.format(
+            len(self.sites), self.cache_size)
+
+    def __len__(self):
+        return len(self.sites)
+
+    def make_index(self):
+        """
+        Index of site, length, start and end
+
+        Cached in site_index.csv - only new sites are indexed
+        """
+        index_path = join(self.path, 'site_index.csv')
+
+        sites = sorted(
+            site for site in os.listdir(self.path)
+            if is_site_dataset(join(self.path, site))
+        )
+
+        if os.path.exists(index_path):
+            index = pd.read_csv(
+                index_path, index_col=0, parse_dates=['start', 'end'])
+            index.index = index.index.astype(str)
+            index = index.loc[[site for site in sites if site in index.index]]
+
+        else:
+            index = pd.DataFrame(columns=['length', 'start', 'end'])
+
+        new_sites = [site for site in sites if site not in index.index]
+
+        if new_sites:
+            logger.info('indexing {} sites'.format(len(new_sites)))
+
+            new = pd.DataFrame(
+                [index_site(join(self.path, site)) for site in new_sites],
+                index=new_sites,
+                columns=['length', 'start', 'end']
+            )
+
+            index = pd.concat([index, new], axis=0).loc[sites]
+            index.index.name = 'site'
+
+            try:
+                index.to_csv(index_path)
+            except OSError:
+                logger.debug('could not cache site index to {}'.format(
+                    index_path))
+
+        index['length'] = index['length'].astype(int)
+
+        return index
+
+    def sample_site(self, episode_length):
+        """
+        Samples a site - weighted by the number of episodes it holds
+
+        args
+            episode_length (int)
+
+        returns
+            site (str)
+        """
+        #  same as BaseEnv.random_sample - needs more than episode_length
+        starts = self.index.loc[:, 'length'].values - int(episode_length)
+        starts = np.clip(starts, 0, None).astype(float)
+
+        if starts.sum() == 0:
+            raise ValueError(
+                'no site has {} steps of data'.format(episode_length))
+
+        idx = np.random.choice(len(self.sites), p=starts / starts.sum())
+        return self.sites[idx]
+
+    def load(self, site):
+        """
+        Loads the state and observation data for a site
+
+        returns
+            state (pd.DataFrame or ChunkedDataset)
+            observation (pd.DataFrame or ChunkedDataset)
+        """
+        if site in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(site)
+            return self.cache[site]
+
+        self.misses += 1
+        path = join(self.path, site)
+
+        data = (load_space_data(path, 'state'),
+                load_space_data(path, 'observation'))
+
+        self.cache[site] = data
+
+        while len(self.cache) > self.cache_size:
+            evicted, _ = self.cache.popitem(last=False)
+            logger.debug('evicted site {} from cache'.format(evicted))
+
+        return data
@@ -1,36 +1,107 @@
 import collections
 import logging
 import random
-import tensorflow as tf
+import sys
 
 import numpy as np
+import pandas as pd
 
 from energypy.common.spaces import GlobalSpace
+from energypy.envs.dataset_pool import DatasetPool, is_dataset_pool
+from energypy.envs.sampler import EpisodeSampler
 
 
 logger = logging.getLogger(__name__)
 
 
+def infer_steps_per_hour(data):
+    """
+    Number of steps per hour from the median spacing of a dataset's index
+
+    args
+        data (pd.DataFrame or ChunkedDataset)
+
+    returns
+        steps_per_hour (float) i.e. 12.0 for 5 minute data - also the
+            default for data without a datetime index
+    """
+    if isinstance(data, pd.DataFrame):
+        index = data.index[:1000]
+    else:
+        index = data.window(0, 1000).index
+
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        logger.warning('no datetime index - assuming 5 minute steps')
+        return 12.0
+
+    step = pd.Series(index).diff().median()
+
+    return pd.Timedelta('1H') / step
+
+
 class BaseEnv(object):
     """
     Generic time series environment
 
     args
         dataset (str) located in energypy/experiments/datasets
-        episode_sample (str) i.e. fixed, random
+            or a folder of site datasets - each episode samples a site
+        episode_sample (str) i.e. fixed, random, full or epoch
+            epoch visits every non-overlapping episode once, shuffled
         episode_length (int)
+        site_cache_size (int) sites held in memory for a folder of sites
+        observation_windows (dict) rolling windows of state columns added
+            to the observation - {column: history} or
+            {column: (history, horizon)}
+        observation_dims (str) flat or 2D - 2D observations are images of
+            the windows for conv networks
+        resample (str) pandas offset to resample the dataset to - i.e.
+            30min.  The step duration comes from the dataset index
+        checked (bool) validate every action and the physics of every
+            step - False skips the checks for fast training with actions
+            that are trusted to be valid (i.e. from discrete_actions)
     """
     def __init__(
             self,
             dataset='example',
             episode_sample='full',
-            episode_length=2016
+            episode_length=2016,
+            site_cache_size=8,
+            observation_windows=None,
+            observation_dims='flat',
+            resample=None,
+            checked=True
     ):
 
         logger.info('Initializing environment {}'.format(repr(self)))
 
-        self.state_space = GlobalSpace('state').from_dataset(str(dataset))
-        self.observation_space = GlobalSpace('observation').from_dataset(str(dataset))
+        self.checked = bool(checked)
+
+        #  the end of the dataset held out of sampled episodes
+        self.test_steps = 0
+
+        if is_dataset_pool(dataset):
+            if resample:
+                raise ValueError(
+                    'resampling a folder of sites is not supported')
+
+            self.pool = DatasetPool(dataset, cache_size=site_cache_size)
+            self.site = self.pool.sample_site(episode_length)
+            state, observation = self.pool.load(self.site)
+
+            self.state_space = GlobalSpace('state').from_data(state)
+            self.observation_space = GlobalSpace(
+                'observation').from_data(observation)
+
+        else:
+            self.pool = None
+            self.state_space = GlobalSpace('state').from_dataset(
+                str(dataset), resample=resample)
+            self.observation_space = GlobalSpace('observation').from_dataset(
+                str(dataset), resample=resample)
+
+        #  MW to MWh conversions use the step duration of the data
+        self.steps_per_hour = infer_steps_per_hour(self.state_space.data)
 
         if episode_sample == 'random':
             self.sample_stragety = self.random_sample
@@ -46,6 +117,29 @@ class BaseEnv(object):
             self.state_space.data.shape[0]
         )
 
+        if episode_sample == 'epoch':
+            if self.pool:
+                raise ValueError(
+                    'epoch episode sampling is not supported for site pools')
+
+            self.sampler = EpisodeSampler(
+                self.state_space,
+                self.observation_space,
+                self.episode_length
+            )
+
+        else:
+            self.sampler = None
+
+        if observation_windows:
+            self.observation_space.add_windows(
+                self.state_space, observation_windows, dims=observation_dims)
+
+        elif observation_dims != 'flat':
+            raise ValueError(
+                '{} observations need observation_windows'.format(
+                    observation_dims))
+
     def seed(self, seed=None):
 
         if seed:
@@ -55,16 +149,23 @@ class BaseEnv(object):
                 repr(self), seed))
 
             random.seed(seed)
-            tf.set_random_seed(seed)
             np.random.seed(seed)
 
+            #  only seed tensorflow if an agent has already imported it
+            if 'tensorflow' in sys.modules:
+                sys.modules['tensorflow'].set_random_seed(seed)
+
         else:
             logging.debug('not setting random seed')
 
-    def reset(self):
+    def reset(self, episode=None):
         """
         Resets the state of the environment, returns an initial observation
 
+        args
+            episode (tuple) optional (start, end) - runs this episode
+                instead of sampling one
+
         returns
             observation (np array) initial observation
         """
@@ -75,9 +176,8 @@ class BaseEnv(object):
         self.info = collections.defaultdict(list)
         self.outputs = collections.defaultdict(list)
 
-        episode = self.sample_episode()
-        self.state_space.episode = episode[0]
-        self.observation_space.episode = episode[1]
+        #  sets the episode of the state & observation spaces
+        self.sample_episode(episode)
 
         logger.debug(
             'Episode start {} Episode end {}'.format(
@@ -105,32 +205,146 @@ class BaseEnv(object):
             raise ValueError(
                 'You need to reset the environment before calling step()')
 
+        if not self.checked:
+            return self._step(
+                np.asarray(action).reshape(1, *self.action_space.shape))
+
         action = np.array(action).reshape(1, *self.action_space.shape)
         assert self.action_space.contains(action)
         logger.debug('step {} action {}'.format(self.steps, action))
         return self._step(action)
 
-    def sample_episode(self):
-        """ Samples a single episode """
-        start, end = self.sample_stragety()
-        logger.debug('Sampling episode start {} end {}'.format(start, end))
+    def simulate(self, actions):
+        """
+        Runs a full schedule of actions through the current episode
+
+        The env must be reset first so that an episode is sampled.  The
+        env itself is not stepped - self.steps and self.state are unchanged
+
+        args
+            actions (np array) shape=(episode_length, *action_space.shape)
 
-        state_ep = self.state_space.sample_episode(start, end)
-        obs_ep = self.observation_space.sample_episode(start, end)
+        returns
+            outputs (dict) of np arrays, one row per step
+        """
+        if not hasattr(self, 'state'):
+            raise ValueError(
+                'You need to reset the environment before calling simulate()')
+
+        episode_length = self.state_space.episode.shape[0]
+
+        actions = np.array(actions).reshape(
+            -1, *self.action_space.shape)
+
+        if actions.shape[0] != episode_length:
+            raise ValueError(
+                'schedule of {} actions for an episode of {} steps'.format(
+                    actions.shape[0], episode_length))
+
+        return self._simulate(actions)
+
+    def sample_episode(self, episode=None):
+        """ Samples a single episode - or slices episode=(start, end) """
+        windows = None
+
+        if episode:
+            start, end = episode
+            state_ep = self.state_space.sample_episode(start, end)
+            obs_ep = self.observation_space.sample_episode(start, end)
+
+        elif self.sampler:
+            #  arrays & windows were made in the sampler's thread
+            start, end, state_ep, obs_ep, windows = \
+                self.sampler.next_episode()
+
+            self.state_space.episode = state_ep
+            self.observation_space.episode = obs_ep
+
+            state_ep = self.state_space.episode
+            obs_ep = self.observation_space.episode
+
+        else:
+            if self.pool:
+                self.sample_site()
+
+            start, end = self.sample_stragety()
+            state_ep = self.state_space.sample_episode(start, end)
+            obs_ep = self.observation_space.sample_episode(start, end)
+
+        if self.observation_space.windows:
+            self.observation_space.sample_windows(
+                start, end, window_values=windows)
+
+        logger.debug('Sampling episode start {} end {}'.format(start, end))
 
         assert state_ep.shape[0] == obs_ep.shape[0]
         return state_ep, obs_ep
 
+    def sample_site(self):
+        """
+        swaps the data of the spaces to a site sampled from the pool
+
+        The bounds of the spaces are remade from the data of the site
+        """
+        site = self.pool.sample_site(self.episode_length)
+
+        if site == self.site:
+            return
+
+        self.site = site
+        state, observation = self.pool.load(self.site)
+
+        self.state_space.swap_data(state)
+        self.observation_space.swap_data(observation)
+
+        logger.debug('Sampled site {}'.format(self.site))
+
+    def hold_out(self, test_steps):
+        """
+        Keeps the last test_steps of the dataset out of sampled episodes -
+        i.e. for evaluation on held out episodes.  Episodes passed to reset
+        are not restricted
+
+        args
+            test_steps (int)
+        """
+        if self.pool:
+            raise ValueError('holding out steps of a site pool is not '
+                             'supported')
+
+        num_samples = self.state_space.data.shape[0] - int(test_steps)
+
+        if num_samples < self.episode_length:
+            raise ValueError(
+                '{} steps left to train on for episodes of {}'.format(
+                    num_samples, self.episode_length))
+
+        self.test_steps = int(test_steps)
+
+        if self.sampler:
+            if self.sampler.executor:
+                self.sampler.executor.shutdown(wait=False)
+
+            self.sampler = EpisodeSampler(
+                self.state_space,
+                self.observation_space,
+                self.episode_length,
+                num_samples=num_samples
+            )
+
+        logger.info('holding out the last {} steps'.format(self.test_steps))
+
     def random_sample(self):
         start = np.random.randint(
             low=0,
-            high=self.state_space.data.shape[0] - self.episode_length
+            high=self.state_space.data.shape[0] - self.test_steps
+            - self.episode_length
         )
         return start, start + self.episode_length
 
     def full_sample(self):
         start = 0
-        end = self.state_space.data.shape[0]
+        end = self.state_space.data.shape[0] - self.test_steps
         return start, end
 
     def fixed_sample(self):
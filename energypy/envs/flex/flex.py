@@ -22,7 +22,7 @@ class Flex(BaseEnv):
             self,
             capacity=4.0,         # MWh
             supply_capacity=0.5,  # MWh
-            release_time=12,      # num 5 mins
+            release_time=1.0,     # hours
             supply_power=0.05,    # MW
             **kwargs
     ):
@@ -32,10 +32,14 @@ class Flex(BaseEnv):
         #  this should look at the max of the data - TODO
         self.supply_capacity = float(supply_capacity)
 
-        self.release_time = int(release_time)
+        self.release_time = float(release_time)
 
         super().__init__(**kwargs)
 
+        #  stored demand is released after release_time hours of steps
+        self.release_steps = max(
+            1, int(round(self.release_time * self.steps_per_hour)))
+
         """
         action space has a single discrete dimension
         0 = no op
@@ -70,7 +74,7 @@ class Flex(BaseEnv):
         #  i.e how much power we consume during precooling
         self.supply_power = float(max(
             float(supply_power),
-            self.state_space.data.loc[:, 'C_demand [MW]'].max()
+            self.state_space.data.max()['C_demand [MW]']
         ))
 
     def __repr__(self):
@@ -92,10 +96,10 @@ class Flex(BaseEnv):
 
         The time difference between store and release is the length of the deque
 
-        The deque stores MWh/5 min
+        The deque stores MWh per step
         """
-        self.storage_history = deque(maxlen=self.release_time)
-        [self.storage_history.appendleft(0) for _ in range(self.release_time)]
+        self.storage_history = deque(maxlen=self.release_steps)
+        [self.storage_history.appendleft(0) for _ in range(self.release_steps)]
 
         #  use a float for the inverse of stored demand
         self.stored_supply = 0  # MWh
@@ -156,7 +160,7 @@ class Flex(BaseEnv):
 
         stored_supply = np.min(
             [self.supply_capacity - old_stored_supply,
-            (self.supply_power / 12) - demand]
+            (self.supply_power / self.steps_per_hour) - demand]
         )
 
         self.stored_supply += stored_supply
@@ -167,8 +171,9 @@ class Flex(BaseEnv):
         """ one step through the environment """
         action = action[0][0]  #  could do this in BaseAgent
 
-        #  do everything in the MWh / 5 min space
-        site_demand = self.get_state_variable('C_demand [MW]') / 12
+        #  do everything in the MWh per step space
+        site_demand = (self.get_state_variable('C_demand [MW]')
+                       / self.steps_per_hour)
         flexed = site_demand
 
         #  no-op
@@ -200,8 +205,8 @@ class Flex(BaseEnv):
 
         electricity_price = self.get_state_variable(
             'C_electricity_price [$/MWh]')
-        baseline_cost = site_demand * electricity_price * 12
-        flexed_cost = flexed * electricity_price * 12
+        baseline_cost = site_demand * electricity_price * self.steps_per_hour
+        flexed_cost = flexed * electricity_price * self.steps_per_hour
 
         #  negative means we are increasing cost
         #  positive means we are reducing cost
@@ -246,10 +251,97 @@ class Flex(BaseEnv):
                 }
 
         self.info = self.update_info(**info)
-        [logger.debug('{} {}'.format(k, v)) for k, v in info.items()]
+        if self.checked:
+            [logger.debug('{} {}'.format(k, v)) for k, v in info.items()]
 
         self.steps += 1
         self.state = next_state
         self.observation = next_observation
 
         return self.observation, reward, done, self.info
+
+    def _simulate(self, actions):
+        """
+        Open loop simulation of a schedule of setpoint actions
+
+        Same logic as _step, starting from empty storage.  Releasing the
+        stored demand clears the history deque rather than refilling it
+
+        args
+            actions (np.array) shape=(episode_length, 1)
+
+        returns
+            outputs (dict) of np.arrays shape=(episode_length,)
+        """
+        episode = self.state_space.episode
+        steps_per_hour = self.steps_per_hour
+        prices = episode.loc[:, 'C_electricity_price [$/MWh]'].values
+        demands = episode.loc[:, 'C_demand [MW]'].values / steps_per_hour
+
+        num_steps = prices.shape[0]
+
+        outputs = {
+            key: np.empty(num_steps) for key in [
+                'electricity_price', 'site_demand', 'flexed', 'stored_demand',
+                'stored_supply', 'setpoint', 'reward', 'cost', 'baseline_cost']
+        }
+
+        flexes = outputs['flexed']
+        stored_demands = outputs['stored_demand']
+        stored_supplies = outputs['stored_supply']
+
+        history = deque(maxlen=self.release_steps)
+        stored_demand = 0.0
+        stored_supply = 0.0
+
+        capacity = self.capacity
+        supply_capacity = self.supply_capacity
+        supply_per_step = self.supply_power / steps_per_hour
+        last_step = num_steps - 1
+
+        for step, (action, demand) in enumerate(
+                zip(actions[:, 0].tolist(), demands.tolist())):
+            flexed = demand
+
+            if action == 0:
+                released_supply = min(flexed, stored_supply)
+                stored_supply -= released_supply
+                flexed -= released_supply
+
+                flexed -= stored_demand
+                history.clear()
+                stored_demand = 0.0
+
+            if action == 1:
+                history.appendleft(flexed)
+                flexed = 0
+                stored_demand = sum(history)
+
+            if action == 2:
+                flexed -= stored_demand
+                history.clear()
+                stored_demand = 0.0
+
+                new_supply = min(supply_capacity - stored_supply,
+                                 supply_per_step - flexed)
+                stored_supply += new_supply
+                flexed += new_supply
+
+            if stored_demand >= capacity or step == last_step:
+                flexed -= stored_demand
+                history.clear()
+                stored_demand = 0.0
+
+            flexes[step] = flexed
+            stored_demands[step] = stored_demand
+            stored_supplies[step] = stored_supply
+
+        outputs['electricity_price'][:] = prices
+        outputs['site_demand'][:] = demands
+        outputs['setpoint'][:] = np.select(
+            [actions[:, 0] == 1, actions[:, 0] == 2], [1, -1], default=0)
+        outputs['baseline_cost'][:] = demands * prices * steps_per_hour
+        outputs['cost'][:] = flexes * prices * steps_per_hour
+        outputs['reward'][:] = outputs['baseline_cost'] - outputs['cost']
+
+        return outputs
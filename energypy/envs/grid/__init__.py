@@ -0,0 +1 @@
+from energypy.envs.grid.grid import clear_market, settle_market
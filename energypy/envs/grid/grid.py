@@ -36,22 +36,70 @@ def settle_market(bid_stack, demand, date):
     return bids
 
 
-def test_grid():
-    """ settle a simple two bid market """
-    market = [
-        Bid(price=50, offer=100, name='coal'),
-        Bid(price=10, offer=10, name='wind')
-    ]
+def clear_market(prices, offers, demand):
+    """
+    Merit order dispatch for many market intervals at once
 
-    bids = settle_market(market, demand=50, date='test')
+    args
+        prices (np.array) shape=(num_intervals, num_participants) [$/MWh]
+        offers (np.array) shape=(num_intervals, num_participants) [MW]
+        demand (np.array) shape=(num_intervals,) [MW]
 
-    assert bids[0].dispatch == 10
-    assert bids[0].name == 'wind'
-    assert bids[1].dispatch == 40
-    assert bids[1].name == 'coal'
+    returns
+        clearing_prices (np.array) shape=(num_intervals,) [$/MWh]
+        dispatch (np.array) shape=(num_intervals, num_participants) [MW]
 
+    Bids are sorted by price within each interval, the cumulative offer
+    curve is built along the participant axis and the marginal bid is found
+    with a single searchsorted over all intervals
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    offers = np.atleast_2d(np.asarray(offers, dtype=float))
+    demand = np.asarray(demand, dtype=float).reshape(-1)
 
-test_grid()
+    assert prices.shape == offers.shape
+    assert demand.shape[0] == prices.shape[0]
+
+    num_intervals, num_participants = prices.shape
+
+    #  stable sort so that equal prices are dispatched in participant order
+    order = np.argsort(prices, axis=1, kind='mergesort')
+    rows = np.arange(num_intervals).reshape(-1, 1)
+    sorted_prices = prices[rows, order]
+    sorted_offers = offers[rows, order]
+
+    cumulative = np.cumsum(sorted_offers, axis=1)
+
+    short = cumulative[:, -1] < demand
+    if short.any():
+        raise ValueError(
+            'offers are less than demand in {} intervals - first {}'.format(
+                short.sum(), np.flatnonzero(short)[0]))
+
+    #  dispatch is whatever demand is left after cheaper bids, clipped to
+    #  the size of the offer
+    remaining = demand.reshape(-1, 1) - (cumulative - sorted_offers)
+    sorted_dispatch = np.clip(remaining, 0, sorted_offers)
+
+    #  offsetting each row makes the flattened cumulative curve monotonic
+    #  so one searchsorted finds the marginal bid of every interval
+    offset = np.arange(num_intervals) * (cumulative[:, -1].max() + 1)
+    marginal = np.searchsorted(
+        (cumulative + offset.reshape(-1, 1)).reshape(-1),
+        demand + offset,
+        side='left'
+    ) - np.arange(num_intervals) * num_participants
+
+    marginal = np.minimum(marginal, num_participants - 1)
+    clearing_prices = sorted_prices[np.arange(num_intervals), marginal]
+
+    #  no demand means nothing is dispatched and there is no clearing price
+    clearing_prices = np.where(demand > 0, clearing_prices, np.nan)
+
+    dispatch = np.empty_like(sorted_dispatch)
+    dispatch[rows, order] = sorted_dispatch
+
+    return clearing_prices, dispatch
 
 
 class Participant():
@@ -75,27 +123,56 @@ class Participant():
             name=self.name
         )
 
-market = [
-    Participant('wind', prices=(0, 10)),
-    Participant('coal', prices=(50, 51))
-]
+    def bids(self, num_intervals):
+        """ random prices and offers for many intervals """
+        prices = np.random.randint(
+            low=self.prices[0], high=self.prices[1], size=num_intervals)
+
+        offers = np.random.randint(
+            low=self.offers[0], high=self.offers[1], size=num_intervals)
+
+        return prices, offers
+
+
+def make_bid_stack(participants, num_intervals):
+    """
+    Collects bids from all participants into arrays
+
+    args
+        participants (list) of Participant objects
+        num_intervals (int)
+
+    returns
+        prices (np.array) shape=(num_intervals, num_participants)
+        offers (np.array) shape=(num_intervals, num_participants)
+    """
+    prices, offers = zip(
+        *[participant.bids(num_intervals) for participant in participants]
+    )
+
+    return np.stack(prices, axis=1), np.stack(offers, axis=1)
 
-bid_stack = [participant.bid() for participant in market]
 
-dispatched_bids = settle_market(bid_stack, demand=25, date='1')
+def summarize_dispatch(participants, clearing_prices, dispatch, index=None):
+    """
+    Tabulates the results of clear_market
 
-#  could do this in settlemarket
-bids = pd.concat(
-    [pd.DataFrame(bid._asdict(), index=[bid.date]) for bid in dispatched_bids],
-    axis=0
-)
+    args
+        participants (list) of Participant objects
+        clearing_prices (np.array) shape=(num_intervals,)
+        dispatch (np.array) shape=(num_intervals, num_participants)
+        index (iterable) optional labels for the intervals i.e. dates
 
-aggs = {
-    'price': np.max,
-    'offer': np.sum,
-    'dispatch': np.sum
-}
+    returns
+        summary (pd.DataFrame)
+    """
+    summary = pd.DataFrame(
+        dispatch,
+        index=index,
+        columns=[participant.name for participant in participants]
+    )
 
-summary = bids.groupby(bids.index).agg(aggs)
+    summary.loc[:, 'dispatch'] = dispatch.sum(axis=1)
+    summary.loc[:, 'price'] = clearing_prices
 
-#  todo carbon
+    return summary
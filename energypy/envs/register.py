@@ -2,30 +2,40 @@
 
 import logging
 
-from energypy.envs.flex import Flex
-from energypy.envs.battery import Battery
-from energypy.envs.gym import CartPoleEnv, PendulumEnv, MountainCarEnv
-
-from energypy.envs.twenty_forty_eight.ep_wrapper import Game2048
+from energypy.common.register import Register
 
 
 logger = logging.getLogger(__name__)
 
-env_register = {
-    'flex': Flex,
-    'battery': Battery,
-    'cartpole-v0': CartPoleEnv,
-    'pendulum-v0': PendulumEnv,
-    'mountaincar-v0': MountainCarEnv,
-    '2048': Game2048
-}
-
-
-def make_env(env_id, **kwargs):
+#  envs are imported on first use - gym is only needed for the gym envs
+env_register = Register({
+    'flex': 'energypy.envs.flex:Flex',
+    'battery': 'energypy.envs.battery:Battery',
+    'cartpole-v0': 'energypy.envs.gym:CartPoleEnv',
+    'pendulum-v0': 'energypy.envs.gym:PendulumEnv',
+    'mountaincar-v0': 'energypy.envs.gym:MountainCarEnv',
+    '2048': 'energypy.envs.twenty_forty_eight.ep_wrapper:Game2048'
+})
+
+
+def make_env(env_id, action_repeat=1, **kwargs):
+    """
+    args
+        env_id (str)
+        action_repeat (int) steps each action is held for - see ActionRepeat
+        kwargs passed to the env
+
+    returns
+        env (object)
+    """
     logger.info('Making env {}'.format(env_id))
 
     [logger.debug('{}: {}'.format(k, v)) for k, v in kwargs.items()]
 
-    env = env_register[str(env_id)]
+    env = env_register[str(env_id)](**kwargs)
+
+    if int(action_repeat) > 1:
+        from energypy.envs.wrappers import ActionRepeat
+        env = ActionRepeat(env, repeat=action_repeat)
 
-    return env(**kwargs)
+    return env
@@ -0,0 +1,140 @@
+"""
+Episode sampling for energypy envs
+
+The EpisodeSampler splits the dataset into non-overlapping episodes and
+visits every episode once per epoch, in a shuffled order.  The next
+episode is sliced, converted to arrays and windowed in a background thread
+while the current episode runs
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def make_windows(num_samples, episode_length):
+    """
+    Splits a dataset into non-overlapping episode windows
+
+    If the dataset isn't a multiple of episode_length the last window is
+    aligned to the end of the data, overlapping the window before it, so
+    that every sample is covered
+
+    args
+        num_samples (int)
+        episode_length (int)
+
+    returns
+        windows (list) of (start, end) tuples
+    """
+    episode_length = min(int(episode_length), num_samples)
+
+    starts = list(range(0, num_samples - episode_length + 1, episode_length))
+
+    if starts[-1] + episode_length < num_samples:
+        starts.append(num_samples - episode_length)
+
+    return [(start, start + episode_length) for start in starts]
+
+
+class EpisodeSampler(object):
+    """
+    Shuffled epochs of non-overlapping episodes
+
+    args
+        state_space (GlobalSpace)
+        observation_space (GlobalSpace)
+        episode_length (int)
+        shuffle (bool) shuffle the order of episodes each epoch
+        prefetch (bool) prepare the next episode in a background thread
+        num_samples (int) only the first num_samples of the data are
+            sampled - defaults to all of the data
+    """
+    def __init__(
+            self,
+            state_space,
+            observation_space,
+            episode_length,
+            shuffle=True,
+            prefetch=True,
+            num_samples=None
+    ):
+        self.state_space = state_space
+        self.observation_space = observation_space
+
+        if num_samples is None:
+            num_samples = state_space.data.shape[0]
+
+        self.windows = make_windows(int(num_samples), episode_length)
+
+        self.shuffle = bool(shuffle)
+        self.schedule = deque()
+        self.epoch = 0
+
+        self.executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        self._next = None
+
+        logger.info('episode sampler with {} episodes per epoch'.format(
+            len(self.windows)))
+
+    def __len__(self):
+        return len(self.windows)
+
+    def next_window(self):
+        """ the next (start, end) - starting a new epoch if needed """
+        if not self.schedule:
+            self.epoch += 1
+
+            if self.shuffle:
+                order = np.random.permutation(len(self.windows))
+            else:
+                order = np.arange(len(self.windows))
+
+            self.schedule.extend(self.windows[idx] for idx in order)
+            logger.debug('starting episode epoch {}'.format(self.epoch))
+
+        return self.schedule.popleft()
+
+    def load(self, window):
+        """ all the work of a reset that doesn't change the spaces """
+        start, end = window
+
+        if self.observation_space.windows:
+            window_values = self.observation_space.make_windows(start, end)
+        else:
+            window_values = None
+
+        return (
+            start,
+            end,
+            self.state_space.prepare_episode(start, end),
+            self.observation_space.prepare_episode(start, end),
+            window_values
+        )
+
+    def next_episode(self):
+        """
+        returns
+            start (int)
+            end (int)
+            state_episode (tuple) (pd.DataFrame, np.array)
+            observation_episode (tuple) (pd.DataFrame, np.array)
+            window_values (list) observation windows or None
+        """
+        if not self.executor:
+            return self.load(self.next_window())
+
+        if self._next is None:
+            self._next = self.executor.submit(self.load, self.next_window())
+
+        episode = self._next.result()
+
+        #  windows are chosen in this thread so that seeding is repeatable
+        self._next = self.executor.submit(self.load, self.next_window())
+
+        return episode
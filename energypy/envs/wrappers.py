@@ -0,0 +1,75 @@
+""" wrappers that change how an agent interacts with an env """
+
+import logging
+
+import numpy as np
+
+from energypy.envs.env import BaseEnv
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActionRepeat(object):
+    """
+    Holds each action for repeat steps of the wrapped env
+
+    The rewards of the repeated steps are summed, so an agent making 15
+    minute decisions on a 5 minute env sees a third of the steps.  Stepping
+    stops early at the end of an episode.  Everything other than step is
+    passed through to the wrapped env
+
+    args
+        env (object) an energypy env
+        repeat (int) steps each action is held for
+    """
+    def __init__(self, env, repeat=3):
+        self.env = env
+        self.repeat = int(repeat)
+
+        if self.repeat < 1:
+            raise ValueError('repeat of {} - must be at least 1'.format(
+                self.repeat))
+
+        #  BaseEnv checks the action once and then runs _step directly
+        if isinstance(env, BaseEnv):
+            self._repeat_step = env._step
+        else:
+            self._repeat_step = env.step
+
+        logger.info('repeating actions for {} steps of {}'.format(
+            self.repeat, repr(env)))
+
+    def __repr__(self):
+        return '<ActionRepeat {} {}>'.format(self.repeat, repr(self.env))
+
+    def __getattr__(self, name):
+        #  only called for attributes not found on the wrapper
+        if name == 'env':
+            raise AttributeError(name)
+
+        return getattr(self.env, name)
+
+    def step(self, action):
+        """
+        args
+            action (np.array)
+
+        returns
+            observation (np.array) after the last repeated step
+            reward (float) summed over the repeated steps
+            done (bool)
+            info (dict)
+        """
+        observation, reward, done, info = self.env.step(action)
+        total_reward = reward
+
+        action = np.array(action).reshape(1, *self.env.action_space.shape)
+
+        repeats = 1
+        while not done and repeats < self.repeat:
+            observation, reward, done, info = self._repeat_step(action)
+            total_reward += reward
+            repeats += 1
+
+        return observation, total_reward, done, info
@@ -1,9 +1,15 @@
-from energypy.experiments.analysis import process_episode, process_experiment
+from energypy.common.register import lazy
+
 from energypy.experiments.env_info import save_env_info, process_env_info
-from energypy.experiments.runner import Runner
 from energypy.experiments.utils import make_paths, make_config_parser
-from energypy.experiments.experiment import experiment
-from energypy.experiments.plotting import plot_battery_episode
-from energypy.experiments.plotting import plot_flex_episode
-from energypy.experiments.plotting import plot_time_series
 from energypy.experiments.load_dataset import load_dataset
+from energypy.experiments.chunked_dataset import ChunkedDataset
+from energypy.experiments.chunked_dataset import write_chunked_dataset
+from energypy.experiments.runner import Runner
+
+#  tensorflow & matplotlib are imported on first call
+process_episode = lazy('energypy.experiments.analysis:process_episode')
+process_experiment = lazy('energypy.experiments.analysis:process_experiment')
+plot_battery_episode = lazy('energypy.experiments.plotting:plot_battery_episode')
+plot_flex_episode = lazy('energypy.experiments.plotting:plot_flex_episode')
+plot_time_series = lazy('energypy.experiments.plotting:plot_time_series')
@@ -0,0 +1,435 @@
+"""
+Asynchronous actors and a learner sharing a replay memory
+
+    actor processes                          learner (this process)
+        env.step()                               DQN.learn()
+        NumpyPolicy (epsilon greedy)  <------    SharedWeights.publish()
+        SharedReplay.remember_batch() ------>    SharedReplay.get_batch()
+
+Actors are spawned processes that only use numpy - tensorflow is never
+imported in an actor.  Spawned processes re-import the __main__ module of
+the launcher, so the launcher must not import tensorflow at the top level
+(experiment.py only imports it under __main__).  Each actor steps its own
+env, acting with a copy of the online network that is refreshed whenever
+the learner publishes new weights.  Transitions are pushed in small
+batches into a replay memory held in shared memory, which the learner
+samples from continuously
+"""
+
+import logging
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+
+from energypy.common.parallel import allocate_cpus, available_cpus, pin_cpus
+
+
+logger = logging.getLogger(__name__)
+
+#  spawn so that actors start without the tensorflow runtime of the learner
+context = multiprocessing.get_context('spawn')
+
+
+def shared_array(shape, dtype=np.float64):
+    """ a zeroed array in shared memory - returns the raw buffer """
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return context.RawArray('b', size)
+
+
+def as_array(raw, shape, dtype=np.float64):
+    """ a numpy view of a buffer made by shared_array """
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+class SharedReplay(object):
+    """
+    Experience replay memory in shared memory
+
+    Many actor processes write, the learner samples.  Has the parts of the
+    memory api used by DQN so it can replace agent.memory
+
+    args
+        obs_shape (tuple)
+        action_shape (tuple)
+        size (int)
+    """
+    def __init__(self, obs_shape, action_shape, size=10000):
+        self.type = 'shared'
+        self.size = int(size)
+
+        self.shapes = {
+            'observation': (self.size, *obs_shape),
+            'action': (self.size, *action_shape),
+            'reward': (self.size, 1),
+            'next_observation': (self.size, *obs_shape),
+            'done': (self.size, 1)
+        }
+
+        self.dtypes = {key: np.float64 for key in self.shapes}
+        self.dtypes['done'] = np.bool_
+
+        self.raw = {
+            key: shared_array(shape, self.dtypes[key])
+            for key, shape in self.shapes.items()
+        }
+
+        self._count = context.Value('q', 0, lock=False)
+        self.lock = context.Lock()
+
+        self._arrays = None
+
+    def __repr__(self):
+        return '<class SharedReplay size={}>'.format(self.size)
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def __getstate__(self):
+        #  numpy views are remade in each process
+        state = dict(self.__dict__)
+        state['_arrays'] = None
+        return state
+
+    @property
+    def count(self):
+        return self._count.value
+
+    @property
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = {
+                key: as_array(raw, self.shapes[key], self.dtypes[key])
+                for key, raw in self.raw.items()
+            }
+
+        return self._arrays
+
+    def remember_batch(self, batch):
+        """
+        args
+            batch (dict) of np.arrays with the samples as the first dimension
+        """
+        num = len(batch['reward'])
+
+        with self.lock:
+            positions = (self.count + np.arange(num)) % self.size
+
+            for key, array in self.arrays.items():
+                array[positions] = np.array(batch[key]).reshape(
+                    num, *self.shapes[key][1:])
+
+            self._count.value += num
+
+    def remember(self, observation, action, reward, next_observation, done):
+        self.remember_batch({
+            'observation': [observation],
+            'action': [action],
+            'reward': [reward],
+            'next_observation': [next_observation],
+            'done': [done]
+        })
+
+    def get_batch(self, batch_size):
+        """ randomly samples a batch """
+        with self.lock:
+            sample_size = min(batch_size, len(self))
+            indicies = np.random.randint(len(self), size=sample_size)
+
+            return {key: array[indicies] for key, array in self.arrays.items()}
+
+
+class SharedWeights(object):
+    """
+    Network weights in shared memory with a version number
+
+    args
+        names (list) of variable names
+        shapes (list) of variable shapes
+    """
+    def __init__(self, names, shapes):
+        self.names = list(names)
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.sizes = [int(np.prod(shape)) for shape in self.shapes]
+
+        self.raw = shared_array((sum(self.sizes),), np.float32)
+        self._version = context.Value('q', 0, lock=False)
+        self._learn_step = context.Value('q', 0, lock=False)
+        self.lock = context.Lock()
+
+    @property
+    def version(self):
+        return self._version.value
+
+    @property
+    def learn_step(self):
+        return self._learn_step.value
+
+    def publish(self, values, learn_step=0):
+        """
+        args
+            values (list) of np.arrays in the order of self.names
+            learn_step (int) used by the actors for epsilon decay
+        """
+        flat = np.concatenate(
+            [np.asarray(value, dtype=np.float32).reshape(-1)
+             for value in values])
+
+        with self.lock:
+            as_array(self.raw, flat.shape, np.float32)[:] = flat
+            self._learn_step.value = int(learn_step)
+            self._version.value += 1
+
+    def read(self):
+        """
+        returns
+            params (dict) {name: np.array}
+            version (int)
+            learn_step (int)
+        """
+        with self.lock:
+            flat = np.array(as_array(self.raw, (sum(self.sizes),), np.float32))
+            version, learn_step = self.version, self.learn_step
+
+        values = np.split(flat, np.cumsum(self.sizes)[:-1])
+
+        params = {
+            name: value.reshape(shape) for name, value, shape
+            in zip(self.names, values, self.shapes)
+        }
+
+        return params, version, learn_step
+
+
+def epsilon_schedule(learn_step, decay_steps, initial_epsilon, final_epsilon):
+    """ linear decay - same as the tf.train.polynomial_decay used by DQN """
+    fraction = min(learn_step / max(decay_steps, 1), 1.0)
+    return initial_epsilon + (final_epsilon - initial_epsilon) * fraction
+
+
+def run_actor(
+        actor_id,
+        env_config,
+        policy_path,
+        replay,
+        weights,
+        stop,
+        rewards,
+        decay_steps,
+        initial_epsilon=1.0,
+        final_epsilon=0.05,
+        min_reward=-10,
+        max_reward=10,
+        push_every=32,
+        cpus=None,
+        seed=None
+):
+    """
+    Steps an env with an epsilon greedy numpy policy until stopped
+
+    args
+        actor_id (int)
+        env_config (dict) kwargs for make_env
+        policy_path (str) .npz made by DQN.export
+        replay (SharedReplay)
+        weights (SharedWeights)
+        stop (multiprocessing.Event)
+        rewards (multiprocessing.Queue) the rewards of each episode
+        decay_steps (int) learn steps to decay epsilon over
+        push_every (int) transitions are pushed to the replay in batches
+        cpus (list) the actor is pinned to these cpus
+    """
+    pin_cpus(cpus)
+
+    import energypy
+    from energypy.agents.numpy_policy import NumpyPolicy
+
+    env = energypy.make_env(**env_config)
+    env.seed(seed)
+
+    policy = NumpyPolicy(policy_path)
+    num_actions = policy.discrete_actions.shape[0]
+    version, learn_step = -1, 0
+
+    fields = ['observation', 'action', 'reward', 'next_observation', 'done']
+    transitions = {field: [] for field in fields}
+
+    observation = env.reset()
+    episode_rewards = []
+
+    while not stop.is_set():
+        if weights.version != version:
+            params, version, learn_step = weights.read()
+            policy.update(params)
+
+        epsilon = epsilon_schedule(
+            learn_step, decay_steps, initial_epsilon, final_epsilon)
+
+        if np.random.rand() < epsilon:
+            index = np.random.randint(num_actions)
+        else:
+            index = np.argmax(policy.q_values(observation), axis=1)[0]
+
+        action = policy.discrete_actions[index].reshape(
+            1, *policy.action_shape)
+
+        next_observation, reward, done, info = env.step(action)
+        episode_rewards.append(float(np.squeeze(reward)))
+
+        clipped = max(min_reward, min(float(np.squeeze(reward)), max_reward))
+
+        for field, value in zip(
+                fields,
+                [observation, action, clipped, next_observation, done]):
+            transitions[field].append(value)
+
+        if len(transitions['reward']) >= push_every or done:
+            replay.remember_batch(transitions)
+            transitions = {field: [] for field in fields}
+
+        observation = next_observation
+
+        if done:
+            rewards.put((actor_id, episode_rewards))
+            episode_rewards = []
+            observation = env.reset()
+
+
+def actor_learner(
+        agent,
+        env_config,
+        runner,
+        total_steps,
+        policy_path,
+        num_actors=4,
+        sync_every=100,
+        learn_start=10000,
+        push_every=32,
+        learner_cpus=None,
+        seed=None
+):
+    """
+    Trains an agent from experience collected by actor processes
+
+    The agent's memory is replaced by a SharedReplay of the same size -
+    agents with a graph_memory are not supported, as the actors write to
+    the shared replay while the learner would be copying it into the graph
+
+    args
+        agent (DQN)
+        env_config (dict) kwargs for make_env
+        runner (Runner) records the episode rewards of all actors
+        total_steps (int) env steps summed over all actors
+        policy_path (str) where the initial policy is exported for actors
+        num_actors (int)
+        sync_every (int) learn steps between publishing weights
+        learn_start (int) experience needed before learning starts
+        learner_cpus (list) cpus of the learner - actors are spread over
+            the other cpus
+
+    returns
+        agent (DQN)
+        runner (Runner)
+    """
+    from energypy.common.tf_utils import get_tf_params
+
+    if getattr(agent, 'graph_memory', False):
+        raise ValueError(
+            'graph_memory is not supported with actors - sample the '
+            'shared replay with graph_memory=False')
+
+    replay = SharedReplay(
+        agent.observation_space.shape,
+        agent.action_space.shape,
+        size=agent.memory.size
+    )
+    agent.memory = replay
+
+    params = get_tf_params('online')
+    weights = SharedWeights(
+        [param.name.split(':')[0] for param in params],
+        [param.get_shape().as_list() for param in params]
+    )
+
+    def publish():
+        weights.publish(agent.sess.run(params), agent.learn_step)
+
+    agent.export(policy_path)
+    publish()
+
+    stop = context.Event()
+    rewards = context.Queue()
+
+    learner_cpus = learner_cpus or []
+    actor_cpus = [cpu for cpu in available_cpus() if cpu not in learner_cpus]
+    actor_cpus = allocate_cpus(num_actors, actor_cpus or available_cpus())
+
+    actors = [
+        context.Process(
+            target=run_actor,
+            kwargs={
+                'actor_id': actor_id,
+                'env_config': env_config,
+                'policy_path': policy_path,
+                'replay': replay,
+                'weights': weights,
+                'stop': stop,
+                'rewards': rewards,
+                'decay_steps': (
+                    agent.total_steps * agent.epsilon_decay_fraction),
+                'initial_epsilon': agent.initial_epsilon,
+                'final_epsilon': agent.final_epsilon,
+                'min_reward': agent.min_reward,
+                'max_reward': agent.max_reward,
+                'push_every': push_every,
+                'cpus': actor_cpus[actor_id],
+                'seed': seed + actor_id if seed is not None else None
+            },
+            daemon=True
+        )
+        for actor_id in range(int(num_actors))
+    ]
+
+    for actor in actors:
+        actor.start()
+
+    logger.info('started {} actors'.format(len(actors)))
+
+    try:
+        while replay.count < int(total_steps):
+            if len(replay) >= min(replay.size, int(learn_start)):
+                agent.learn()
+
+                if agent.learn_step % int(sync_every) == 0:
+                    publish()
+
+            else:
+                time.sleep(0.01)
+
+            while True:
+                try:
+                    actor_id, episode_rewards = rewards.get_nowait()
+                except queue.Empty:
+                    break
+
+                for reward in episode_rewards:
+                    runner.record_step(reward)
+                runner.record_episode()
+
+            if not any(actor.is_alive() for actor in actors):
+                raise ValueError('all actors have stopped')
+
+    finally:
+        stop.set()
+
+        for actor in actors:
+            actor.join(timeout=10)
+
+            if actor.is_alive():
+                actor.terminate()
+
+    logger.info('actor learner finished - {} env steps {} learn steps'.format(
+        replay.count, agent.learn_step))
+
+    return agent, runner
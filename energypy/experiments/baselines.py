@@ -0,0 +1,192 @@
+"""
+Baseline policies over a whole dataset without an agent or a tf.Session
+
+The dataset is split into non-overlapping episodes.  Each baseline makes
+the full schedule of actions for an episode in one array operation and the
+schedule is run with env.simulate - no stepping, no memory, no summaries
+
+    no_op - the action space no_op every step
+    random - uniform samples of the action space
+    price_rule - Battery only - charges at full power when the price is
+        below the charge percentile of the dataset prices and discharges
+        at full power above the discharge percentile
+
+Baselines that don't apply to an env (i.e. price_rule for Flex) are skipped
+
+Episode rewards are saved to results/expt_name/baseline_name in the same
+format as a normal run
+
+    $ python baselines.py expt_name
+"""
+
+from collections import OrderedDict
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import energypy
+from energypy.common.utils import parse_ini
+from energypy.envs.battery import Battery
+from energypy.envs.sampler import make_windows
+from energypy.experiments.utils import make_paths
+
+
+logger = logging.getLogger(__name__)
+
+price_col = 'C_electricity_price [$/MWh]'
+
+
+def no_op_policy(env):
+    """ schedule of no_op actions for the current episode """
+    num_steps = env.state_space.episode.shape[0]
+
+    return np.repeat(
+        np.array(env.action_space.no_op).reshape(1, -1), num_steps, axis=0)
+
+
+def random_policy(env):
+    """ schedule of random actions for the current episode """
+    return env.action_space.sample(env.state_space.episode.shape[0])
+
+
+def make_price_rule(charge_percentile=25, discharge_percentile=75):
+    """
+    A policy that stores energy when it is cheap and releases it when it is
+    expensive
+
+    Only for Battery, where the top & bottom of the signed action space are
+    full power charge & discharge.  Percentiles are of the prices of the
+    whole dataset
+
+    args
+        charge_percentile (float) use action_space.high below this price
+        discharge_percentile (float) use action_space.low above this price
+
+    returns
+        policy (callable) env -> schedule of actions
+    """
+    def price_rule(env):
+        prices = env.state_space.data.loc[:, price_col].values
+        low, high = np.percentile(
+            prices, [charge_percentile, discharge_percentile])
+
+        episode = env.state_space.episode.loc[:, price_col].values
+
+        actions = np.select(
+            [episode < low, episode > high],
+            [env.action_space.high[0], env.action_space.low[0]],
+            default=0
+        )
+
+        return actions.reshape(-1, 1)
+
+    #  the envs whose actions the rule understands - see supports
+    price_rule.envs = (Battery, )
+
+    return price_rule
+
+
+def supports(policy, env):
+    """ baselines without an envs attribute work for any env """
+    envs = getattr(policy, 'envs', None)
+
+    return envs is None or isinstance(env, envs)
+
+
+baselines = {
+    'no_op': no_op_policy,
+    'random': random_policy,
+    'price_rule': make_price_rule()
+}
+
+
+def evaluate_baselines(env, policies=None, seed=None):
+    """
+    Runs each baseline over every episode of the dataset
+
+    args
+        env (energypy env) must support simulate
+        policies (dict) {name: policy} defaults to all the baselines
+        seed (int) for the random baseline
+
+    returns
+        rewards (pd.DataFrame) one row per episode, one column per policy
+    """
+    policies = policies or baselines
+
+    supported = OrderedDict()
+    for name, policy in policies.items():
+        if supports(policy, env):
+            supported[name] = policy
+        else:
+            logger.info('skipping {} baseline - not supported by {}'.format(
+                name, repr(env)))
+
+    policies = supported
+
+    if seed:
+        np.random.seed(int(seed))
+
+    episodes = make_windows(env.state_space.data.shape[0], env.episode_length)
+
+    rewards = {name: [] for name in policies}
+
+    for episode in episodes:
+        env.reset(episode=episode)
+
+        for name, policy in policies.items():
+            outputs = env.simulate(policy(env))
+            rewards[name].append(outputs['reward'].sum())
+
+    rewards = pd.DataFrame(rewards, columns=list(policies.keys()))
+
+    logger.info('baselines over {} episodes - {}'.format(
+        len(episodes), ' '.join(
+            ['{} {:0.2f}'.format(name, reward)
+             for name, reward in rewards.mean().items()])))
+
+    return rewards
+
+
+def save_baselines(rewards, experiments_dir, expt_name):
+    """
+    Saves the episode rewards of each baseline as a run of the experiment
+
+    args
+        rewards (pd.DataFrame) made by evaluate_baselines
+        experiments_dir (str)
+        expt_name (str)
+    """
+    for name in rewards.columns:
+        paths = make_paths(
+            experiments_dir, expt_name, name, load_configs=False)
+
+        #  same format as Runner.record_episode
+        pd.DataFrame(
+            rewards.loc[:, name].values.reshape(-1, 1)
+        ).to_csv(paths['ep_rewards'])
+
+        logger.info('saved {} episode rewards to {}'.format(
+            name, paths['ep_rewards']))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='energypy baselines')
+    parser.add_argument('expt_name', type=str)
+    parser.add_argument('--seed', default=None, type=int)
+    args = parser.parse_args()
+
+    experiments_dir = os.getcwd()
+
+    env_config = parse_ini(
+        os.path.join(experiments_dir, 'configs', args.expt_name, 'expt.ini'),
+        'env')
+
+    rewards = evaluate_baselines(
+        energypy.make_env(**env_config), seed=args.seed)
+
+    save_baselines(rewards, experiments_dir, args.expt_name)
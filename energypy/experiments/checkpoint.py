@@ -0,0 +1,109 @@
+"""
+Checkpoints for resuming an experiment
+
+    run_name/checkpoint/variables-*       all tf variables (online, target
+                                          and optimizer)
+                        memory/           incremental replay memory
+                        state.pkl         steps, memory count, reward
+                                          history and random states
+
+Checkpoints are made at the end of an episode.  The memory is saved
+incrementally so the cost of a checkpoint (and of resuming) depends on the
+size of the memory, not the length of the run
+"""
+
+import logging
+import os
+from os.path import join
+import random
+
+import numpy as np
+import tensorflow as tf
+
+from energypy.common.utils import dump_pickle, ensure_dir, load_pickle
+
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint(object):
+    """
+    Saves and restores the state of an experiment
+
+    Must be made after the agent so that its variables exist
+
+    args
+        sess (tf.Session)
+        path (str) checkpoint folder
+    """
+    def __init__(self, sess, path):
+        self.sess = sess
+        self.path = str(path)
+        ensure_dir(join(self.path, 'state.pkl'))
+
+        self.saver = tf.train.Saver(tf.global_variables(), max_to_keep=2)
+
+    def __repr__(self):
+        return '<Checkpoint {}>'.format(self.path)
+
+    def exists(self):
+        return os.path.exists(join(self.path, 'state.pkl'))
+
+    def save(self, agent, runner, step, episode):
+        """
+        args
+            agent (energypy agent)
+            runner (Runner)
+            step (int) steps taken in the experiment
+            episode (int) episodes finished in the experiment
+        """
+        #  variables & memory first - state.pkl marks a complete checkpoint
+        self.saver.save(
+            self.sess, join(self.path, 'variables'), global_step=step)
+
+        memory_count = agent.memory.save_checkpoint(
+            join(self.path, 'memory'))
+
+        dump_pickle({
+            'step': step,
+            'episode': episode,
+            'act_step': agent.act_step,
+            'learn_step': agent.learn_step,
+            'memory_count': memory_count,
+            'episode_rewards': runner.episode_rewards,
+            'runner_step': runner.step,
+            'random_state': random.getstate(),
+            'np_random_state': np.random.get_state(),
+        }, join(self.path, 'state.pkl'))
+
+        logger.info('checkpoint at step {} episode {}'.format(step, episode))
+
+    def restore(self, agent, runner):
+        """
+        returns
+            step (int)
+            episode (int)
+        """
+        state = load_pickle(join(self.path, 'state.pkl'))
+
+        #  the variables saved with this state - a newer save may be partial
+        self.saver.restore(
+            self.sess, join(self.path, 'variables-{}'.format(state['step'])))
+
+        #  experience saved after this state is dropped
+        agent.memory.load_checkpoint(
+            join(self.path, 'memory'), count=state['memory_count'])
+
+        agent.act_step = state['act_step']
+        agent.learn_step = state['learn_step']
+
+        runner.episode_rewards = state['episode_rewards']
+        runner.step = state['runner_step']
+
+        random.setstate(state['random_state'])
+        np.random.set_state(state['np_random_state'])
+
+        logger.info('resumed from step {} episode {}'.format(
+            state['step'], state['episode']))
+
+        return state['step'], state['episode']
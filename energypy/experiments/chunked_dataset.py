@@ -0,0 +1,277 @@
+"""
+Chunked datasets that are read lazily from disk
+
+A chunked dataset is a folder per space (i.e. state or observation)
+
+    dataset/state/meta.json
+                  stats.json         cached normalization statistics
+                  values_00000.npy   (chunk_length, num_columns) float64
+                  index_00000.npy    (chunk_length,) int64 nanoseconds
+                  values_00001.npy
+                  ...
+
+Chunks are memory mapped so only the rows of a requested episode are
+read from disk.  Statistics (count, mean, std, min, max) are computed in
+a single streaming pass over the chunks and cached to stats.json
+"""
+
+import json
+import logging
+import os
+from os.path import join
+
+import numpy as np
+import pandas as pd
+
+from energypy.common.utils import ensure_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_chunked_dataset(dataset, name):
+    """ checks for a chunked dataset at dataset/name/meta.json """
+    return os.path.exists(join(str(dataset), name, 'meta.json'))
+
+
+def write_chunked_dataset(chunks, dataset, name):
+    """
+    Writes an iterable of dataframes as a chunked dataset
+
+    Chunks are written one at a time - use pd.read_csv(chunksize=n) to
+    convert a csv that doesn't fit in memory
+
+    args
+        chunks (iterable) of pd.DataFrames with a DatetimeIndex
+        dataset (str) path to the dataset folder
+        name (str) i.e. state or observation
+
+    returns
+        meta (dict)
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    path = join(dataset, name)
+    ensure_dir(join(path, 'meta.json'))
+
+    meta = {'columns': None, 'lengths': []}
+
+    for num, chunk in enumerate(chunks):
+        if meta['columns'] is None:
+            meta['columns'] = [str(col) for col in chunk.columns]
+
+        assert meta['columns'] == [str(col) for col in chunk.columns]
+
+        np.save(
+            join(path, 'values_{:05d}.npy'.format(num)),
+            chunk.values.astype(np.float64)
+        )
+
+        np.save(
+            join(path, 'index_{:05d}.npy'.format(num)),
+            pd.DatetimeIndex(chunk.index).values.astype(np.int64)
+        )
+
+        meta['lengths'].append(int(chunk.shape[0]))
+
+    with open(join(path, 'meta.json'), 'w') as outfile:
+        json.dump(meta, outfile)
+
+    #  any cached statistics are for the old data
+    if os.path.exists(join(path, 'stats.json')):
+        os.remove(join(path, 'stats.json'))
+
+    logger.info('wrote {} chunks of {} to {}'.format(
+        len(meta['lengths']), name, path))
+
+    return meta
+
+
+def combine_statistics(a, b):
+    """
+    Combines the statistics of two chunks
+
+    Chan et. al (1979) parallel variance algorithm
+
+    args
+        a (dict) count, mean, m2, min, max
+        b (dict) count, mean, m2, min, max
+
+    returns
+        combined (dict)
+    """
+    if a is None:
+        return b
+
+    count = a['count'] + b['count']
+    delta = b['mean'] - a['mean']
+
+    return {
+        'count': count,
+        'mean': a['mean'] + delta * b['count'] / count,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+        'min': np.minimum(a['min'], b['min']),
+        'max': np.maximum(a['max'], b['max'])
+    }
+
+
+class ChunkedDataset(object):
+    """
+    A dataset stored as memory mapped chunks
+
+    Supports the parts of the DataFrame api used by GlobalSpace - columns,
+    shape, min() and max() - plus window() to materialize an episode
+
+    args
+        dataset (str) path to the dataset folder
+        name (str) i.e. state or observation
+        normalize (bool) scale columns to zero mean and unit variance
+    """
+    def __init__(self, dataset, name, normalize=False):
+        self.path = join(str(dataset), name)
+        self.name = name
+        self.normalize = bool(normalize)
+
+        with open(join(self.path, 'meta.json'), 'r') as infile:
+            self.meta = json.load(infile)
+
+        self.columns = pd.Index(self.meta['columns'])
+        self.lengths = np.array(self.meta['lengths'], dtype=np.int64)
+
+        #  offsets[n] is the row where chunk n starts
+        self.offsets = np.concatenate([[0], np.cumsum(self.lengths)])
+
+        self._stats = None
+
+    def __repr__(self):
+        return '<ChunkedDataset {} chunks={} shape={}>'.format(
+            self.path, len(self.lengths), self.shape)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self):
+        return (len(self), len(self.columns))
+
+    def load_chunk(self, num):
+        """ memory maps a single chunk - nothing is read until sliced """
+        values = np.load(
+            join(self.path, 'values_{:05d}.npy'.format(num)), mmap_mode='r')
+        index = np.load(
+            join(self.path, 'index_{:05d}.npy'.format(num)), mmap_mode='r')
+
+        return values, index
+
+    def statistics(self):
+        """
+        Column statistics from a single pass over the chunks
+
+        Cached in memory and in stats.json next to the chunks
+
+        returns
+            stats (dict) count, mean, std, min, max
+        """
+        if self._stats:
+            return self._stats
+
+        stats_path = join(self.path, 'stats.json')
+
+        if os.path.exists(stats_path):
+            with open(stats_path, 'r') as infile:
+                stats = json.load(infile)
+
+        else:
+            logger.info('calculating statistics for {}'.format(self.path))
+            combined = None
+
+            for num in range(len(self.lengths)):
+                values, _ = self.load_chunk(num)
+                values = np.array(values)
+
+                mean = values.mean(axis=0)
+                combined = combine_statistics(combined, {
+                    'count': values.shape[0],
+                    'mean': mean,
+                    'm2': ((values - mean) ** 2).sum(axis=0),
+                    'min': values.min(axis=0),
+                    'max': values.max(axis=0)
+                })
+
+            stats = {
+                'count': int(combined['count']),
+                'mean': combined['mean'].tolist(),
+                'std': np.sqrt(combined['m2'] / combined['count']).tolist(),
+                'min': combined['min'].tolist(),
+                'max': combined['max'].tolist()
+            }
+
+            with open(stats_path, 'w') as outfile:
+                json.dump(stats, outfile)
+
+        stats = {k: np.array(v) for k, v in stats.items()}
+
+        #  constant columns are left unscaled - same as standardize()
+        stats['scale'] = np.where(stats['std'] == 0, 1.0, stats['std'])
+
+        self._stats = stats
+        return self._stats
+
+    def scale(self, values):
+        if not self.normalize:
+            return values
+
+        stats = self.statistics()
+        return (values - stats['mean']) / stats['scale']
+
+    def min(self):
+        return pd.Series(
+            self.scale(self.statistics()['min']), index=self.columns)
+
+    def max(self):
+        return pd.Series(
+            self.scale(self.statistics()['max']), index=self.columns)
+
+    def window(self, start, end):
+        """
+        Materializes rows start to end as a DataFrame
+
+        Only the chunks that overlap the window are read
+
+        args
+            start (int)
+            end (int) exclusive
+
+        returns
+            episode (pd.DataFrame)
+        """
+        start, end = max(int(start), 0), min(int(end), len(self))
+
+        first = np.searchsorted(self.offsets, start, side='right') - 1
+        last = np.searchsorted(self.offsets, end, side='left')
+
+        values, index = [], []
+        for num in range(first, last):
+            chunk_values, chunk_index = self.load_chunk(num)
+            offset = self.offsets[num]
+
+            lo = max(start - offset, 0)
+            hi = min(end - offset, self.lengths[num])
+
+            values.append(np.array(chunk_values[lo:hi]))
+            index.append(np.array(chunk_index[lo:hi]))
+
+        if values:
+            values = np.concatenate(values)
+            index = np.concatenate(index)
+
+        else:
+            values = np.empty((0, len(self.columns)))
+            index = np.empty((0,), dtype=np.int64)
+
+        return pd.DataFrame(
+            self.scale(values),
+            index=pd.to_datetime(index),
+            columns=self.columns
+        )
@@ -64,8 +64,14 @@ def process_env_info(env, info):
         if isinstance(info[0], np.ndarray):
             df = pd.DataFrame(np.array(info).reshape(len(info), -1))
 
+            #  2D observations don't have a label per column
+            if key in ['observation', 'next_observation'] and \
+                    df.shape[1] != len(observation_info):
+                df.columns = ['{}_{}'.format(key, n)
+                              for n in range(df.shape[1])]
+
             #  there must be a better way! TODO
-            if key == 'observation' and observation_info:
+            elif key == 'observation' and observation_info:
                 df.columns = ['{}_{}'.format(key, o)
                               for o in observation_info]
 
@@ -0,0 +1,232 @@
+"""
+Greedy evaluation of a frozen policy on held out episodes
+
+The held out episodes are the last test_steps of the dataset, split into
+non-overlapping episodes - the training env is kept off them with
+env.hold_out(test_steps).  The policy is frozen by exporting it to a .npz
+(DQN.export) and each episode is rolled out greedily with a NumpyPolicy in
+a pool of worker processes.  Rewards are compared with a no-op policy on
+the same episodes - regret is the no-op reward minus the policy reward
+"""
+
+import logging
+import multiprocessing
+import queue
+
+import numpy as np
+
+import energypy
+from energypy.common.parallel import allocate_cpus, pin_cpus
+from energypy.envs.sampler import make_windows
+
+
+logger = logging.getLogger(__name__)
+
+
+def rollout(env, act, episode):
+    """
+    Runs a single episode
+
+    args
+        env (energypy env)
+        act (callable) observation -> action
+        episode (tuple) (start, end)
+
+    returns
+        total_reward (float)
+    """
+    observation = env.reset(episode=episode)
+    done, total_reward = False, 0.0
+
+    while not done:
+        observation, reward, done, _ = env.step(act(observation))
+        total_reward += float(np.sum(reward))
+
+    return total_reward
+
+
+#  envs of this process, reused by every evaluation
+_envs = {}
+
+
+def worker_env(env_config):
+    """ an env for env_config, made once per process """
+    key = repr(sorted(env_config.items()))
+
+    if key not in _envs:
+        _envs[key] = energypy.make_env(**env_config)
+
+    return _envs[key]
+
+
+def init_worker(blocks):
+    """
+    Pins each pool worker to its own block of cpus
+
+    A worker that replaces one that died finds the blocks all taken - it
+    is left on the cpus of the launcher rather than waiting forever
+    """
+    try:
+        pin_cpus(blocks.get_nowait())
+
+    except queue.Empty:
+        logger.debug('no cpu block left for worker - not pinning')
+
+
+def evaluate_episodes(
+        env_config,
+        policy_path,
+        episodes,
+        no_op=False,
+        cpus=None
+):
+    """
+    Greedy rollouts of an exported policy - run in a worker process
+
+    args
+        env_config (dict) kwargs for make_env
+        policy_path (str) .npz made by DQN.export
+        episodes (list) of (start, end)
+        no_op (bool) also roll out the no-op policy
+        cpus (list) the worker is pinned to these cpus
+
+    returns
+        rewards (list) of (policy_reward, no_op_reward) - no_op_reward is
+            None unless no_op=True
+    """
+    from energypy.agents.numpy_policy import NumpyPolicy
+
+    pin_cpus(cpus)
+
+    env = worker_env(env_config)
+    policy = NumpyPolicy(policy_path)
+
+    rewards = []
+    for episode in episodes:
+        reward = rollout(env, policy.act, episode)
+
+        no_op_reward = rollout(
+            env, lambda obs: env.action_space.no_op, episode
+        ) if no_op else None
+
+        rewards.append((reward, no_op_reward))
+
+    return rewards
+
+
+class Evaluator(object):
+    """
+    Periodic greedy evaluation on a fixed set of held out episodes
+
+    args
+        env_config (dict) kwargs for make_env
+        test_steps (int) the last test_steps of the dataset are held out
+        policy_path (str) where the frozen policy is exported
+        num_workers (int) processes that roll out episodes - the pool is
+            started on the first evaluation and reused until close()
+        cpus (list) the workers are spread over these cpus - defaults to
+            all the cpus available
+    """
+    def __init__(
+            self,
+            env_config,
+            test_steps,
+            policy_path,
+            num_workers=4,
+            cpus=None
+    ):
+        self.env_config = dict(env_config)
+        self.policy_path = str(policy_path)
+        self.num_workers = int(num_workers)
+        self.cpus = cpus
+
+        env = energypy.make_env(**self.env_config)
+        num_samples = env.state_space.data.shape[0]
+        test_steps = min(int(test_steps), num_samples)
+
+        offset = num_samples - test_steps
+        self.episodes = [
+            (offset + start, offset + end) for start, end
+            in make_windows(test_steps, env.episode_length)
+        ]
+
+        self.chunks = [
+            chunk.tolist() for chunk in np.array_split(
+                np.array(self.episodes),
+                min(self.num_workers, len(self.episodes)))
+        ]
+        self.pool = None
+
+        #  no-op rewards don't change so are only calculated once
+        self.no_op_rewards = None
+
+        logger.info('evaluating on {} held out episodes of {} steps'.format(
+            len(self.episodes), test_steps))
+
+    def __repr__(self):
+        return '<Evaluator {} episodes>'.format(len(self.episodes))
+
+    def start_pool(self):
+        """ the worker pool - each worker is pinned to a block of cpus """
+        if self.pool is None:
+            #  spawn so workers start without the tensorflow runtime
+            context = multiprocessing.get_context('spawn')
+
+            blocks = context.Queue()
+            for block in allocate_cpus(len(self.chunks), self.cpus):
+                blocks.put(block)
+
+            self.pool = context.Pool(
+                len(self.chunks), initializer=init_worker, initargs=(blocks,))
+
+        return self.pool
+
+    def close(self):
+        """ stops the worker pool """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def evaluate(self, agent):
+        """
+        Freezes the agent's policy and evaluates it
+
+        args
+            agent (DQN) must have export()
+
+        returns
+            summary (dict) mean_reward, mean_no_op_reward and mean_regret
+        """
+        agent.export(self.policy_path)
+
+        no_op = self.no_op_rewards is None
+
+        if self.num_workers > 1:
+            args = [(self.env_config, self.policy_path, chunk, no_op)
+                    for chunk in self.chunks]
+            results = self.start_pool().starmap(evaluate_episodes, args)
+
+        else:
+            results = [
+                evaluate_episodes(
+                    self.env_config, self.policy_path, chunk, no_op)
+                for chunk in self.chunks
+            ]
+
+        results = [reward for chunk in results for reward in chunk]
+        rewards = np.array([reward for reward, _ in results])
+
+        if no_op:
+            self.no_op_rewards = np.array([no_op for _, no_op in results])
+
+        summary = {
+            'mean_reward': rewards.mean(),
+            'mean_no_op_reward': self.no_op_rewards.mean(),
+            'mean_regret': np.mean(self.no_op_rewards - rewards)
+        }
+
+        logger.info('evaluation - {}'.format(' '.join(
+            ['{} {:0.2f}'.format(k, v) for k, v in sorted(summary.items())])))
+
+        return summary
@@ -1,17 +1,24 @@
 import logging
 import os
 
-import tensorflow as tf
+import numpy as np
 
 import energypy
 from energypy.common.utils import save_args, parse_ini
+from energypy.common.utils import read_iterable_from_config
 from energypy.common.logging import make_logger
+from energypy.common.parallel import pop_session_config
 
 from energypy.experiments import Runner, save_env_info, make_paths, make_config_parser
+from energypy.experiments.actor_learner import actor_learner
+from energypy.experiments.evaluation import Evaluator
 
 from energypy.experiments import process_experiment
 
 
+logger = logging.getLogger(__name__)
+
+
 def setup_experiment(
         sess,
         agent_config,
@@ -53,7 +60,8 @@ def setup_experiment(
         agent.acting_writer.add_graph(sess.graph)
 
     #  TODO copy the dataset into the run folder as well
-    logger.info('setup experiment of {} steps'.format(total_steps))
+    logger.info('setup experiment of {} steps'.format(
+        agent_config.get('total_steps')))
 
     return agent, env
 
@@ -65,15 +73,41 @@ def experiment(
         runner,
         paths,
         total_steps,
+        checkpoint=None,
+        checkpoint_freq=10,
+        resume=False,
+        evaluator=None,
+        eval_freq=10,
+        learn_every=1
 ):
-    """ experiment of multiple episodes with learning """
+    """
+    experiment of multiple episodes with learning
+
+    args
+        checkpoint (Checkpoint) saved every checkpoint_freq episodes
+        checkpoint_freq (int)
+        resume (bool) continue from the checkpoint if there is one
+        evaluator (Evaluator) greedy evaluation every eval_freq episodes
+        eval_freq (int)
+        learn_every (int) learn every learn_every steps, with learn_every
+            updates (fused into one sess.run with graph_memory)
+    """
     #  outer while loop runs through multiple episodes
     step, episode = 0, 0
 
+    if resume and checkpoint and checkpoint.exists():
+        step, episode = checkpoint.restore(agent, runner)
+
+    #  time spent in each phase is accumulated by the runner's timer
+    timer = runner.timer
+    learn_every = int(learn_every)
+
     while step < int(total_steps):
         episode += 1
         done = False
+        timer.reset()
         observation = env.reset()
+        timer.lap('reset')
 
         #  inner while loop runs through single episode
         while not done:
@@ -81,41 +115,179 @@ def experiment(
 
             #  hardcoded in to explore
             action = agent.act(observation, explore=1.0)
+            timer.lap('act')
 
             next_observation, reward, done, info = env.step(action)
+            timer.lap('env_step')
 
             agent.remember(observation, action, reward,
                            next_observation, done)
+            timer.lap('remember')
 
             runner.record_step(reward)
 
             observation = next_observation
 
             #  only learn once memory is full
-            if len(agent.memory) > min(agent.memory.size, 10000):
-                train_info = agent.learn()
+            learning = len(agent.memory) >= min(agent.memory.size, 10000)
+            timer.lap('bookkeeping')
 
-        runner.record_episode(env_info=info)
+            if learning and step % learn_every == 0:
+                train_info = agent.learn(n_updates=learn_every)
+                timer.lap('learn')
 
         save_env_info(
             env,
             info,
-            len(runner.episode_rewards),
+            len(runner.episode_rewards) + 1,
             paths['env_histories']
         )
+        timer.lap('save_env_info')
+
+        runner.record_episode(env_info=info)
+        timer.lap('record_episode')
+
+        if checkpoint and episode % int(checkpoint_freq) == 0:
+            checkpoint.save(agent, runner, step, episode)
+            timer.lap('checkpoint')
+
+        if evaluator and episode % int(eval_freq) == 0:
+            runner.record_evaluation(evaluator.evaluate(agent))
+            timer.lap('evaluate')
+
+        #  after the checkpoint & evaluation so they are charged to this
+        #  episode rather than the next
+        runner.record_timing()
+
+    if checkpoint:
+        checkpoint.save(agent, runner, step, episode)
 
     return agent, env, runner
 
 
+def member_paths(paths, member):
+    """ results paths for a single member of an ensemble """
+    paths = dict(paths)
+    name = 'member_{}'.format(member)
+
+    paths['tb_rl'] = os.path.join(paths['tb_rl'], name)
+    paths['env_histories'] = os.path.join(paths['env_histories'], name)
+
+    root, ext = os.path.splitext(paths['ep_rewards'])
+    paths['ep_rewards'] = '{}_{}{}'.format(root, name, ext)
+
+    return paths
+
+
+def setup_ensemble(
+        sess,
+        agent_config,
+        env_config,
+        paths,
+        seeds
+):
+    """
+    Initialize an ensemble experiment - one env per seed
+
+    The numpy & tensorflow random seeds are global so only the last seed
+    sets them.  Members differ by their weight initialization, exploration
+    and episode sampling
+
+        sess (tf.Session)
+        agent_config (dict)
+        env_config (dict)
+        paths (dict)
+        seeds (list)
+    """
+    envs = []
+    for seed in seeds:
+        env = energypy.make_env(**env_config)
+        env.seed(seed)
+        envs.append(env)
+
+    save_args(env_config, path=paths['env_args'])
+
+    agent_config['envs'] = envs
+    agent_config['sess'] = sess
+
+    agent = energypy.make_agent(**agent_config)
+    save_args(agent_config, path=paths['agent_args'])
+
+    logger.info('setup ensemble of {} members'.format(len(envs)))
+
+    return agent, envs
+
+
+def ensemble_experiment(
+        sess,
+        agent,
+        envs,
+        paths,
+        total_steps
+):
+    """
+    experiment of an ensemble - every member acts and learns each step
+
+    Members reset their envs independently when their episode is done
+
+    returns
+        agent (EnsembleDQN)
+        envs (list)
+        runners (list) one runner per member
+    """
+    paths = [member_paths(paths, member) for member in range(len(envs))]
+    runners = [Runner(sess, member) for member in paths]
+
+    observations = [env.reset() for env in envs]
+    step = 0
+
+    while step < int(total_steps):
+        step += 1
+
+        actions = agent.act(np.concatenate(observations), explore=1.0)
+
+        next_observations, rewards, dones, infos = zip(*[
+            env.step(action) for env, action in zip(envs, actions)
+        ])
+        next_observations = list(next_observations)
+
+        agent.remember(
+            observations, actions, rewards, next_observations, dones)
+
+        for member, env in enumerate(envs):
+            runner = runners[member]
+            runner.record_step(rewards[member])
+
+            if dones[member]:
+                save_env_info(
+                    env,
+                    infos[member],
+                    len(runner.episode_rewards) + 1,
+                    paths[member]['env_histories']
+                )
+                #  no phase timing - members step & learn together
+                runner.record_episode(env_info=infos[member])
+
+                next_observations[member] = env.reset()
+
+        observations = next_observations
+
+        #  only learn once memory is full
+        memory = agent.memories[0]
+        if len(memory) >= min(memory.size, 10000):
+            agent.learn()
+
+    return agent, envs, runners
+
+
 def pre_train(agent, pre_train_steps):
     """ fit the value function from an existing memory """
     assert len(agent.memory) > 1000
 
-    logging('pretraining agent for {} steps'.format(
+    logger.info('pretraining agent for {} steps'.format(
         pre_train_steps))
 
-    for _ in range(pre_train_steps):
-        agent.learn()
+    agent.learn(n_updates=int(pre_train_steps))
 
     return agent
 
@@ -133,6 +305,13 @@ def single_run():
 
 
 if __name__ == '__main__':
+    #  tensorflow is only imported when run as a script - spawned actors &
+    #  evaluation workers re-import this module as __mp_main__
+    import tensorflow as tf
+
+    from energypy.common.tf_utils import make_session
+    from energypy.experiments.checkpoint import Checkpoint
+
     args = make_config_parser()
 
     #  cwd to avoid looking where package is installed
@@ -153,6 +332,12 @@ if __name__ == '__main__':
 
     #  could pop this in the setup_expt
     seed = run_config.pop('seed', None)
+    checkpoint_freq = int(run_config.pop('checkpoint_freq', 10))
+    learn_every = int(run_config.pop('learn_every', 1))
+    num_actors = int(run_config.pop('num_actors', 0))
+
+    #  thread pools & cpu pinning of the tf.Session
+    session_config = pop_session_config(run_config)
 
     #  could hve a way to copy run config args into the env
     #  sometimes we want to change more than the agent/seed - ie episode sampling
@@ -160,22 +345,81 @@ if __name__ == '__main__':
 
     tf.reset_default_graph()
 
-    with tf.Session() as sess:
-
-        agent, env = setup_experiment(
-            sess,
-            run_config,
-            env_config,
-            paths,
-            seed=seed
-        )
-
-        runner = Runner(sess, paths)
-
-        agent, env, runner = experiment(
-            sess, agent, env, runner, paths, total_steps
-        )
-
-        agent.memory.save(paths['memory'])
-
-        process_experiment(args.expt_name, args.run_name)
+    if run_config['agent_id'] == 'ensemble_dqn':
+        seeds = read_iterable_from_config(run_config.pop('seeds'))
+
+        with make_session(**session_config) as sess:
+            agent, envs = setup_ensemble(
+                sess, run_config, env_config, paths, seeds)
+
+            ensemble_experiment(sess, agent, envs, paths, total_steps)
+
+    elif num_actors:
+        with make_session(**session_config) as sess:
+            agent, env = setup_experiment(
+                sess, run_config, env_config, paths, seed=seed)
+
+            runner = Runner(sess, paths)
+
+            actor_learner(
+                agent,
+                env_config,
+                runner,
+                total_steps,
+                policy_path=paths['policy'],
+                num_actors=num_actors,
+                learner_cpus=session_config['cpus'],
+                seed=int(seed) if seed is not None else None
+            )
+
+            process_experiment(args.expt_name, args.run_name)
+
+    else:
+        with make_session(**session_config) as sess:
+
+            agent, env = setup_experiment(
+                sess,
+                run_config,
+                env_config,
+                paths,
+                seed=seed
+            )
+
+            runner = Runner(sess, paths)
+            checkpoint = Checkpoint(sess, paths['checkpoint'])
+
+            #  only agents that can be exported are evaluated
+            test_steps = int(expt_config.get('test_steps', 0))
+
+            if test_steps and hasattr(agent, 'export'):
+                #  training episodes are kept off the evaluation episodes
+                env.hold_out(test_steps)
+
+                evaluator = Evaluator(
+                    env_config,
+                    test_steps,
+                    policy_path=paths['policy'],
+                    num_workers=int(expt_config.get('eval_workers', 4))
+                )
+            else:
+                evaluator = None
+
+            #  the evaluation pool is stopped even if training fails
+            try:
+                agent, env, runner = experiment(
+                    sess, agent, env, runner, paths, total_steps,
+                    checkpoint=checkpoint,
+                    checkpoint_freq=checkpoint_freq,
+                    resume=args.resume,
+                    evaluator=evaluator,
+                    eval_freq=int(expt_config.get('eval_freq', 10)),
+                    learn_every=learn_every
+                )
+
+            finally:
+                if evaluator:
+                    evaluator.close()
+
+            agent.memory.save(paths['memory'])
+
+            process_experiment(args.expt_name, args.run_name)
@@ -1,23 +1,84 @@
 import io
+import logging
 from os.path import join
 import pkg_resources
+import re
 
 import pandas as pd
 
+from energypy.experiments.chunked_dataset import ChunkedDataset
+from energypy.experiments.chunked_dataset import is_chunked_dataset
 
-def load_dataset(dataset, name):
-    """ load example dataset or load from user supplied path """
+
+logger = logging.getLogger(__name__)
+
+
+def resample_dataset(data, rule):
+    """
+    Resamples a dataset to a coarser time step
+
+    Energy columns ([MWh]) are summed over each new step.  Everything else
+    (prices, power in [MW], forecasts) is averaged
+
+    args
+        data (pd.DataFrame) with a datetime index
+        rule (str) pandas offset i.e. 30min or 1H
+
+    returns
+        resampled (pd.DataFrame)
+    """
+    units = [re.search(r'\[(.*)\]\s*$', col) for col in data.columns]
+
+    how = {
+        col: 'sum' if unit and unit.group(1) == 'MWh' else 'mean'
+        for col, unit in zip(data.columns, units)
+    }
+
+    resampled = data.resample(rule).agg(how)
+
+    #  periods with no data (i.e. gaps in the index) are dropped
+    return resampled.loc[data.resample(rule).size() > 0, :]
+
+
+def load_dataset(dataset, name, resample=None):
+    """
+    load example dataset or load from user supplied path
+
+    chunked datasets (see chunked_dataset.py) are returned as a
+    ChunkedDataset that reads from disk lazily
+
+    args
+        dataset (str)
+        name (str) i.e. state or observation
+        resample (str) optional pandas offset i.e. 30min - see
+            resample_dataset
+    """
     if dataset == 'example':
         path = 'experiments/datasets/example/{}.csv'.format(name)
         data = pkg_resources.resource_string('energypy', path)
 
-        return pd.read_csv(
-            io.BytesIO(data), index_col=0, parse_dates=True
+        #  the example index is day first - i.e. 08/02/2017 00:00
+        data = pd.read_csv(
+            io.BytesIO(data), index_col=0, parse_dates=True, dayfirst=True
         )
 
+    elif is_chunked_dataset(dataset, name):
+        if resample:
+            raise ValueError(
+                'resampling chunked dataset {} is not supported'.format(
+                    dataset))
+
+        return ChunkedDataset(dataset, name)
+
     else:
-        return pd.read_csv(
+        data = pd.read_csv(
             join(dataset, name + '.csv'),
             index_col=0,
             parse_dates=True
         )
+
+    if resample:
+        logger.info('resampling {} {} to {}'.format(dataset, name, resample))
+        data = resample_dataset(data, resample)
+
+    return data
@@ -3,19 +3,82 @@ the Runner class has two main functions
 1 - keeping track of episode rewards
 2 - logging reward info to tensorboard
 3 - saving reward history to csv
+4 - timing the phases of the experiment loop
+5 - logging evaluation results to tensorboard
 """
 
+from collections import defaultdict
 import csv
 import logging
+import time
 
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 
 
 logger = logging.getLogger(__name__)
 
 
+def write_scalars(writer, scalars, step, prefix=''):
+    """
+    Writes a dict of scalars to TensorBoard
+
+    tensorflow is imported here rather than with the module so that the
+    Runner class can be imported without it
+
+    args
+        writer (tf.summary.FileWriter)
+        scalars (dict) {tag: value}
+        step (int)
+        prefix (str) i.e. 'eval/'
+    """
+    import tensorflow as tf
+
+    for tag, value in scalars.items():
+        summary = tf.Summary(value=[tf.Summary.Value(
+            tag='{}{}'.format(prefix, tag), simple_value=float(value))])
+        writer.add_summary(summary, step)
+
+    writer.flush()
+
+
+class PhaseTimer(object):
+    """
+    Accumulates the wall time spent in each phase of the experiment loop
+
+    lap() charges the time since the previous lap to a phase - one
+    perf_counter call per phase and no per call logging
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.totals = defaultdict(float)
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.totals[phase] += now - self.last
+        self.last = now
+
+    def summary(self, steps):
+        """
+        args
+            steps (int) number of steps since the last reset
+
+        returns
+            summary (dict) steps_per_sec and ms_per_step for each phase
+        """
+        steps = max(steps, 1)
+        total = max(self.last - self.start, 1e-9)
+
+        summary = {'steps_per_sec': steps / total}
+        for phase, seconds in self.totals.items():
+            summary['{}_ms_per_step'.format(phase)] = 1000 * seconds / steps
+
+        return summary
+
+
 class Runner(object):
     def __init__(
             self,
@@ -27,6 +90,8 @@ class Runner(object):
         self.rewards_path = paths['ep_rewards']
         self.tb_path = paths['tb_rl']
 
+        import tensorflow as tf
+
         self.writer = tf.summary.FileWriter(
             self.tb_path, self.sess.graph
         )
@@ -42,6 +107,8 @@ class Runner(object):
         self.episode_rewards = []
         self.current_episode_rewards = []
         self.step = 0
+        self.episode_steps = 0
+        self.timer = PhaseTimer()
 
     def record_step(self, reward):
         self.current_episode_rewards.append(reward)
@@ -75,15 +142,39 @@ class Runner(object):
 
         [logger.debug('{} - {}'.format(k, v)) for k, v in summaries.items()]
 
-        for tag, value in summaries.items():
-            summary = tf.Summary(
-                value=[tf.Summary.Value(tag=tag, simple_value=float(value))])
-            self.writer.add_summary(summary, self.step)
-
-        self.writer.flush()
+        write_scalars(self.writer, summaries, self.step)
 
         pd.DataFrame(
             np.array(self.episode_rewards).reshape(-1, 1),
         ).to_csv(self.rewards_path)
 
+        self.episode_steps = len(self.current_episode_rewards)
         self.current_episode_rewards = []
+
+    def record_timing(self):
+        """
+        Logs the phase timing of the last episode and resets the timer
+
+        Called after everything done at the end of an episode (i.e.
+        checkpoints & evaluation) so that it is charged to that episode
+        """
+        timing = self.timer.summary(self.episode_steps)
+
+        write_scalars(self.writer, timing, self.step, prefix='time/')
+
+        timing_log = ' '.join(
+            ['{} {:0.3f}'.format(k, v) for k, v in sorted(timing.items())])
+
+        if len(self.episode_rewards) % self.log_freq == 0:
+            logger.info(timing_log)
+
+        logger.debug(timing_log)
+
+        self.timer.reset()
+
+    def record_evaluation(self, summary):
+        """
+        args
+            summary (dict) from Evaluator.evaluate
+        """
+        write_scalars(self.writer, summary, self.step, prefix='eval/')
@@ -0,0 +1,385 @@
+"""
+Hyperparameter sweeps with successive halving
+
+A sweep starts from a run config in runs.ini and varies the parameters in
+configs/expt_name/sweep.ini
+
+    [sweep]
+    base=dqn
+    num_samples=0
+    min_steps=20000
+    max_steps=540000
+    eta=3
+    num_workers=4
+    seed=42
+
+    [grid]
+    learning_rate=0.001;0.0001;0.00001
+    layers=25,25,25;64,64
+    tau=loguniform(0.0001, 0.01)
+
+Values are separated by ; (as , is used inside values like layers).
+With num_samples=0 every combination of the grid is run, otherwise
+num_samples configs are drawn at random - uniform(low, high) and
+loguniform(low, high) ranges can only be sampled
+
+All runs are trained for min_steps, ranked by their average reward over
+the last 100 episodes (avg_rew_100 of the Runner) and only the top 1/eta
+are continued - from their checkpoint - for eta times as many steps, until
+max_steps is reached.  Each rung of runs is trained in a pool of processes.
+Each process takes a block of cpus while it trains - the session threads
+default to the size of the block unless set in the run config
+
+    $ python sweep.py expt_name
+"""
+
+import configparser
+import functools
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from energypy.common.parallel import allocate_cpus, pop_session_config
+from energypy.common.utils import parse_ini
+from energypy.experiments.utils import make_paths
+
+
+logger = logging.getLogger(__name__)
+
+range_pattern = re.compile(r'^(log)?uniform\((.+),(.+)\)$')
+
+
+def parse_grid(grid):
+    """
+    Reads the values of each parameter in the [grid] section
+
+    args
+        grid (dict) {param: 'a;b;c' or 'uniform(low, high)'}
+
+    returns
+        space (dict) {param: list of values or (low, high, log)}
+    """
+    space = {}
+    for param, value in grid.items():
+        match = range_pattern.match(str(value).replace(' ', ''))
+
+        if match:
+            log, low, high = match.groups()
+            space[param] = (float(low), float(high), bool(log))
+
+        else:
+            space[param] = [val.strip() for val in str(value).split(';')]
+
+    return space
+
+
+def expand_grid(space):
+    """
+    Every combination of the parameter values
+
+    args
+        space (dict) {param: list of values}
+
+    returns
+        configs (list) of dicts
+    """
+    ranges = [param for param, values in space.items()
+              if isinstance(values, tuple)]
+
+    if ranges:
+        raise ValueError(
+            'ranges {} can only be sampled - set num_samples'.format(ranges))
+
+    params = sorted(space.keys())
+
+    return [
+        dict(zip(params, values)) for values in
+        itertools.product(*[space[param] for param in params])
+    ]
+
+
+def sample_configs(space, num_samples, seed=None):
+    """
+    Random search over the parameter space
+
+    args
+        space (dict) {param: list of values or (low, high, log)}
+        num_samples (int)
+        seed (int)
+
+    returns
+        configs (list) of dicts
+    """
+    random = np.random.RandomState(seed)
+    params = sorted(space.keys())
+
+    def draw(values):
+        if isinstance(values, tuple):
+            low, high, log = values
+
+            if log:
+                return float(np.exp(
+                    random.uniform(np.log(low), np.log(high))))
+
+            return float(random.uniform(low, high))
+
+        return values[random.randint(len(values))]
+
+    return [
+        {param: draw(space[param]) for param in params}
+        for _ in range(int(num_samples))
+    ]
+
+
+def make_rungs(min_steps, max_steps, eta=3):
+    """
+    Training steps of each rung - min_steps * eta ** rung up to max_steps
+
+    returns
+        rungs (list) of ints
+    """
+    min_steps, max_steps = int(min_steps), int(max_steps)
+    rungs = [min_steps]
+
+    while rungs[-1] * eta < max_steps:
+        rungs.append(rungs[-1] * eta)
+
+    if rungs[-1] < max_steps:
+        rungs.append(max_steps)
+
+    return rungs
+
+
+def rolling_reward(episode_rewards, window=100):
+    """ the Runner's avg_rew_100 - -inf for a run without a full episode """
+    if len(episode_rewards) == 0:
+        return -np.inf
+
+    return float(np.mean(episode_rewards[-window:]))
+
+
+def successive_halving(runs, train, rungs, eta=3, map_fn=itertools.starmap):
+    """
+    Trains runs over rungs of increasing steps, keeping the top 1/eta
+
+    args
+        runs (dict) {run_name: config}
+        train (callable) (run_name, config, steps, resume) -> score
+        rungs (list) of steps - total steps trained by the end of each rung
+        eta (int) one in eta runs is continued to the next rung
+        map_fn (callable) itertools.starmap or Pool.starmap - called with
+            train and a list of argument tuples
+
+    returns
+        results (list) of dicts {run, rung, steps, score, **config}
+    """
+    alive = sorted(runs.keys())
+    results = []
+
+    for rung, steps in enumerate(rungs):
+        logger.info('rung {} - training {} runs to {} steps'.format(
+            rung, len(alive), steps))
+
+        args = [(name, runs[name], steps, rung > 0) for name in alive]
+        scores = list(map_fn(train, args))
+
+        for name, score in zip(alive, scores):
+            results.append({
+                'run': name, 'rung': rung, 'steps': steps, 'score': score,
+                **runs[name]
+            })
+
+        ranked = sorted(zip(alive, scores), key=lambda run: -run[1])
+        keep = max(1, int(math.ceil(len(alive) / eta)))
+        alive = sorted(name for name, _ in ranked[:keep])
+
+        logger.info('rung {} - best {} score {:0.2f}'.format(
+            rung, ranked[0][0], ranked[0][1]))
+
+    return results
+
+
+def train_run(
+        run_name,
+        agent_config,
+        steps,
+        resume,
+        env_config,
+        experiments_dir,
+        expt_name,
+        cpu_blocks=None
+):
+    """
+    Trains a single run to steps - run in a worker process
+
+    The run is checkpointed at the end so it can be continued by the next
+    rung with resume=True
+
+    args
+        cpu_blocks (queue) blocks of cpus shared by the workers - a block
+            is taken for the run and put back when it is finished
+
+    returns
+        score (float) average reward of the last 100 episodes
+    """
+    import tensorflow as tf
+    from energypy.common.tf_utils import make_session
+    from energypy.experiments import Runner
+    from energypy.experiments.checkpoint import Checkpoint
+    from energypy.experiments.experiment import setup_experiment, experiment
+
+    paths = make_paths(
+        experiments_dir, expt_name, run_name, load_configs=False)
+
+    agent_config = dict(agent_config)
+    seed = agent_config.pop('seed', None)
+    checkpoint_freq = int(agent_config.pop('checkpoint_freq', 10))
+    session_config = pop_session_config(agent_config)
+
+    block = cpu_blocks.get() if cpu_blocks is not None else None
+
+    if not session_config['cpus']:
+        session_config['cpus'] = block
+
+    tf.reset_default_graph()
+
+    try:
+        with make_session(**session_config) as sess:
+            agent, env = setup_experiment(
+                sess, agent_config, dict(env_config), paths, seed=seed)
+
+            runner = Runner(sess, paths)
+            checkpoint = Checkpoint(sess, paths['checkpoint'])
+
+            agent, env, runner = experiment(
+                sess, agent, env, runner, paths, steps,
+                checkpoint=checkpoint,
+                checkpoint_freq=checkpoint_freq,
+                resume=resume
+            )
+
+    finally:
+        if block is not None:
+            cpu_blocks.put(block)
+
+    return rolling_reward(runner.episode_rewards)
+
+
+def sweep(
+        experiments_dir,
+        expt_name,
+        base_config,
+        env_config,
+        space,
+        min_steps,
+        max_steps,
+        eta=3,
+        num_samples=0,
+        num_workers=4,
+        seed=None
+):
+    """
+    Successive halving over a grid or random search
+
+    args
+        experiments_dir (str)
+        expt_name (str)
+        base_config (dict) run config the sweep parameters are set in
+        env_config (dict) kwargs for make_env
+        space (dict) made by parse_grid
+        min_steps (int) steps of the first rung
+        max_steps (int) steps of the last rung
+        eta (int)
+        num_samples (int) 0 for a full grid search
+        num_workers (int) processes training runs in parallel
+        seed (int) for the random search
+
+    returns
+        results (pd.DataFrame) one row per run per rung
+    """
+    if int(num_samples):
+        configs = sample_configs(space, num_samples, seed)
+    else:
+        configs = expand_grid(space)
+
+    #  epsilon & learning rate schedules are set by the longest run
+    runs = {
+        'sweep_{:03d}'.format(num): {
+            **base_config, 'total_steps': int(max_steps), **config}
+        for num, config in enumerate(configs)
+    }
+
+    logger.info('sweeping {} runs over {}'.format(
+        len(runs), sorted(space.keys())))
+
+    rungs = make_rungs(min_steps, max_steps, eta)
+
+    #  spawn so that each worker starts a fresh tensorflow runtime
+    context = multiprocessing.get_context('spawn')
+
+    with context.Manager() as manager:
+        cpu_blocks = manager.Queue()
+        for block in allocate_cpus(num_workers):
+            cpu_blocks.put(block)
+
+        train = functools.partial(
+            train_run,
+            env_config=env_config,
+            experiments_dir=experiments_dir,
+            expt_name=expt_name,
+            cpu_blocks=cpu_blocks
+        )
+
+        with context.Pool(int(num_workers), maxtasksperchild=1) as pool:
+            results = successive_halving(
+                runs, train, rungs, eta, map_fn=pool.starmap)
+
+    results = pd.DataFrame(results)
+
+    path = os.path.join(experiments_dir, 'results', expt_name, 'sweep.csv')
+    results.to_csv(path)
+    logger.info('saved sweep results to {}'.format(path))
+
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='energypy sweep')
+    parser.add_argument('expt_name', type=str)
+    args = parser.parse_args()
+
+    experiments_dir = os.getcwd()
+    config_dir = os.path.join(experiments_dir, 'configs', args.expt_name)
+
+    sweep_config = parse_ini(os.path.join(config_dir, 'sweep.ini'), 'sweep')
+
+    #  the grid is read without parse_ini to keep the ; separated strings
+    config = configparser.ConfigParser()
+    config.read(os.path.join(config_dir, 'sweep.ini'))
+    space = parse_grid(dict(config['grid']))
+
+    base_config = parse_ini(
+        os.path.join(config_dir, 'runs.ini'), sweep_config['base'])
+    env_config = parse_ini(os.path.join(config_dir, 'expt.ini'), 'env')
+
+    sweep(
+        experiments_dir,
+        args.expt_name,
+        base_config,
+        env_config,
+        space,
+        min_steps=int(sweep_config['min_steps']),
+        max_steps=int(sweep_config['max_steps']),
+        eta=int(sweep_config.get('eta', 3)),
+        num_samples=int(sweep_config.get('num_samples', 0)),
+        num_workers=int(sweep_config.get('num_workers', 4)),
+        seed=int(sweep_config['seed']) if 'seed' in sweep_config else None
+    )
@@ -21,6 +21,11 @@ def make_config_parser():
     parser.add_argument('expt_name', default=None, type=str)
     parser.add_argument('run_name', default=None, type=str)
 
+    #  optional
+    parser.add_argument(
+        '--resume', action='store_true',
+        help='continue the run from its last checkpoint')
+
     args = parser.parse_args()
 
     return args
@@ -57,6 +62,8 @@ def make_paths(
                                                runs.ini
                                                agent_args.txt
                                                env_args.txt
+                                               checkpoint/state.pkl
+                                               policy.npz
                                                info.log
                                                debug.log
     """
@@ -101,7 +108,9 @@ def make_paths(
         'env_args': join(results_dir, run_name, 'env_args.txt'),
         'agent_args': join(results_dir, run_name, 'agent_args.txt'),
         'ep_rewards': join(results_dir, run_name, 'episode_rewards.csv'),
-        'memory': join(results_dir, '{}_memory.pkl'.format(run_name))
+        'memory': join(results_dir, '{}_memory.pkl'.format(run_name)),
+        'checkpoint': join(results_dir, run_name, 'checkpoint'),
+        'policy': join(results_dir, run_name, 'policy.npz')
     }
 
     paths = {**config_paths, **results_paths}
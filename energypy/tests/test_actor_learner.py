@@ -0,0 +1,136 @@
+""" tests for the actors and shared memory of the actor learner """
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import energypy
+from energypy.experiments.actor_learner import (
+    SharedReplay, SharedWeights, context, run_actor)
+
+
+def make_policy(path, obs_dim, discrete_actions):
+    params = {
+        'online/input_layer/weights': np.random.randn(obs_dim, 8),
+        'online/input_layer/bias': np.zeros(8),
+        'online/output_layer/weights': np.random.randn(
+            8, discrete_actions.shape[0]),
+        'online/output_layer/bias': np.zeros(discrete_actions.shape[0]),
+    }
+
+    np.savez(
+        path,
+        network='ff',
+        discrete_actions=discrete_actions,
+        observation_shape=np.array([obs_dim]),
+        action_shape=np.array([1]),
+        strides=np.array([], dtype=int),
+        **{'params/{}'.format(k): v for k, v in params.items()}
+    )
+
+    return params
+
+
+def test_shared_replay():
+    replay = SharedReplay((3,), (1,), size=10)
+
+    for step in range(4):
+        replay.remember_batch({
+            'observation': np.full((3, 3), step),
+            'action': np.full((3, 1), step),
+            'reward': np.full(3, step),
+            'next_observation': np.full((3, 3), step),
+            'done': np.zeros(3, dtype=bool)
+        })
+
+    assert replay.count == 12
+    assert len(replay) == 10
+
+    #  the oldest two samples are overwritten by the last batch
+    np.testing.assert_array_equal(
+        replay.arrays['reward'][:, 0], [3, 3, 0, 1, 1, 1, 2, 2, 2, 3])
+
+    batch = replay.get_batch(4)
+    assert batch['observation'].shape == (4, 3)
+
+
+def test_actor(tmpdir):
+    env_config = {'env_id': 'battery', 'episode_length': 48,
+                  'episode_sample': 'random'}
+    env = energypy.make_env(**env_config)
+
+    obs_dim = env.observation_space.shape[0]
+    discrete_actions = env.action_space.discretize(5)
+
+    path = str(tmpdir.join('policy.npz'))
+    params = make_policy(path, obs_dim, discrete_actions)
+
+    replay = SharedReplay(
+        env.observation_space.shape, env.action_space.shape, size=1000)
+    weights = SharedWeights(
+        list(params.keys()), [v.shape for v in params.values()])
+    weights.publish(list(params.values()))
+
+    stop, rewards = context.Event(), context.Queue()
+    actor = context.Process(
+        target=run_actor,
+        kwargs={
+            'actor_id': 0,
+            'env_config': env_config,
+            'policy_path': path,
+            'replay': replay,
+            'weights': weights,
+            'stop': stop,
+            'rewards': rewards,
+            'decay_steps': 100,
+            'push_every': 8
+        },
+        daemon=True
+    )
+    actor.start()
+
+    #  the actor pushes experience and a full episode of rewards
+    actor_id, episode_rewards = rewards.get(timeout=60)
+    assert len(episode_rewards) == 48
+
+    start = time.time()
+    while replay.count < 100 and time.time() - start < 60:
+        time.sleep(0.1)
+
+    stop.set()
+    actor.join(timeout=10)
+
+    assert replay.count >= 100
+    batch = replay.get_batch(32)
+
+    #  every action is one of the discrete actions
+    assert np.all(np.isin(batch['action'].reshape(-1), discrete_actions))
+
+
+def test_actor_imports(tmpdir):
+    """ actors launched from experiment.py don't import tensorflow """
+    script = tmpdir.join('launch.py')
+    script.write('\n'.join([
+        'import sys',
+        'from energypy.experiments.actor_learner import context',
+        'import energypy.experiments.experiment as experiment',
+        '',
+        "if __name__ == '__main__':",
+        '    #  children re-import experiment.py as __mp_main__',
+        "    sys.modules['__main__'].__file__ = experiment.__file__",
+        '    with context.Pool(1) as pool:',
+        '        print(pool.apply(',
+        '            eval, ("\'tensorflow\' in __import__(\'sys\').modules", )))',
+    ]))
+
+    root = os.path.dirname(os.path.dirname(energypy.__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root] + [path for path in [env.get('PYTHONPATH')] if path])
+
+    output = subprocess.check_output(
+        [sys.executable, str(script)], env=env)
+
+    assert output.decode().strip().splitlines()[-1] == 'False'
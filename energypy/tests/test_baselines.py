@@ -0,0 +1,46 @@
+""" tests for baselines over the whole dataset """
+import numpy as np
+import pandas as pd
+
+import energypy
+from energypy.experiments.baselines import evaluate_baselines, save_baselines
+from energypy.experiments.baselines import make_price_rule
+
+
+def test_baselines_match_stepping():
+    env = energypy.make_env('battery', episode_length=288)
+    rewards = evaluate_baselines(env, seed=42)
+
+    num_samples = env.state_space.data.shape[0]
+    assert rewards.shape == (num_samples // 288, 3)
+    assert (rewards.loc[:, 'no_op'] == 0).all()
+
+    #  stepping through an episode with the price rule schedule
+    env.reset(episode=(288, 576))
+    actions = make_price_rule()(env)
+
+    stepped = 0
+    for action in actions:
+        _, reward, done, _ = env.step(action)
+        stepped += reward
+
+    assert done
+    np.testing.assert_allclose(stepped, rewards.loc[1, 'price_rule'])
+
+
+def test_save_baselines(tmpdir):
+    rewards = pd.DataFrame({'no_op': [0.0, 0.0], 'random': [1.0, -2.0]})
+    save_baselines(rewards, str(tmpdir), 'expt')
+
+    saved = pd.read_csv(
+        tmpdir.join('results', 'expt', 'random', 'episode_rewards.csv'),
+        index_col=0)
+
+    np.testing.assert_array_equal(saved.values[:, 0], [1.0, -2.0])
+
+
+def test_price_rule_battery_only():
+    env = energypy.make_env('flex', episode_length=288)
+    rewards = evaluate_baselines(env, seed=42)
+
+    assert rewards.columns.tolist() == ['no_op', 'random']
@@ -55,3 +55,17 @@ def test_no_op():
     expected_charge = 2.0
 
     assert charge == expected_charge
+
+
+def test_resampled_charge():
+    """ 30 minute steps store six times as much as 5 minute steps """
+    env = energypy.make_env(
+        'battery', initial_charge=0, round_trip_eff=0.9, resample='30min')
+    env.reset()
+
+    assert env.steps_per_hour == 2.0
+
+    env.step(1.0)
+    charge = env.get_state_variable('C_charge_level [MWh]')
+
+    assert charge == 0.9 * 1.0 / 2
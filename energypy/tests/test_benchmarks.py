@@ -0,0 +1,18 @@
+""" smoke test for the benchmark suite """
+
+from energypy.benchmarks import run_benchmarks, compare_benchmarks
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(['sumtree_set', 'array_memory_remember'],
+                             scale=0.01)
+
+    assert 'sumtree_set_1024' in results['benchmarks']
+    assert 'array_memory_remember_1000' in results['benchmarks']
+    assert 'battery_step' not in results['benchmarks']
+
+    for result in results['benchmarks'].values():
+        assert result['calls_per_sec'] > 0
+
+    speedups = compare_benchmarks(results, results)
+    assert all(speedup == 1.0 for speedup in speedups.values())
@@ -0,0 +1,69 @@
+""" tests for the chunked dataset """
+
+import numpy as np
+
+import energypy
+from energypy.common.spaces.space import standardize
+from energypy.experiments.chunked_dataset import ChunkedDataset
+from energypy.experiments.chunked_dataset import write_chunked_dataset
+
+
+def make_chunked(tmpdir, name, chunk_size=500):
+    data = energypy.load_dataset('example', name)
+
+    chunks = [data.iloc[start: start + chunk_size, :]
+              for start in range(0, data.shape[0], chunk_size)]
+
+    write_chunked_dataset(chunks, str(tmpdir), name)
+
+    return data
+
+
+def test_window(tmpdir):
+    data = make_chunked(tmpdir, 'state')
+    chunked = ChunkedDataset(str(tmpdir), 'state')
+
+    assert chunked.shape == data.shape
+
+    for start, end in [(0, 10), (450, 1050), (2000, 5000)]:
+        window = chunked.window(start, end)
+        expected = data.iloc[start: end, :]
+
+        np.testing.assert_array_equal(window.values, expected.values)
+        assert (window.index == expected.index).all()
+
+
+def test_statistics(tmpdir):
+    data = make_chunked(tmpdir, 'observation', chunk_size=333)
+    chunked = ChunkedDataset(str(tmpdir), 'observation', normalize=True)
+
+    stats = chunked.statistics()
+    np.testing.assert_allclose(stats['mean'], data.values.mean(axis=0))
+    np.testing.assert_allclose(stats['std'], data.values.std(axis=0))
+
+    #  cached statistics are read back from disk
+    cached = ChunkedDataset(str(tmpdir), 'observation').statistics()
+    np.testing.assert_allclose(cached['std'], stats['std'])
+
+    np.testing.assert_allclose(
+        chunked.window(0, data.shape[0]).values,
+        standardize(data.values)
+    )
+
+
+def test_chunked_env(tmpdir):
+    make_chunked(tmpdir, 'state')
+    make_chunked(tmpdir, 'observation')
+
+    chunked = energypy.make_env(
+        'battery', dataset=str(tmpdir), episode_sample='fixed',
+        episode_length=100)
+    env = energypy.make_env(
+        'battery', episode_sample='fixed', episode_length=100)
+
+    np.testing.assert_allclose(chunked.reset(), env.reset())
+
+    for space, chunked_space in zip(env.observation_space.spaces,
+                                    chunked.observation_space.spaces):
+        np.testing.assert_allclose(space.low, chunked_space.low)
+        np.testing.assert_allclose(space.high, chunked_space.high)
@@ -0,0 +1,101 @@
+""" tests for training an env across a pool of sites """
+
+import os
+
+import numpy as np
+
+import energypy
+from energypy.envs.dataset_pool import DatasetPool
+from energypy.experiments.chunked_dataset import write_chunked_dataset
+
+
+def make_pool(tmpdir, num_sites=4):
+    """ copies of the example dataset with a different price per site """
+    for site in range(num_sites):
+        path = os.path.join(str(tmpdir), 'site_{}'.format(site))
+        os.makedirs(path)
+
+        for name in ['state', 'observation']:
+            data = energypy.load_dataset('example', name)
+            data = data.iloc[: 1000 + 100 * site, :]
+            data.iloc[:, 0] += 1000 * site
+
+            if site % 2:
+                write_chunked_dataset(data, path, name)
+            else:
+                data.to_csv(os.path.join(path, '{}.csv'.format(name)))
+
+    return str(tmpdir)
+
+
+def test_pool_index(tmpdir):
+    path = make_pool(tmpdir)
+    pool = DatasetPool(path)
+
+    assert pool.sites == ['site_{}'.format(s) for s in range(4)]
+    assert pool.index.loc[:, 'length'].tolist() == [1000, 1100, 1200, 1300]
+    assert os.path.exists(os.path.join(path, 'site_index.csv'))
+
+    cached = DatasetPool(path)
+    assert cached.index.loc[:, 'length'].tolist() == [1000, 1100, 1200, 1300]
+
+
+def test_pool_env(tmpdir):
+    path = make_pool(tmpdir)
+
+    env = energypy.make_env(
+        'battery',
+        dataset=path,
+        episode_sample='random',
+        episode_length=48,
+        site_cache_size=2
+    )
+
+    sites = set()
+    for _ in range(20):
+        env.reset()
+        sites.add(env.site)
+
+        site_num = int(env.site.split('_')[1])
+        prices = env.state_space.episode.iloc[:, 0].values
+        assert (prices >= 1000 * site_num).all()
+
+        done = False
+        while not done:
+            _, _, done, _ = env.step(env.action_space.sample())
+
+        assert len(env.pool.cache) <= 2
+
+    assert len(sites) > 1
+
+
+def test_pool_bounds(tmpdir):
+    """ the bounds of the spaces follow the sampled site """
+    path = make_pool(tmpdir)
+    column = 'C_electricity_price [$/MWh]'
+
+    env = energypy.make_env(
+        'battery',
+        dataset=path,
+        episode_sample='random',
+        episode_length=48,
+        observation_windows={column: 2}
+    )
+
+    for _ in range(10):
+        env.reset()
+
+        state = env.state_space
+        np.testing.assert_allclose(state.high[0], state.data.max()[0])
+        np.testing.assert_allclose(state.low[0], state.data.min()[0])
+
+        num_columns = state.episode.shape[1]
+        assert (state.episode.values >= state.low[:num_columns]).all()
+        assert (state.episode.values <= state.high[:num_columns]).all()
+
+        #  windows keep their scaling but cover the prices of the site
+        _, _, _, mean, std = env.observation_space.windows[0]
+        window = env.observation_space._window_slice.start
+        np.testing.assert_allclose(
+            env.observation_space.high[window],
+            (state.data.max()[column] - mean) / std)
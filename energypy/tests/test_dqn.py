@@ -403,3 +403,215 @@ def test_copy_ops():
                 v1,
                 v2
             )
+
+
+def test_numpy_export(tmpdir):
+    """ the exported numpy policy acts the same as the greedy tf policy """
+    from energypy.agents.numpy_policy import NumpyPolicy
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        agent, batch, env = setup_agent(sess)
+        agent.learn()
+
+        path = str(tmpdir.join('policy.npz'))
+        agent.export(path)
+        policy = NumpyPolicy(path)
+
+        obs = batch['observation']
+        q_vals = sess.run(agent.online_q_values, {agent.observation: obs})
+
+        np.testing.assert_allclose(
+            policy.q_values(obs), q_vals, rtol=1e-4, atol=1e-4)
+
+        np.testing.assert_array_equal(
+            policy.act(obs),
+            agent.discrete_actions[np.argmax(q_vals, axis=1)]
+        )
+
+
+def test_checkpoint(tmpdir):
+    """ restoring a checkpoint undoes learning after it was saved """
+    from energypy.experiments.checkpoint import Checkpoint
+    from energypy.experiments.runner import Runner
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        agent, batch, env = setup_agent(sess)
+        runner = Runner(sess, {
+            'ep_rewards': str(tmpdir.join('rewards.csv')),
+            'tb_rl': str(tmpdir.join('tb'))
+        })
+        runner.episode_rewards = [1.0, 2.0]
+
+        checkpoint = Checkpoint(sess, str(tmpdir.join('checkpoint')))
+        checkpoint.save(agent, runner, step=48, episode=2)
+        saved = sess.run(get_tf_params('online'))
+
+        agent.learn()
+        runner.episode_rewards.append(3.0)
+
+        step, episode = checkpoint.restore(agent, runner)
+        assert (step, episode) == (48, 2)
+        assert runner.episode_rewards == [1.0, 2.0]
+        assert agent.learn_step == 0
+
+        for old, new in zip(saved, sess.run(get_tf_params('online'))):
+            np.testing.assert_array_equal(old, new)
+
+
+def test_prefetch_learning():
+    """ learning from prefetched batches changes the online weights """
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        env = energypy.make_env('battery')
+        agent = energypy.make_agent(
+            agent_id='dqn',
+            sess=sess,
+            env=env,
+            total_steps=10,
+            memory_type='array',
+            learning_rate=1.0,
+            prefetch_batches=2
+        )
+
+        for step in range(48):
+            agent.remember(
+                env.observation_space.sample(),
+                env.action_space.sample(),
+                random.random(),
+                env.observation_space.sample(),
+                False
+            )
+
+        old = sess.run(get_tf_params('online'))
+
+        for _ in range(5):
+            agent.learn()
+
+        agent.prefetcher.stop()
+
+        new = sess.run(get_tf_params('online'))
+        assert any(not np.array_equal(o, n) for o, n in zip(old, new))
+
+
+def test_graph_memory():
+    """ experience is copied into the graph and learnt from in one run """
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        env = energypy.make_env('battery')
+        agent = energypy.make_agent(
+            agent_id='dqn',
+            sess=sess,
+            env=env,
+            total_steps=200,
+            memory_type='array',
+            learning_rate=1.0,
+            batch_size=16,
+            graph_memory=True
+        )
+
+        for step in range(48):
+            agent.remember(
+                env.observation_space.sample(),
+                env.action_space.sample(),
+                random.random(),
+                env.observation_space.sample(),
+                random.choice([True, False])
+            )
+
+        #  the fused loop reuses the variables of the learning graph
+        assert not [var for var in tf.global_variables()
+                    if var.name.startswith('fused_learning')]
+
+        old = sess.run(get_tf_params('online'))
+        old_target = sess.run(get_tf_params('target'))
+        agent.learn(n_updates=10)
+        new = sess.run(get_tf_params('online'))
+        new_target = sess.run(get_tf_params('target'))
+
+        assert agent.learn_step == 10
+        assert any(not np.array_equal(o, n) for o, n in zip(old, new))
+        assert any(not np.array_equal(o, n)
+                   for o, n in zip(old_target, new_target))
+
+        count, observations = sess.run(
+            [agent.graph_count, agent.graph_buffers['observation']])
+        assert count == len(agent.memory) == 40
+
+        np.testing.assert_allclose(
+            observations, agent.memory.obs, rtol=1e-6)
+
+
+def test_experiment_learn_every(tmpdir, monkeypatch):
+    """ experiment learns in blocks of learn_every updates """
+    from energypy.experiments import experiment as experiment_module
+    from energypy.experiments.experiment import experiment, pre_train
+    from energypy.experiments.runner import Runner
+
+    #  env histories aren't under test
+    monkeypatch.setattr(
+        experiment_module, 'save_env_info', lambda *args: None)
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        env = energypy.make_env(
+            'battery', episode_sample='random', episode_length=16)
+        agent = energypy.make_agent(
+            agent_id='dqn',
+            sess=sess,
+            env=env,
+            total_steps=160,
+            memory_type='array',
+            memory_fraction=0.1,
+            batch_size=8,
+            graph_memory=True
+        )
+
+        paths = {
+            'ep_rewards': str(tmpdir.join('rewards.csv')),
+            'tb_rl': str(tmpdir.join('tb')),
+            'env_histories': None
+        }
+        runner = Runner(sess, paths)
+
+        calls = []
+        learn = agent.learn
+
+        def record_learn(**kwargs):
+            calls.append(kwargs['n_updates'])
+            return learn(**kwargs)
+
+        agent.learn = record_learn
+
+        experiment(
+            sess, agent, env, runner, paths, total_steps=64, learn_every=4)
+
+        #  memory of 16 is full on the 16th step
+        assert calls == [4] * 13
+        assert agent.learn_step == 52
+
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        agent = energypy.make_agent(
+            agent_id='dqn',
+            sess=sess,
+            env=env,
+            total_steps=10000,
+            batch_size=8,
+            graph_memory=True
+        )
+
+        for _ in range(1001):
+            agent.remember(
+                env.observation_space.sample(),
+                env.action_space.sample(),
+                random.random(),
+                env.observation_space.sample(),
+                False
+            )
+
+        #  all the pre training updates are one call
+        pre_train(agent, 10)
+        assert agent.learn_step == 10
@@ -0,0 +1,124 @@
+""" tests for the ensemble of DQN agents """
+import random
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+import energypy
+
+from energypy.common.tf_utils import get_tf_params
+
+
+def setup_ensemble(sess, num_members=3):
+    envs = [energypy.make_env('battery') for _ in range(num_members)]
+
+    agent = energypy.make_agent(
+        agent_id='ensemble_dqn',
+        envs=envs,
+        sess=sess,
+        total_steps=1000,
+        layers=(8, 8),
+        batch_size=16,
+        learning_rate=1.0
+    )
+
+    for step in range(32):
+        obs = np.concatenate(
+            [env.observation_space.sample() for env in envs])
+        action = agent.act(obs)
+        reward = [random.random() * 10 for _ in envs]
+        next_obs = np.concatenate(
+            [env.observation_space.sample() for env in envs])
+        done = [random.choice([True, False]) for _ in envs]
+        agent.remember(obs, action, reward, next_obs, done)
+
+    return agent, envs
+
+
+def test_ensemble_forward():
+    """ each member's q values come from its own slice of the weights """
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        agent, envs = setup_ensemble(sess)
+        batch = agent.get_batch()
+
+        q_values = sess.run(
+            agent.online_q_values, {agent.observation: batch['observation']})
+        assert q_values.shape == (3, 16, agent.num_actions)
+
+        params = dict(zip(
+            [p.name for p in get_tf_params('online')],
+            sess.run(get_tf_params('online'))
+        ))
+
+        for member in range(3):
+            layer = batch['observation'][member]
+            for name in ['input_layer', 'hidden_layer_1', 'output_layer']:
+                layer = layer.dot(
+                    params['online/{}/weights:0'.format(name)][member]
+                ) + params['online/{}/bias:0'.format(name)][member]
+
+                if name != 'output_layer':
+                    layer = np.maximum(layer, 0)
+
+            np.testing.assert_allclose(
+                layer, q_values[member], rtol=1e-4, atol=1e-4)
+
+
+def test_ensemble_independent():
+    """ the loss of a member only depends on that member's weights """
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        agent, envs = setup_ensemble(sess)
+        batch = agent.get_batch()
+
+        params = get_tf_params('online')
+        grads = sess.run(
+            tf.gradients(agent.losses[0], params),
+            {agent.observation: batch['observation'],
+             agent.selected_action_indicies: batch['action_indicies'],
+             agent.reward: batch['reward'].reshape(3, -1),
+             agent.next_observation: batch['next_observation'],
+             agent.terminal: batch['done'].reshape(3, -1)}
+        )
+
+        for grad in grads:
+            assert np.all(grad[1:] == 0)
+
+        actions = agent.act(batch['observation'][:, 0])
+        assert actions.shape == (3, 1)
+
+        losses = agent.learn()
+        assert losses.shape == (3,)
+
+
+def test_ensemble_unsupported():
+    """ DQN options the ensemble can't train raise rather than being lost """
+    tf.reset_default_graph()
+
+    with tf.Session() as sess:
+        envs = [energypy.make_env('battery') for _ in range(2)]
+
+        with pytest.raises(ValueError):
+            energypy.make_agent(
+                agent_id='ensemble_dqn',
+                envs=envs,
+                sess=sess,
+                learning_rate_decay='0.5'
+            )
+
+
+def test_ensemble_reward_clipping():
+    """ rewards are clipped like BaseAgent.remember """
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        agent, envs = setup_ensemble(sess)
+
+        obs = np.concatenate([env.observation_space.sample() for env in envs])
+        agent.remember(
+            obs, agent.act(obs), [-50.0, 5.0, 50.0], obs, [False] * 3)
+
+        rewards = [float(memory.latest(1)['reward'].reshape(-1)[0])
+                   for memory in agent.memories]
+        assert rewards == [-10.0, 5.0, 10.0]
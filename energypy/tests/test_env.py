@@ -1,5 +1,7 @@
 """ checking episode sample strageties """
 
+import numpy as np
+import pytest
 import pandas as pd
 
 import energypy
@@ -73,3 +75,239 @@ def test_battery():
 
 def test_flex():
     [test('flex') for test in tests]
+
+
+def simulate(env_id, info_keys):
+    """ open loop simulation matches stepping through the env """
+    env = energypy.make_env(
+        env_id,
+        episode_sample='random',
+        episode_length=288
+    )
+
+    env.reset()
+    actions = np.concatenate(
+        [env.action_space.sample() for _ in range(288)]
+    )
+
+    outputs = env.simulate(actions)
+
+    done, step = False, 0
+    while not done:
+        s, r, done, i = env.step(actions[step])
+        step += 1
+
+    assert step == outputs['reward'].shape[0]
+
+    for key in info_keys:
+        np.testing.assert_allclose(
+            np.array([float(np.squeeze(val)) for val in i[key]]),
+            outputs[key]
+        )
+
+
+def test_simulate_battery():
+    simulate(
+        'battery',
+        ['reward', 'charge', 'old_charge', 'gross_rate', 'losses', 'net_rate']
+    )
+
+
+def test_simulate_flex():
+    simulate(
+        'flex',
+        ['reward', 'flexed', 'stored_demand', 'stored_supply', 'setpoint']
+    )
+
+
+def test_flex_release_time():
+    """ the release time is in hours, whatever the step of the data """
+    assert energypy.make_env('flex').release_steps == 12
+
+    env = energypy.make_env('flex', resample='30min', release_time=2)
+    assert env.release_steps == 4
+
+    env.reset()
+    assert len(env.storage_history) == 4
+
+
+def test_epoch_sample():
+    """ every sample is visited once per epoch, in a shuffled order """
+    env = energypy.make_env(
+        'battery',
+        episode_sample='epoch',
+        episode_length=500
+    )
+
+    num_samples = env.state_space.data.shape[0]
+    num_episodes = len(env.sampler)
+    assert num_episodes == int(np.ceil(num_samples / 500))
+
+    for epoch in range(2):
+        starts, covered = [], set()
+        for _ in range(num_episodes):
+            env.reset()
+            episode = env.state_space.episode
+            assert episode.shape[0] == 500
+
+            starts.append(episode.index[0])
+            covered.update(episode.index)
+
+        assert len(set(starts)) == num_episodes
+        assert covered == set(env.state_space.data.index)
+
+
+def test_observation_windows():
+    """ windows of the state price, repeating the edge values """
+    column = 'C_electricity_price [$/MWh]'
+
+    env = energypy.make_env(
+        'battery',
+        episode_sample='fixed',
+        episode_length=24,
+        observation_windows={column: (4, 2)}
+    )
+
+    obs = env.reset()
+    num_obs = env.observation_space.data.shape[1]
+    assert obs.shape == (1, num_obs + 6 + 1)
+
+    prices = env.state_space.data.loc[:, column].values
+    scaled = (prices - prices.mean()) / prices.std()
+
+    #  first step runs off the start of the data
+    np.testing.assert_allclose(
+        obs[0, num_obs:num_obs + 6],
+        np.concatenate([np.repeat(scaled[0], 3), scaled[:3]])
+    )
+
+    for step in range(1, 10):
+        obs, _, _, _ = env.step(env.action_space.no_op)
+
+    np.testing.assert_allclose(obs[0, num_obs:num_obs + 6], scaled[6:12])
+
+
+def test_observation_windows_2D():
+    env = energypy.make_env(
+        'battery',
+        episode_length=24,
+        observation_windows={
+            'C_electricity_price [$/MWh]': 12, 'C_demand [MW]': 12},
+        observation_dims='2D'
+    )
+
+    obs = env.reset()
+    num_features = env.observation_space.data.shape[1] + 1
+    assert obs.shape == (1, 12, 2 + num_features, 1)
+    assert env.observation_space.sample().shape == obs.shape
+
+    #  features that aren't windowed are the same down each column
+    np.testing.assert_array_equal(obs[0, 0, 2:], obs[0, -1, 2:])
+
+
+def test_action_repeat():
+    """ holding actions for 4 steps gives the same rewards in fewer steps """
+    config = {'env_id': 'battery', 'episode_sample': 'fixed',
+              'episode_length': 30}
+
+    env = energypy.make_env(**config)
+    repeated = energypy.make_env(action_repeat=4, **config)
+    assert repeated.action_space is repeated.env.action_space
+
+    actions = np.random.uniform(-1, 1, size=8)
+
+    env.reset()
+    rewards = []
+    for action in np.repeat(actions, 4)[:30]:
+        _, reward, done, _ = env.step(action)
+        rewards.append(reward)
+
+    repeated.reset()
+    repeated_rewards, done = [], False
+    for action in actions:
+        obs, reward, done, info = repeated.step(action)
+        repeated_rewards.append(reward)
+
+    #  the last action is cut short by the end of the episode
+    assert done
+    assert len(info['reward']) == 30
+    np.testing.assert_allclose(
+        repeated_rewards,
+        [sum(rewards[start:start + 4]) for start in range(0, 30, 4)]
+    )
+
+
+def test_resample_dataset():
+    from energypy.experiments.load_dataset import resample_dataset
+
+    index = pd.date_range('2018-01-01', periods=12, freq='5min')
+    data = pd.DataFrame({
+        'C_electricity_price [$/MWh]': np.arange(12),
+        'C_demand [MW]': np.ones(12),
+        'C_generation [MWh]': np.ones(12)}, index=index)
+
+    #  drop a step to make a gap
+    resampled = resample_dataset(data.drop(index[7]), '30min')
+
+    assert resampled.shape[0] == 2
+    np.testing.assert_allclose(
+        resampled.loc[:, 'C_electricity_price [$/MWh]'], [2.5, 8.8])
+    np.testing.assert_allclose(resampled.loc[:, 'C_demand [MW]'], [1, 1])
+    np.testing.assert_allclose(resampled.loc[:, 'C_generation [MWh]'], [6, 5])
+
+
+def test_unchecked_step():
+    """ unchecked envs give the same results without validating actions """
+    config = {'episode_sample': 'fixed', 'episode_length': 48}
+    actions = np.random.uniform(-2, 2, size=48)
+
+    for env_id, env_actions in [('battery', actions),
+                                ('flex', np.random.randint(3, size=48))]:
+        checked = energypy.make_env(env_id, **config)
+        unchecked = energypy.make_env(env_id, checked=False, **config)
+
+        rewards = []
+        for env in [checked, unchecked]:
+            env.reset()
+            rewards.append([env.step(action)[1] for action in env_actions])
+
+        np.testing.assert_allclose(rewards[0], rewards[1])
+
+    #  only the checked env rejects an action outside the action space
+    checked = energypy.make_env('battery', **config)
+    unchecked = energypy.make_env('battery', checked=False, **config)
+    checked.reset()
+    unchecked.reset()
+
+    with pytest.raises(AssertionError):
+        checked.step(5.0)
+
+    unchecked.step(5.0)
+
+
+def test_epoch_prefetch_windows():
+    """ episodes prepared in the sampler's thread match a normal reset """
+    column = 'C_electricity_price [$/MWh]'
+
+    env = energypy.make_env(
+        'battery',
+        episode_sample='epoch',
+        episode_length=100,
+        observation_windows={column: (4, 2)}
+    )
+
+    for _ in range(3):
+        obs = env.reset()
+        episode = env.observation_space.episode
+
+        start = env.observation_space.data.index.get_loc(episode.index[0])
+        expected = env.observation_space.make_windows(start, start + 100)
+
+        np.testing.assert_array_equal(
+            env.observation_space._episode_values, episode.values)
+
+        for prepared, window in zip(
+                env.observation_space._window_values, expected):
+            np.testing.assert_array_equal(prepared, window)
+
+        assert obs.shape == (1, *env.observation_space.shape)
@@ -0,0 +1,108 @@
+""" tests for greedy evaluation on held out episodes """
+import queue
+
+import numpy as np
+
+import energypy
+from energypy.experiments.evaluation import Evaluator, init_worker
+
+
+class ExportedAgent(object):
+    """ stands in for a DQN - exports a random feed forward policy """
+    def __init__(self, env):
+        self.obs_dim = env.observation_space.shape[0]
+        self.discrete_actions = env.action_space.discretize(5)
+
+    def export(self, path):
+        np.savez(
+            path,
+            network='ff',
+            discrete_actions=self.discrete_actions,
+            observation_shape=np.array([self.obs_dim]),
+            action_shape=np.array([1]),
+            strides=np.array([], dtype=int),
+            **{'params/online/input_layer/weights':
+               np.random.randn(self.obs_dim, 8),
+               'params/online/input_layer/bias': np.zeros(8),
+               'params/online/output_layer/weights': np.random.randn(8, 5),
+               'params/online/output_layer/bias': np.zeros(5)}
+        )
+
+
+def test_evaluator(tmpdir):
+    env_config = {'env_id': 'battery', 'episode_length': 288}
+    env = energypy.make_env(**env_config)
+    agent = ExportedAgent(env)
+
+    num_samples = env.state_space.data.shape[0]
+
+    serial = Evaluator(
+        env_config, 1000, str(tmpdir.join('serial.npz')), num_workers=1)
+
+    #  held out episodes cover the end of the dataset
+    assert serial.episodes[-1][1] == num_samples
+    assert serial.episodes[0][0] == num_samples - 1000
+
+    summary = serial.evaluate(agent)
+
+    #  a no-op battery doesn't earn or pay anything
+    assert summary['mean_no_op_reward'] == 0
+    np.testing.assert_allclose(
+        summary['mean_regret'], -summary['mean_reward'])
+
+    parallel = Evaluator(
+        env_config, 1000, str(tmpdir.join('parallel.npz')), num_workers=2)
+
+    #  the same frozen policy gives the same rewards in parallel
+    np.random.seed(42)
+    first = serial.evaluate(agent)
+    np.random.seed(42)
+    second = parallel.evaluate(agent)
+
+    np.testing.assert_allclose(first['mean_reward'], second['mean_reward'])
+
+    parallel.close()
+
+
+def test_held_out_episodes(tmpdir):
+    """ training episodes never overlap the evaluation episodes """
+    for episode_sample in ['random', 'full', 'epoch']:
+        env_config = {
+            'env_id': 'battery',
+            'episode_length': 288,
+            'episode_sample': episode_sample
+        }
+        evaluator = Evaluator(
+            env_config, 1000, str(tmpdir.join('policy.npz')), num_workers=1)
+
+        env = energypy.make_env(**env_config)
+        env.hold_out(1000)
+
+        test_start = min(start for start, _ in evaluator.episodes)
+        test_index = env.state_space.data.index[test_start:]
+
+        for _ in range(20):
+            env.reset()
+            assert not env.state_space.episode.index.isin(test_index).any()
+
+
+def test_evaluator_pool(tmpdir):
+    """ the worker pool is started once and reused """
+    env_config = {'env_id': 'battery', 'episode_length': 288}
+    agent = ExportedAgent(energypy.make_env(**env_config))
+
+    evaluator = Evaluator(
+        env_config, 1000, str(tmpdir.join('policy.npz')), num_workers=2)
+
+    evaluator.evaluate(agent)
+    pool = evaluator.pool
+    evaluator.evaluate(agent)
+
+    assert evaluator.pool is pool
+    evaluator.close()
+    assert evaluator.pool is None
+
+
+def test_init_worker_no_block():
+    """ a replacement worker doesn't wait for a cpu block """
+    init_worker(queue.Queue())
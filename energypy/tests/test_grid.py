@@ -0,0 +1,58 @@
+""" tests for the grid market clearing """
+
+import numpy as np
+
+from energypy.envs.grid.grid import Bid, settle_market, clear_market
+
+
+def test_grid():
+    """ settle a simple two bid market """
+    market = [
+        Bid(price=50, offer=100, name='coal'),
+        Bid(price=10, offer=10, name='wind')
+    ]
+
+    bids = settle_market(market, demand=50, date='test')
+
+    assert bids[0].dispatch == 10
+    assert bids[0].name == 'wind'
+    assert bids[1].dispatch == 40
+    assert bids[1].name == 'coal'
+
+
+def test_clear_market():
+    """ the vectorized clearing matches settle_market for each interval """
+    num_intervals, num_participants = 50, 20
+
+    prices = np.random.uniform(0, 100, size=(num_intervals, num_participants))
+    offers = np.random.uniform(0, 10, size=(num_intervals, num_participants))
+    demand = np.random.uniform(0.1, 0.9, size=num_intervals) * offers.sum(axis=1)
+
+    clearing_prices, dispatch = clear_market(prices, offers, demand)
+
+    np.testing.assert_allclose(dispatch.sum(axis=1), demand)
+
+    for interval in range(num_intervals):
+        market = [
+            Bid(price=p, offer=o, name=n) for n, (p, o) in enumerate(
+                zip(prices[interval], offers[interval]))
+        ]
+
+        bids = settle_market(market, demand[interval], date=interval)
+
+        assert bids[-1].price == clearing_prices[interval]
+
+        for bid in bids:
+            np.testing.assert_allclose(
+                bid.dispatch, dispatch[interval, bid.name])
+
+
+def test_clear_market_short():
+    """ not enough offers to meet demand """
+    np.testing.assert_raises(
+        ValueError,
+        clear_market,
+        np.array([[10, 50]]),
+        np.array([[10, 10]]),
+        np.array([50])
+    )
@@ -0,0 +1,34 @@
+""" checks that env only use of energypy doesn't import heavy dependencies """
+
+import subprocess
+import sys
+
+
+def test_lazy_imports():
+    code = '; '.join([
+        'import sys',
+        'import energypy',
+        'env = energypy.make_env("battery")',
+        'env.reset()',
+        'env.step(env.action_space.sample())',
+        'heavy = ["tensorflow", "gym", "sklearn", "matplotlib"]',
+        'print([m for m in heavy if m in sys.modules])'
+    ])
+
+    output = subprocess.check_output([sys.executable, '-c', code])
+
+    assert output.decode().strip().split('\n')[-1] == '[]'
+
+
+def test_runner_is_a_class():
+    code = '; '.join([
+        'import sys',
+        'from energypy.experiments import Runner',
+        'from energypy.experiments.runner import Runner as Cls',
+        'assert isinstance(Runner, type) and Runner is Cls',
+        'print("tensorflow" in sys.modules)'
+    ])
+
+    output = subprocess.check_output([sys.executable, '-c', code])
+
+    assert output.decode().strip().split('\n')[-1] == 'False'
@@ -0,0 +1,64 @@
+""" tests for distilling a policy into a lookup table """
+import numpy as np
+
+import energypy
+from energypy.agents.lookup_table import LookupTable, distill
+from energypy.agents.numpy_policy import NumpyPolicy
+
+
+def export_policy(path, obs_dim, discrete_actions):
+    """ a random feed forward policy - same format as DQN.export """
+    num_actions = discrete_actions.shape[0]
+
+    np.savez(
+        path,
+        network='ff',
+        discrete_actions=discrete_actions,
+        observation_shape=np.array([obs_dim]),
+        action_shape=np.array([1]),
+        strides=np.array([], dtype=int),
+        **{'params/online/input_layer/weights':
+           np.random.randn(obs_dim, 16),
+           'params/online/input_layer/bias': np.random.randn(16),
+           'params/online/output_layer/weights':
+           np.random.randn(16, num_actions),
+           'params/online/output_layer/bias': np.zeros(num_actions)}
+    )
+
+
+def test_distill(tmpdir):
+    env = energypy.make_env('battery')
+    space = env.observation_space
+
+    path = str(tmpdir.join('policy.npz'))
+    export_policy(path, space.shape[0], env.action_space.discretize(5))
+    policy = NumpyPolicy(path)
+
+    features = [space.info[0], 'C_charge_level [MWh]']
+    table = distill(policy, space, features, num_bins=[7, 5], batch_size=8)
+
+    assert table.table.shape == (7, 5)
+
+    #  at the center of every cell the table acts the same as the policy
+    reference = (space.low + space.high) / 2
+    price, charge = np.meshgrid(*table.centers(), indexing='ij')
+
+    observations = np.repeat(reference.reshape(1, -1), price.size, axis=0)
+    observations[:, 0] = price.reshape(-1)
+    observations[:, space.info.index(features[1])] = charge.reshape(-1)
+
+    np.testing.assert_array_equal(
+        table.act(observations), policy.act(observations))
+
+    #  outside the grid is clipped to the edge cells
+    outside = np.array(observations[:1])
+    outside[0, 0] = space.high[0] + 100
+    np.testing.assert_array_equal(
+        table.cells(outside), [[6, 0]])
+
+    table.save(str(tmpdir.join('table.npz')))
+    loaded = LookupTable(str(tmpdir.join('table.npz')))
+
+    assert loaded.labels == features
+    np.testing.assert_array_equal(
+        loaded.act(observations), table.act(observations))
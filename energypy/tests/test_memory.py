@@ -32,3 +32,106 @@ def test_load_pickle_memory():
         exp, saved = np.array(exp), np.array(saved)
 
         np.testing.assert_equal(exp, saved)
+
+
+def test_checkpoint_memory(tmpdir):
+    """ incremental checkpoints only keep the experience in memory """
+    env = energypy.make_env('battery')
+
+    for memory_id in ['array', 'deque']:
+        path = str(tmpdir.join(memory_id))
+        mem = energypy.make_memory(memory_id=memory_id, env=env, size=50)
+
+        for step in range(120):
+            mem.remember(
+                env.observation_space.sample(),
+                env.action_space.sample(),
+                float(step),
+                env.observation_space.sample(),
+                step % 7 == 0
+            )
+
+            if step % 17 == 0:
+                mem.save_checkpoint(path)
+
+        mem.save_checkpoint(path)
+
+        #  old segments are removed as experience leaves the memory
+        assert len(tmpdir.join(memory_id).listdir()) < 6
+
+        new_mem = energypy.make_memory(
+            memory_id=memory_id, env=env, size=50).load_checkpoint(path)
+
+        assert len(new_mem) == 50
+        assert new_mem.count == 120
+
+        old, new = mem.latest(50), new_mem.latest(50)
+        for field in old.keys():
+            np.testing.assert_array_equal(old[field], new[field])
+
+
+def test_checkpoint_memory_count(tmpdir):
+    """ loading with the count of an older checkpoint drops newer segments """
+    env = energypy.make_env('battery')
+    path = str(tmpdir.join('memory'))
+    mem = energypy.make_memory(memory_id='array', env=env, size=50)
+
+    def remember(steps):
+        for step in range(steps):
+            mem.remember(
+                env.observation_space.sample(),
+                env.action_space.sample(),
+                float(mem.count),
+                env.observation_space.sample(),
+                False
+            )
+
+    remember(80)
+    count = mem.save_checkpoint(path)
+    consistent = mem.latest(50)
+
+    #  a later checkpoint that never made it into the experiment state
+    remember(30)
+    mem.save_checkpoint(path)
+
+    new_mem = energypy.make_memory(
+        memory_id='array', env=env, size=50).load_checkpoint(path, count)
+
+    assert new_mem.count == count == 80
+    np.testing.assert_array_equal(
+        new_mem.latest(50)['reward'], consistent['reward'])
+
+    #  the next checkpoint carries on from the restored count
+    assert new_mem.save_checkpoint(path) == 80
+
+
+def test_batch_prefetcher():
+    from energypy.common.memories.prefetch import BatchPrefetcher
+
+    env = energypy.make_env('battery')
+    mem = energypy.make_memory(memory_id='array', env=env, size=100)
+
+    prefetcher = BatchPrefetcher(lambda: mem.get_batch(8), num_batches=2)
+
+    for step in range(50):
+        with prefetcher.lock:
+            mem.remember(
+                env.observation_space.sample(),
+                env.action_space.sample(),
+                1.0,
+                env.observation_space.sample(),
+                False
+            )
+
+        batch = prefetcher.get()
+        assert batch['observation'].shape[1:] == env.observation_space.shape
+
+    prefetcher.stop()
+    assert prefetcher.queue.empty()
+
+    #  errors in the thread are raised by get
+    def fail():
+        raise ValueError('no experience')
+
+    prefetcher = BatchPrefetcher(fail)
+    np.testing.assert_raises(ValueError, prefetcher.get)
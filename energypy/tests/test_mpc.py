@@ -0,0 +1,121 @@
+""" tests for model predictive control of a battery """
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog
+
+import energypy
+from energypy.agents import mpc as mpc_module
+from energypy.agents.mpc import BatteryMPC, MPCPolicy
+
+
+def brute_force(mpc, prices, charge):
+    """ the best plan over every charge or discharge mode of each period """
+    mpc.update(prices, charge)
+    best = None
+
+    for modes in itertools.product([True, False], repeat=mpc.horizon):
+        modes = np.array(modes)
+        high = np.array(mpc.high)
+        high[mpc.charge][~modes] = 0
+        high[mpc.discharge][modes] = 0
+
+        result = linprog(
+            mpc.c, A_eq=mpc.A_eq, b_eq=mpc.b_eq,
+            bounds=list(zip(mpc.low, high)), method=mpc.method)
+
+        if best is None or result.fun < best:
+            best = result.fun
+
+    return best
+
+
+def test_warm_start():
+    """ warm started & cached plans are the same as full solves """
+    np.random.seed(42)
+    mpc = BatteryMPC(power_rating=2, capacity=4, horizon=4)
+    full = BatteryMPC(power_rating=2, capacity=4, horizon=4, cache_size=0)
+
+    for prices in [[10.0, 50.0, -5.0, 80.0], [-50.0] * 4]:
+        prices = np.array(prices)
+
+        for charge in np.random.uniform(0, 4, 50):
+            plan = mpc.plan(prices, charge)
+
+            #  without a last plan every plan is a full solve
+            full.last = None
+            expected = full.plan(prices, charge)
+
+            np.testing.assert_allclose(
+                mpc.c.dot(plan), full.c.dot(expected), atol=1e-6)
+
+            #  the plan starts from the charge
+            level = plan[mpc.level]
+            np.testing.assert_allclose(
+                level[0],
+                charge + 0.5 * (0.9 * plan[mpc.charge][0]
+                                - plan[mpc.discharge][0]),
+                atol=1e-6)
+
+            #  Battery can't charge & discharge at once
+            assert not mpc.simultaneous(plan).any()
+
+    assert mpc.warm_starts > 0
+    assert mpc.solves < 100
+
+    mpc.plan(prices, charge)
+    assert mpc.hits == 1
+
+
+def test_negative_prices(monkeypatch):
+    """ no burning energy through the losses when prices are negative """
+    for with_milp in [True, False]:
+        if not with_milp:
+            monkeypatch.setattr(mpc_module, 'milp', None)
+
+        mpc = BatteryMPC(power_rating=2, capacity=4, horizon=4)
+        plan = mpc.plan([-50.0] * 4, 4.0)
+
+        assert mpc.mode_solves == 1
+        assert not mpc.simultaneous(plan).any()
+
+        #  the mode fallback is feasible, the mixed integer plan optimal
+        best = brute_force(mpc, [-50.0] * 4, 4.0)
+        if with_milp:
+            np.testing.assert_allclose(mpc.c.dot(plan), best, atol=1e-6)
+        else:
+            assert mpc.c.dot(plan) >= best - 1e-6
+
+
+def test_mpc_year(tmpdir):
+    """ a year of five minute steps beats doing nothing, quickly """
+    for name in ['state', 'observation']:
+        data = energypy.load_dataset('example', name)
+        values = np.tile(data.values, (int(105120 / data.shape[0]) + 1, 1))
+
+        pd.DataFrame(
+            values[:105120],
+            index=pd.date_range('2017-01-01', periods=105120, freq='5min'),
+            columns=data.columns
+        ).to_csv(str(tmpdir.join('{}.csv'.format(name))))
+
+    env = energypy.make_env('battery', dataset=str(tmpdir), checked=False)
+    policy = MPCPolicy(env)
+
+    start = time.time()
+    observation, done, rewards = env.reset(), False, []
+    assert env.state_space.episode.shape[0] == 105120
+
+    while not done:
+        observation, reward, done, info = env.step(policy.act(observation))
+        rewards.append(reward)
+
+    assert time.time() - start < 60
+
+    env.reset()
+    no_op = env.simulate(
+        np.zeros((env.state_space.episode.shape[0], 1)))['reward'].sum()
+
+    assert np.sum(rewards) > no_op
@@ -0,0 +1,76 @@
+""" tests for acting with an exported DQN without tensorflow """
+import numpy as np
+
+from energypy.agents.numpy_policy import NumpyPolicy, conv2d
+
+
+def naive_conv2d(inputs, kernel, bias, stride):
+    num, height, width, _ = inputs.shape
+    kernel_h, kernel_w, _, filters = kernel.shape
+    out_h = (height - kernel_h) // stride + 1
+    out_w = (width - kernel_w) // stride + 1
+
+    out = np.zeros((num, out_h, out_w, filters))
+    for n in range(num):
+        for i in range(out_h):
+            for j in range(out_w):
+                patch = inputs[n,
+                               i * stride: i * stride + kernel_h,
+                               j * stride: j * stride + kernel_w, :]
+                for f in range(filters):
+                    out[n, i, j, f] = np.sum(patch * kernel[..., f]) + bias[f]
+
+    return np.maximum(out, 0)
+
+
+def test_conv2d():
+    inputs = np.random.randn(3, 12, 4, 2)
+    kernel = np.random.randn(3, 2, 2, 5)
+    bias = np.random.randn(5)
+
+    for stride in [1, 2]:
+        np.testing.assert_allclose(
+            conv2d(inputs, kernel, bias, stride),
+            naive_conv2d(inputs, kernel, bias, stride)
+        )
+
+
+def test_feed_forward_policy(tmpdir):
+    params = {
+        'online/input_layer/weights': np.random.randn(4, 8),
+        'online/input_layer/bias': np.random.randn(8),
+        'online/hidden_layer_1/weights': np.random.randn(8, 6),
+        'online/hidden_layer_1/bias': np.random.randn(6),
+        'online/output_layer/weights': np.random.randn(6, 5),
+        'online/output_layer/bias': np.random.randn(5),
+    }
+    discrete_actions = np.linspace(-2, 2, 5).reshape(5, 1)
+
+    path = str(tmpdir.join('policy.npz'))
+    np.savez(
+        path,
+        network='ff',
+        discrete_actions=discrete_actions,
+        observation_shape=np.array([4]),
+        action_shape=np.array([1]),
+        strides=np.array([], dtype=int),
+        **{'params/{}'.format(k): v for k, v in params.items()}
+    )
+
+    policy = NumpyPolicy(path)
+    obs = np.random.randn(100, 4)
+
+    layer = np.maximum(obs.dot(params['online/input_layer/weights'])
+                       + params['online/input_layer/bias'], 0)
+    layer = np.maximum(layer.dot(params['online/hidden_layer_1/weights'])
+                       + params['online/hidden_layer_1/bias'], 0)
+    q_values = layer.dot(params['online/output_layer/weights']) \
+        + params['online/output_layer/bias']
+
+    np.testing.assert_allclose(
+        policy.q_values(obs), q_values, rtol=1e-4, atol=1e-4)
+
+    actions = policy.act(obs)
+    assert actions.shape == (100, 1)
+    np.testing.assert_array_equal(
+        actions, discrete_actions[np.argmax(q_values, axis=1)])
@@ -0,0 +1,48 @@
+""" tests for thread & cpu budgets of parallel runs """
+import os
+
+import pytest
+
+from energypy.common.parallel import parse_cpus, allocate_cpus
+from energypy.common.parallel import available_cpus, pin_cpus
+from energypy.common.parallel import pop_session_config
+
+
+def test_parse_cpus():
+    assert parse_cpus('0-3,8') == [0, 1, 2, 3, 8]
+    assert parse_cpus('2, 1') == [1, 2]
+    assert parse_cpus([3, 1]) == [1, 3]
+    assert parse_cpus(None) == []
+
+
+def test_allocate_cpus():
+    assert allocate_cpus(2, '0-4') == [[0, 1, 2], [3, 4]]
+    assert allocate_cpus(4, '0-1') == [[0], [1], [0], [1]]
+
+    blocks = allocate_cpus(len(available_cpus()))
+    assert sorted(cpu for block in blocks for cpu in block) == \
+        available_cpus()
+
+
+def test_pop_session_config():
+    run_config = {'agent_id': 'dqn', 'intra_op_threads': '2', 'cpus': '0-1'}
+
+    assert pop_session_config(run_config) == {
+        'intra_op_threads': 2, 'inter_op_threads': 0, 'cpus': [0, 1]}
+    assert run_config == {'agent_id': 'dqn'}
+
+
+@pytest.mark.skipif(
+    not hasattr(os, 'sched_setaffinity'), reason='no cpu affinity')
+def test_pin_cpus():
+    cpus = available_cpus()
+
+    try:
+        pin_cpus(cpus[:1])
+        assert sorted(os.sched_getaffinity(0)) == cpus[:1]
+
+        #  the cpus before pinning are still available to launchers
+        assert available_cpus() == cpus
+
+    finally:
+        os.sched_setaffinity(0, cpus)
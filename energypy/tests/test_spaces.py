@@ -0,0 +1,58 @@
+""" tests for the array backed GlobalSpace """
+import itertools
+
+import numpy as np
+
+from energypy.common.spaces import GlobalSpace, ContinuousSpace, DiscreteSpace
+
+
+def make_space():
+    return GlobalSpace('action').from_spaces(
+        [ContinuousSpace(-2, 2), DiscreteSpace(3), ContinuousSpace(0, 1)],
+        ['rate', 'setpoint', 'valve']
+    )
+
+
+def test_bounds():
+    space = make_space()
+    space.extend(DiscreteSpace(2), 'switch')
+
+    np.testing.assert_array_equal(space.low, [-2, 0, 0, 0])
+    np.testing.assert_array_equal(space.high, [2, 2, 1, 1])
+    np.testing.assert_array_equal(
+        space.is_discrete, [False, True, False, True])
+
+
+def test_contains():
+    space = make_space()
+
+    assert space.contains(np.array([[0.5, 2, 1.0]]))
+    assert space.contains(np.array([[-2, 0, 0], [2, 1, 0.5]]))
+
+    #  every sample of a batch is checked
+    assert not space.contains(np.array([[-2, 0, 0], [2.1, 1, 0.5]]))
+    assert not space.contains(np.array([[0, 3, 0]]))
+    assert not space.contains(np.array([[0, 1.5, 0]]))
+    assert not space.contains(np.array([[0, 1]]))
+
+
+def test_sample():
+    space = make_space()
+    samples = space.sample(1000)
+
+    assert samples.shape == (1000, 3)
+    assert space.contains(samples)
+    assert set(samples[:, 1]) == {0, 1, 2}
+
+    assert space.sample().shape == (1, 3)
+
+
+def test_discretize():
+    space = make_space()
+    discrete = space.discretize(5)
+
+    expected = np.array(list(itertools.product(
+        np.linspace(-2, 2, 5), np.arange(3), np.linspace(0, 1, 5))))
+
+    np.testing.assert_allclose(discrete, expected)
+    assert space.contains(discrete)
@@ -0,0 +1,68 @@
+""" tests for hyperparameter sweeps with successive halving """
+import pytest
+
+from energypy.experiments.sweep import parse_grid, expand_grid
+from energypy.experiments.sweep import sample_configs, make_rungs
+from energypy.experiments.sweep import successive_halving
+
+
+def test_expand_grid():
+    space = parse_grid({
+        'learning_rate': '0.001;0.0001',
+        'layers': '25,25,25; 64,64',
+        'batch_size': '32'
+    })
+
+    assert space['layers'] == ['25,25,25', '64,64']
+
+    configs = expand_grid(space)
+    assert len(configs) == 4
+    assert {'batch_size': '32', 'layers': '64,64',
+            'learning_rate': '0.0001'} in configs
+
+
+def test_sample_configs():
+    space = parse_grid({
+        'learning_rate': 'loguniform(0.00001, 0.01)',
+        'tau': 'uniform(0.1, 0.2)',
+        'layers': '25,25;64,64'
+    })
+
+    assert space['learning_rate'] == (0.00001, 0.01, True)
+
+    with pytest.raises(ValueError):
+        expand_grid(space)
+
+    configs = sample_configs(space, 50, seed=42)
+    assert len(configs) == 50
+    assert configs == sample_configs(space, 50, seed=42)
+
+    for config in configs:
+        assert 0.00001 <= config['learning_rate'] <= 0.01
+        assert 0.1 <= config['tau'] <= 0.2
+        assert config['layers'] in ['25,25', '64,64']
+
+
+def test_successive_halving():
+    assert make_rungs(10, 90, eta=3) == [10, 30, 90]
+    assert make_rungs(10, 100, eta=3) == [10, 30, 90, 100]
+
+    runs = {'run_{}'.format(num): {'quality': num} for num in range(9)}
+    calls = []
+
+    def train(run_name, config, steps, resume):
+        calls.append((run_name, steps, resume))
+        return config['quality'] * steps
+
+    results = successive_halving(runs, train, [10, 30, 90], eta=3)
+
+    #  9 runs, then the best 3, then the best 1
+    assert len(results) == 9 + 3 + 1
+    assert [run for run, steps, _ in calls if steps == 30] == \
+        ['run_6', 'run_7', 'run_8']
+    assert [run for run, steps, _ in calls if steps == 90] == ['run_8']
+
+    #  only later rungs continue from a checkpoint
+    assert all(resume == (steps > 10) for _, steps, resume in calls)
+    assert results[-1] == {
+        'run': 'run_8', 'rung': 2, 'steps': 90, 'score': 720, 'quality': 8}
@@ -1,3 +1,5 @@
+import time
+
 import numpy as np
 import tensorflow as tf
 
@@ -5,6 +7,8 @@ from energypy.common.np_utils import find_sub_array_in_2D_array
 
 from energypy.common.tf_utils import make_copy_ops
 
+from energypy.experiments.runner import PhaseTimer
+
 
 def make_vars(num):
     """
@@ -71,3 +75,21 @@ def test_np_find_sub_array():
 
         assert find_sub_array_in_2D_array(
             sub_array, discrete_actions) == true_index
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+
+    for _ in range(10):
+        time.sleep(0.001)
+        timer.lap('act')
+        timer.lap('env_step')
+
+    summary = timer.summary(steps=10)
+
+    assert summary['act_ms_per_step'] >= 1.0
+    assert summary['env_step_ms_per_step'] < summary['act_ms_per_step']
+    assert summary['steps_per_sec'] <= 1000
+
+    timer.reset()
+    assert not timer.totals